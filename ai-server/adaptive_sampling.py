@@ -0,0 +1,100 @@
+import time
+import logging
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Source tag of eye-check results (eye_cascade.EAR_SOURCE)
+EAR_SOURCE = 'ear'
+
+# Sampling states, from sparsest to densest
+CALM = 'calm'
+WATCH = 'watch'
+ALERT = 'alert'
+
+def drowsy_probability(result):
+    """Probability of the Drowsy class from a detection result dict, or None if unknown"""
+    if not result or result.get("class_index") not in (0, 1):
+        return None
+    probability = result.get("probability")
+    if probability is None:
+        return None
+    return probability if result["class_index"] == 0 else 1.0 - probability
+
+class AdaptiveSampler:
+    """Per-stream scheduler that infers sparsely while the driver is clearly awake
+
+    * calm: every recent result is confidently Non-Drowsy, infer at ``calm_rate_hz``
+    * watch: no strong signal either way, infer at ``watch_rate_hz``
+    * alert: the drowsy probability is high or rising, infer every frame
+    """
+
+    def __init__(self, calm_rate_hz=1.5, watch_rate_hz=5.0, calm_threshold=0.1,
+                 alert_threshold=0.4, rise_threshold=0.1, history=5):
+        self.calm_rate_hz = calm_rate_hz
+        self.watch_rate_hz = watch_rate_hz
+        self.calm_threshold = calm_threshold
+        self.alert_threshold = alert_threshold
+        self.rise_threshold = rise_threshold
+        self.recent = deque(maxlen=history)
+
+        # Start densely until there is evidence the driver is awake
+        self.state = ALERT
+        self.last_inference_time = 0.0
+        self.frames = 0
+        self.inferred = 0
+
+    @property
+    def rate_hz(self):
+        """Current sampling rate, or None when every frame is inferred"""
+        if self.state == CALM:
+            return self.calm_rate_hz
+        if self.state == WATCH:
+            return self.watch_rate_hz
+        return None
+
+    def should_infer(self, now=None):
+        """Return True when this frame should go through the model"""
+        now = now or time.time()
+        self.frames += 1
+        rate = self.rate_hz
+        if rate is None or now - self.last_inference_time >= 1.0 / rate:
+            self.last_inference_time = now
+            self.inferred += 1
+            return True
+        return False
+
+    def update(self, result):
+        """Feed a fresh detection result and adjust the sampling state"""
+        if result and result.get("source") == EAR_SOURCE:
+            # Eye-check results carry no model probability, only the classifier's results move the state
+            return
+        probability = drowsy_probability(result)
+        if probability is None:
+            # No face or failed detection: keep an eye on the stream
+            self._set_state(WATCH)
+            return
+
+        self.recent.append(probability)
+        rising = len(self.recent) > 1 and probability - min(self.recent) >= self.rise_threshold
+        if probability >= self.alert_threshold or rising:
+            self._set_state(ALERT)
+        elif len(self.recent) == self.recent.maxlen and max(self.recent) < self.calm_threshold:
+            self._set_state(CALM)
+        else:
+            self._set_state(WATCH)
+
+    def _set_state(self, state):
+        if state != self.state:
+            logger.info(f"Drowsiness sampling {self.state} -> {state}")
+            self.state = state
+
+    def stats(self):
+        return {
+            "state": self.state,
+            "sampling_rate_hz": self.rate_hz,
+            "frames": self.frames,
+            "inferred": self.inferred,
+            "inference_ratio": self.inferred / self.frames if self.frames else 0.0,
+            "last_drowsy_probability": self.recent[-1] if self.recent else None,
+        }
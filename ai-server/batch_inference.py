@@ -0,0 +1,154 @@
+import time
+import logging
+from collections import deque
+
+import numpy as np
+import eventlet
+from eventlet.event import Event
+from eventlet.queue import Queue, Empty
+
+logger = logging.getLogger(__name__)
+
+# Defaults for the drowsiness micro-batching queue
+DEFAULT_MAX_BATCH_SIZE = 8
+DEFAULT_MAX_WAIT_MS = 15.0
+
+class BatchingInferenceQueue:
+    """Collect frames from all streams and run them through the model as one batch.
+
+    Callers submit one preprocessed frame and block (as a greenlet) until the
+    prediction for that frame comes back. A single batching greenlet waits for
+    up to ``max_wait_ms`` after the first queued frame, or until
+    ``max_batch_size`` frames are queued, then calls ``predict_fn`` once on the
+    stacked ``(N, H, W, C)`` array and hands each row back to its caller.
+    ``executor(fn, *args)`` runs the model call, e.g. in a native thread pool so
+    the hub is not blocked while the batch is inferred.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms=DEFAULT_MAX_WAIT_MS, stats_window=200, name="inference",
+                 executor=None):
+        self.predict_fn = predict_fn
+        self.executor = executor
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_ms = max(0.0, float(max_wait_ms))
+        self.name = name
+        self._queue = Queue()
+        self._worker = None
+        # Frames are stacked into this buffer instead of a new array per batch
+        self._batch_buffer = None
+
+        # Rolling statistics used for tuning under real load
+        self._batch_sizes = deque(maxlen=stats_window)
+        self._wait_times = deque(maxlen=stats_window)
+        self._batch_latencies = deque(maxlen=stats_window)
+        self._completed = deque(maxlen=stats_window)
+        self._total_frames = 0
+        self._total_batches = 0
+        self._total_errors = 0
+
+    def start(self):
+        """Start the batching greenlet if it is not running yet"""
+        if self._worker is None:
+            self._worker = eventlet.spawn(self._run)
+            logger.info(f"Started {self.name} batching queue "
+                        f"(max_batch_size={self.max_batch_size}, max_wait_ms={self.max_wait_ms})")
+
+    def submit(self, frame):
+        """Queue one preprocessed frame and wait for its prediction row"""
+        self.start()
+        done = Event()
+        self._queue.put((frame, time.time(), done))
+        # Raises the inference exception in the caller if the batch failed
+        return done.wait()
+
+    def _collect_batch(self):
+        """Block until a frame arrives, then gather more until the deadline or size limit"""
+        batch = [self._queue.get()]
+        deadline = batch[0][1] + self.max_wait_ms / 1000.0
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.time()
+            try:
+                if remaining > 0:
+                    batch.append(self._queue.get(timeout=remaining))
+                else:
+                    # Deadline passed, but take anything that is already waiting
+                    batch.append(self._queue.get_nowait())
+            except Empty:
+                break
+        return batch
+
+    def _stack(self, batch):
+        first = batch[0][0]
+        if (self._batch_buffer is None or self._batch_buffer.shape[1:] != first.shape
+                or self._batch_buffer.dtype != first.dtype):
+            self._batch_buffer = np.empty((self.max_batch_size,) + first.shape, dtype=first.dtype)
+        return np.stack([frame for frame, _, _ in batch], out=self._batch_buffer[:len(batch)])
+
+    def _run(self):
+        while True:
+            try:
+                batch = self._collect_batch()
+                self._run_batch(batch)
+            except Exception as e:
+                logger.error(f"Error in {self.name} batching loop: {e}")
+
+    def _run_batch(self, batch):
+        started = time.time()
+        try:
+            frames = self._stack(batch)
+            # Copy the (small) output, backends may reuse their output buffer
+            if self.executor is not None:
+                predictions = np.array(self.executor(self.predict_fn, frames))
+            else:
+                predictions = np.array(self.predict_fn(frames))
+        except Exception as e:
+            self._total_errors += 1
+            logger.error(f"Error running {self.name} batch of {len(batch)}: {e}")
+            for _, _, done in batch:
+                done.send_exception(e)
+            return
+
+        finished = time.time()
+        self._batch_sizes.append(len(batch))
+        self._wait_times.append(started - batch[0][1])
+        self._batch_latencies.append(finished - started)
+        self._completed.append((finished, len(batch)))
+        self._total_frames += len(batch)
+        self._total_batches += 1
+
+        for (_, _, done), prediction in zip(batch, predictions):
+            done.send(prediction)
+
+        if self._total_batches % 100 == 0:
+            stats = self.stats()
+            logger.info(f"{self.name} batching: avg batch {stats['avg_batch_size']:.2f}, "
+                        f"avg wait {stats['avg_wait_ms']:.1f} ms, "
+                        f"throughput {stats['throughput_fps']:.1f} frames/s")
+
+    def stats(self):
+        """Return batch size, queue wait and throughput figures over the recent window"""
+        throughput = 0.0
+        if len(self._completed) > 1:
+            span = self._completed[-1][0] - self._completed[0][0]
+            # The first batch only marks the start of the window
+            frames = sum(size for _, size in list(self._completed)[1:])
+            if span > 0:
+                throughput = frames / span
+
+        def average(values, scale=1.0):
+            return (sum(values) / len(values)) * scale if values else 0.0
+
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "total_batches": self._total_batches,
+            "total_frames": self._total_frames,
+            "total_errors": self._total_errors,
+            "queue_depth": self._queue.qsize(),
+            "last_batch_size": self._batch_sizes[-1] if self._batch_sizes else 0,
+            "avg_batch_size": average(self._batch_sizes),
+            "avg_wait_ms": average(self._wait_times, 1000.0),
+            "avg_batch_latency_ms": average(self._batch_latencies, 1000.0),
+            "throughput_fps": throughput,
+        }
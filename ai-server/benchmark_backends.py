@@ -0,0 +1,95 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+from drowsiness_processing import preprocess_image
+from inference_backends import BACKENDS, create_backend
+
+# Model files compared by default, skipped when they do not exist
+DEFAULT_CANDIDATES = [
+    ('keras', 'models/densenet201.keras'),
+    ('onnx', 'models/densenet201.onnx'),
+    ('onnx', 'models/densenet201.int8.onnx'),
+    ('tflite', 'models/densenet201.fp16.tflite'),
+    ('tflite', 'models/densenet201.int8.tflite'),
+]
+
+def load_frames(frames_dir, limit, size):
+    """Resized uint8 frames from captured JPEGs, or random frames if no folder is given"""
+    if not frames_dir:
+        rng = np.random.default_rng(0)
+        return [rng.integers(0, 256, size=(size[1], size[0], 3), dtype=np.uint8) for _ in range(limit)]
+    frames = []
+    for file_name in sorted(os.listdir(frames_dir)):
+        if file_name.lower().endswith(('.jpg', '.jpeg')):
+            frames.append(preprocess_image(os.path.join(frames_dir, file_name), size=size, dtype=np.uint8))
+        if len(frames) >= limit:
+            break
+    return frames
+
+def as_batches(frames, batch_size, dtype):
+    """Group frames into batches of the backend's input dtype"""
+    batches = []
+    for start in range(0, len(frames), batch_size):
+        batch = np.stack(frames[start:start + batch_size])
+        batches.append(batch if dtype == np.uint8 else batch.astype(np.float32) / 255.0)
+    return batches
+
+def benchmark(backend, batches, repeats, warmup=3):
+    """Return (mean ms per batch, p95 ms per batch, predicted classes of the first pass)"""
+    for _ in range(warmup):
+        backend.predict(batches[0])
+    predicted = np.concatenate([np.argmax(backend.predict(batch), axis=1) for batch in batches])
+    timings = []
+    for _ in range(repeats):
+        for batch in batches:
+            start = time.perf_counter()
+            backend.predict(batch)
+            timings.append((time.perf_counter() - start) * 1000.0)
+    return float(np.mean(timings)), float(np.percentile(timings, 95)), predicted
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare drowsiness model latency across inference backends on this CPU")
+    parser.add_argument("--model", action="append", metavar="BACKEND:PATH",
+                        help="Backend and model file to include, repeatable (default: the known model files that exist)")
+    parser.add_argument("--frames-dir", help="Folder with captured driver JPEG frames (random frames if omitted)")
+    parser.add_argument("--limit", type=int, default=50, help="Number of frames")
+    parser.add_argument("--batch-size", type=int, default=1, help="Frames per model call")
+    parser.add_argument("--repeats", type=int, default=3, help="Number of passes over the frames")
+
+    args = parser.parse_args()
+
+    candidates = DEFAULT_CANDIDATES
+    if args.model:
+        candidates = [tuple(entry.split(':', 1)) for entry in args.model]
+    candidates = [(name, path) for name, path in candidates if name in BACKENDS and os.path.exists(path)]
+    if not candidates:
+        print("Error: none of the model files exist")
+        sys.exit(1)
+
+    reference = None
+    baseline = None
+    print("=" * 92)
+    print(f"{'Backend':8}{'Model':36}{'Size MB':>10}{'Mean ms':>10}{'p95 ms':>10}{'Speedup':>9}{'Same class':>12}")
+    for name, path in candidates:
+        try:
+            backend = create_backend(name, path)
+        except Exception as e:
+            print(f"{name:8}{os.path.basename(path):36}  could not load: {e}")
+            continue
+        frames = load_frames(args.frames_dir, args.limit, backend.input_size)
+        if not frames:
+            print(f"Error: no JPEG frames found in {args.frames_dir}")
+            sys.exit(1)
+        mean_ms, p95_ms, predicted = benchmark(backend, as_batches(frames, args.batch_size, backend.input_dtype),
+                                               args.repeats)
+        if reference is None:
+            reference, baseline = predicted, mean_ms
+        same_class = np.mean(predicted == reference) if len(predicted) == len(reference) else float('nan')
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        print(f"{name:8}{os.path.basename(path):36}{size_mb:>10.1f}{mean_ms:>10.2f}{p95_ms:>10.2f}"
+              f"{baseline / mean_ms:>8.2f}x{same_class * 100:>11.1f}%")
+    print("=" * 92)
+    print(f"Batch size {args.batch_size}, {args.limit} frames x {args.repeats} passes; "
+          f"speedup and class agreement are against the first model.")
@@ -0,0 +1,93 @@
+import os
+import io
+import sys
+import time
+import argparse
+import numpy as np
+import cv2
+from PIL import Image
+from drowsiness_processing import MODEL_INPUT_SIZE, preprocess_image
+
+def pil_full_decode(data):
+    """Original path: full-resolution PIL decode, then resize"""
+    return preprocess_image(data, reduced_decode=False)
+
+def pil_draft_decode(data):
+    """PIL draft(): DCT-domain downscaled decode close to the model size, then resize"""
+    return preprocess_image(data, reduced_decode=True)
+
+def cv2_full_decode(data):
+    """Full-resolution OpenCV decode, then resize"""
+    bgr = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    rgb = cv2.cvtColor(cv2.resize(bgr, MODEL_INPUT_SIZE, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2RGB)
+    return rgb.astype(np.float32) / 255.0
+
+def cv2_reduced_decode(data, width):
+    """OpenCV reduced decode at the largest 1/2, 1/4, 1/8 scale still covering the model size"""
+    for scale, flag in ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4),
+                        (2, cv2.IMREAD_REDUCED_COLOR_2)):
+        if width // scale >= MODEL_INPUT_SIZE[0]:
+            break
+    else:
+        flag = cv2.IMREAD_COLOR
+    bgr = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), flag)
+    rgb = cv2.cvtColor(cv2.resize(bgr, MODEL_INPUT_SIZE, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2RGB)
+    return rgb.astype(np.float32) / 255.0
+
+def load_frames(frames_dir, limit):
+    frames = []
+    for file_name in sorted(os.listdir(frames_dir)):
+        if file_name.lower().endswith(('.jpg', '.jpeg')):
+            with open(os.path.join(frames_dir, file_name), 'rb') as f:
+                frames.append(f.read())
+        if limit and len(frames) >= limit:
+            break
+    return frames
+
+def time_decoder(decoder, frames, repeats):
+    """Return mean milliseconds per frame"""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for data in frames:
+            decoder(data)
+    return (time.perf_counter() - start) * 1000.0 / (repeats * len(frames))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark full vs reduced-scale JPEG decoding for model preprocessing")
+    parser.add_argument("frames_dir", help="Folder with captured camera JPEG frames")
+    parser.add_argument("--limit", type=int, default=200, help="Maximum number of frames to load")
+    parser.add_argument("--repeats", type=int, default=3, help="Number of passes over the frames")
+
+    args = parser.parse_args()
+
+    frames = load_frames(args.frames_dir, args.limit)
+    if not frames:
+        print(f"Error: no JPEG frames found in {args.frames_dir}")
+        sys.exit(1)
+
+    width, height = Image.open(io.BytesIO(frames[0])).size
+    print(f"Loaded {len(frames)} frames ({width}x{height}, avg {np.mean([len(f) for f in frames]) / 1024:.1f} KB)")
+
+    decoders = [
+        ("PIL full decode", pil_full_decode),
+        ("PIL draft decode", pil_draft_decode),
+        ("cv2 full decode", cv2_full_decode),
+        ("cv2 reduced decode", lambda data: cv2_reduced_decode(data, width)),
+    ]
+
+    # Compare against the original preprocessing to show the inputs stay close
+    reference = [pil_full_decode(data) for data in frames]
+
+    baseline = None
+    print("=" * 72)
+    print(f"{'Decoder':22}{'ms/frame':>12}{'Speedup':>12}{'Mean |diff|':>14}{'Max |diff|':>12}")
+    for name, decoder in decoders:
+        decoder(frames[0])  # Warm up
+        ms_per_frame = time_decoder(decoder, frames, args.repeats)
+        baseline = baseline or ms_per_frame
+        differences = [np.abs(decoder(data) - ref) for data, ref in zip(frames, reference)]
+        mean_diff = float(np.mean([d.mean() for d in differences])) * 255.0
+        max_diff = float(np.max([d.max() for d in differences])) * 255.0
+        print(f"{name:22}{ms_per_frame:>12.2f}{baseline / ms_per_frame:>11.2f}x{mean_diff:>14.2f}{max_diff:>12.1f}")
+    print("=" * 72)
+    print("Differences are in 0-255 pixel units against the full PIL decode.")
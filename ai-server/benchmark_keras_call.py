@@ -0,0 +1,79 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+from drowsiness_processing import preprocess_image
+from inference_backends import DEFAULT_MODEL_PATHS, KerasBackend
+
+def load_batches(frames_dir, limit, dtype, size):
+    """Preprocessed single-frame batches from captured JPEGs, or random frames if no folder is given"""
+    batches = []
+    if frames_dir:
+        for file_name in sorted(os.listdir(frames_dir)):
+            if file_name.lower().endswith(('.jpg', '.jpeg')):
+                frame = preprocess_image(os.path.join(frames_dir, file_name), size=size, dtype=dtype)
+                batches.append(np.expand_dims(frame, axis=0))
+            if len(batches) >= limit:
+                break
+    else:
+        rng = np.random.default_rng(0)
+        for _ in range(limit):
+            frame = rng.integers(0, 256, size=(1, size[1], size[0], 3), dtype=np.uint8)
+            batches.append(frame if dtype == np.uint8 else frame.astype(np.float32) / 255.0)
+    return batches
+
+def time_calls(predict, batches, repeats):
+    """Return (mean ms per call, p95 ms per call, outputs of the first pass)"""
+    predict(batches[0])  # Warm up (tracing / XLA compilation happens here)
+    outputs = [np.array(predict(batch)) for batch in batches]
+    timings = []
+    for _ in range(repeats):
+        for batch in batches:
+            start = time.perf_counter()
+            predict(batch)
+            timings.append((time.perf_counter() - start) * 1000.0)
+    timings.sort()
+    return sum(timings) / len(timings), timings[int(0.95 * (len(timings) - 1))], outputs
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare Keras model.predict with the traced tf.function call path")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATHS['keras'], help="Path to the .keras model")
+    parser.add_argument("--frames-dir", help="Folder with captured driver JPEG frames (random frames if omitted)")
+    parser.add_argument("--limit", type=int, default=50, help="Number of frames")
+    parser.add_argument("--repeats", type=int, default=3, help="Number of passes over the frames")
+    parser.add_argument("--xla", action="store_true", help="Also benchmark the XLA-compiled call")
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model):
+        print(f"Error: Model file {args.model} does not exist")
+        sys.exit(1)
+
+    backend = KerasBackend(args.model, fast_call=False)
+    backend.load()
+    batches = load_batches(args.frames_dir, args.limit, backend.input_dtype, backend.input_size)
+    if not batches:
+        print(f"Error: no JPEG frames found in {args.frames_dir}")
+        sys.exit(1)
+
+    candidates = [
+        ("model.predict", lambda batch: backend.model.predict(batch, verbose=0)),
+        ("tf.function", backend.build_fast_call(jit_compile=False)),
+    ]
+    if args.xla:
+        candidates.append(("tf.function + XLA", backend.build_fast_call(jit_compile=True)))
+
+    reference = None
+    baseline = None
+    print("=" * 78)
+    print(f"{'Call path':20}{'Mean ms':>10}{'p95 ms':>10}{'Speedup':>10}{'Max |diff|':>14}{'Same class':>14}")
+    for name, predict in candidates:
+        mean_ms, p95_ms, outputs = time_calls(predict, batches, args.repeats)
+        if reference is None:
+            reference, baseline = outputs, mean_ms
+        max_diff = max(float(np.max(np.abs(output - ref))) for output, ref in zip(outputs, reference))
+        same_class = np.mean([np.argmax(output) == np.argmax(ref) for output, ref in zip(outputs, reference)])
+        print(f"{name:20}{mean_ms:>10.2f}{p95_ms:>10.2f}{baseline / mean_ms:>9.2f}x{max_diff:>14.2e}{same_class * 100:>13.1f}%")
+    print("=" * 78)
+    print(f"Batch size 1, {len(batches)} frames x {args.repeats} passes; differences are against model.predict.")
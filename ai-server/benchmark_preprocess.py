@@ -0,0 +1,69 @@
+import os
+import gc
+import sys
+import time
+import argparse
+import tracemalloc
+import numpy as np
+from drowsiness_processing import preprocess_image, PreprocessEngine
+
+def original_preprocess(data):
+    """Per-frame allocating path: new float32 array, normalized copy and batch dimension"""
+    return np.expand_dims(preprocess_image(data), axis=0)
+
+def measure(preprocess, frames, repeats):
+    """Return (ms per frame, KB allocated per frame, gen-0 GC collections) for a preprocessing function"""
+    preprocess(frames[0])  # Warm up
+    gc.collect()
+    collections_before = gc.get_stats()[0]['collections']
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    allocated = 0
+    for _ in range(repeats):
+        for data in frames:
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            preprocess(data)
+            _, peak = tracemalloc.get_traced_memory()
+            allocated += peak - before
+    elapsed = time.perf_counter() - start
+    tracemalloc.stop()
+
+    count = repeats * len(frames)
+    collections = gc.get_stats()[0]['collections'] - collections_before
+    return elapsed * 1000.0 / count, allocated / 1024.0 / count, collections
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare per-frame allocations of the original and buffered preprocessing")
+    parser.add_argument("frames_dir", help="Folder with captured camera JPEG frames")
+    parser.add_argument("--limit", type=int, default=100, help="Maximum number of frames to load")
+    parser.add_argument("--repeats", type=int, default=3, help="Number of passes over the frames")
+
+    args = parser.parse_args()
+
+    frames = []
+    for file_name in sorted(os.listdir(args.frames_dir)):
+        if file_name.lower().endswith(('.jpg', '.jpeg')):
+            with open(os.path.join(args.frames_dir, file_name), 'rb') as f:
+                frames.append(f.read())
+        if len(frames) >= args.limit:
+            break
+    if not frames:
+        print(f"Error: no JPEG frames found in {args.frames_dir}")
+        sys.exit(1)
+
+    engine = PreprocessEngine()
+    candidates = [
+        ("Allocating", original_preprocess),
+        ("Preallocated engine", lambda data: engine.preprocess(data)),
+    ]
+
+    print("=" * 68)
+    print(f"{'Preprocessing':22}{'ms/frame':>12}{'Peak KB/frame':>16}{'Gen-0 GCs':>14}")
+    for name, preprocess in candidates:
+        ms_per_frame, kb_per_frame, collections = measure(preprocess, frames, args.repeats)
+        print(f"{name:22}{ms_per_frame:>12.2f}{kb_per_frame:>16.1f}{collections:>14}")
+    print("=" * 68)
+    print("Peak KB/frame is the largest amount of memory allocated while preprocessing one frame.")
@@ -0,0 +1,113 @@
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+import numpy as np
+
+# Marks the result line printed by a trial subprocess
+TRIAL_RESULT_PREFIX = 'TRIAL_RESULT '
+RUNTIMES = ['ultralytics', 'onnx', 'openvino']
+
+def load_frames(frames_dir, limit):
+    """BGR frames from captured front-cam JPEGs, or random frames if no folder is given"""
+    import cv2
+
+    if not frames_dir:
+        rng = np.random.default_rng(0)
+        return [rng.integers(0, 256, size=(480, 640, 3), dtype=np.uint8) for _ in range(limit)]
+    frames = []
+    for file_name in sorted(os.listdir(frames_dir)):
+        if file_name.lower().endswith(('.jpg', '.jpeg')):
+            frames.append(cv2.imread(os.path.join(frames_dir, file_name)))
+        if len(frames) >= limit:
+            break
+    return frames
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def run_trial(runtime, args):
+    """Load the model the way the server would and time it (inside a fresh process)"""
+    started = time.perf_counter()
+    if runtime == 'ultralytics':
+        from ultralytics import YOLO
+        model = YOLO(args.model)
+        detect = lambda frame: model(frame, imgsz=args.imgsz, verbose=False)[0].boxes.cls.cpu().numpy()
+    else:
+        from yolo_runtime import YoloRuntimeDetector, find_exported_models
+        model_paths = find_exported_models(args.model, runtime, [args.imgsz])
+        if not model_paths:
+            raise RuntimeError(f"no {runtime} export at imgsz {args.imgsz}, run export_yolo.py first")
+        model = YoloRuntimeDetector(model_paths, runtime=runtime)
+        model.load()
+        detect = lambda frame: model.detect(frame, args.imgsz)[:, 5]
+
+    frames = load_frames(args.frames_dir, args.limit)
+    detect(frames[0])
+    # Import, model load and the first frame, as at server startup
+    startup = time.perf_counter() - started
+
+    timings = []
+    detections = 0
+    for _ in range(args.repeats):
+        for frame in frames:
+            start = time.perf_counter()
+            classes = detect(frame)
+            timings.append((time.perf_counter() - start) * 1000.0)
+            detections += len(classes)
+    return {
+        "startup_s": startup,
+        "mean_ms": float(np.mean(timings)),
+        "p95_ms": float(np.percentile(timings, 95)),
+        "detections_per_frame": detections / len(timings),
+        "peak_rss_mb": peak_rss_mb(),
+        "torch_loaded": 'torch' in sys.modules,
+    }
+
+def launch_trial(runtime, args):
+    """Run one runtime in a subprocess so startup and memory are measured from scratch"""
+    command = [sys.executable, os.path.abspath(__file__), '--trial', runtime, '--model', args.model,
+               '--imgsz', str(args.imgsz), '--limit', str(args.limit), '--repeats', str(args.repeats)]
+    if args.frames_dir:
+        command += ['--frames-dir', args.frames_dir]
+    completed = subprocess.run(command, capture_output=True, text=True)
+    for line in completed.stdout.splitlines():
+        if line.startswith(TRIAL_RESULT_PREFIX):
+            return json.loads(line[len(TRIAL_RESULT_PREFIX):])
+    print(f"{runtime} failed:\n{completed.stderr[-2000:]}")
+    return None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the ultralytics traffic model with its ONNX Runtime / OpenVINO exports")
+    parser.add_argument("--model", default="models/best.pt", help="YOLOv8 .pt model (exports are found next to it)")
+    parser.add_argument("--runtime", choices=RUNTIMES, nargs="+", default=RUNTIMES, help="Runtimes to compare")
+    parser.add_argument("--imgsz", type=int, default=640, help="Input size")
+    parser.add_argument("--frames-dir", help="Folder with captured front-cam JPEG frames (random frames if omitted)")
+    parser.add_argument("--limit", type=int, default=30, help="Number of frames")
+    parser.add_argument("--repeats", type=int, default=3, help="Number of passes over the frames")
+    parser.add_argument("--trial", choices=RUNTIMES, help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+
+    if args.trial:
+        print(TRIAL_RESULT_PREFIX + json.dumps(run_trial(args.trial, args)))
+        sys.exit(0)
+
+    baseline = None
+    print("=" * 86)
+    print(f"{'Runtime':14}{'Startup s':>11}{'Peak RSS MB':>13}{'Mean ms':>10}{'p95 ms':>10}{'Speedup':>9}"
+          f"{'Dets/frame':>12}{'torch':>7}")
+    for runtime in args.runtime:
+        result = launch_trial(runtime, args)
+        if result is None:
+            continue
+        baseline = baseline or result
+        print(f"{runtime:14}{result['startup_s']:>11.2f}{result['peak_rss_mb']:>13.0f}{result['mean_ms']:>10.2f}"
+              f"{result['p95_ms']:>10.2f}{baseline['mean_ms'] / result['mean_ms']:>8.2f}x"
+              f"{result['detections_per_frame']:>12.2f}{'yes' if result['torch_loaded'] else 'no':>7}")
+    print("=" * 86)
+    print(f"imgsz {args.imgsz}, {args.limit} frames x {args.repeats} passes; speedup is against the first runtime.")
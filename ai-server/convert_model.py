@@ -6,10 +6,22 @@ import tensorflow as tf
 import sys
 import os
 
-def convert_keras_to_onnx(keras_model_path, onnx_model_path):
+def wrap_uint8_input(model):
+    """Return a model taking raw uint8 NHWC pixels, with the cast and /255 inside the graph"""
+    inputs = tf.keras.Input(shape=model.input_shape[1:], dtype=tf.uint8, name="image_uint8")
+    # Rescaling casts its input to float32 before scaling
+    x = tf.keras.layers.Rescaling(1.0 / 255)(inputs)
+    outputs = model(x)
+    return tf.keras.Model(inputs, outputs, name=f"{model.name}_uint8")
+
+def convert_keras_to_onnx(keras_model_path, onnx_model_path, uint8_input=False):
     # Load the Keras model
     model = tf.keras.models.load_model(keras_model_path)
     
+    # Optionally fold the input normalization into the graph
+    if uint8_input:
+        model = wrap_uint8_input(model)
+    
     # Convert the model to ONNX format
     model_proto, _ = tf2onnx.convert.from_keras(model)
     
@@ -17,18 +29,21 @@ def convert_keras_to_onnx(keras_model_path, onnx_model_path):
     with open(onnx_model_path, "wb") as f:
         f.write(model_proto.SerializeToString())
     
-    print(f"Model converted and saved to {onnx_model_path}")
+    print(f"Model converted and saved to {onnx_model_path}" + (" (uint8 input)" if uint8_input else ""))
 
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print("Usage: python convert_model.py <keras_model_path> <onnx_model_path>")
+    uint8_input = '--uint8-input' in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != '--uint8-input']
+    
+    if len(args) < 2:
+        print("Usage: python convert_model.py <keras_model_path> <onnx_model_path> [--uint8-input]")
         sys.exit(1)
     
-    keras_model_path = sys.argv[1]
-    onnx_model_path = sys.argv[2]
+    keras_model_path = args[0]
+    onnx_model_path = args[1]
     
     if not os.path.exists(keras_model_path):
         print(f"Error: Keras model file {keras_model_path} does not exist")
         sys.exit(1)
     
-    convert_keras_to_onnx(keras_model_path, onnx_model_path) 
\ No newline at end of file
+    convert_keras_to_onnx(keras_model_path, onnx_model_path, uint8_input)
@@ -8,12 +8,25 @@ import tensorflow as tf
 from tensorflow import keras
 import tf2onnx
 
-def convert_keras_to_onnx(keras_model_path, onnx_model_path):
+def wrap_uint8_input(model):
+    """Return a model taking raw uint8 NHWC pixels, with the cast and /255 inside the graph"""
+    inputs = keras.Input(shape=model.input_shape[1:], dtype=tf.uint8, name="image_uint8")
+    # Rescaling casts its input to float32 before scaling
+    x = keras.layers.Rescaling(1.0 / 255)(inputs)
+    outputs = model(x)
+    return keras.Model(inputs, outputs, name=f"{model.name}_uint8")
+
+def convert_keras_to_onnx(keras_model_path, onnx_model_path, uint8_input=False):
     # Load the Keras model
     print(f"Loading Keras model from: {keras_model_path}")
     model = keras.models.load_model(keras_model_path)
     print("Model loaded successfully")
     
+    # Optionally fold the input normalization into the graph
+    if uint8_input:
+        print("Wrapping model to take uint8 input")
+        model = wrap_uint8_input(model)
+    
     # Convert the model to ONNX format
     print(f"Converting model to ONNX format")
     model_proto, _ = tf2onnx.convert.from_keras(model)
@@ -27,8 +40,9 @@ def convert_keras_to_onnx(keras_model_path, onnx_model_path):
 
 if __name__ == "__main__":
     # Define the paths
+    uint8_input = '--uint8-input' in sys.argv
     keras_model_path = "models/densenet201.keras"
-    onnx_model_path = "models/densenet201.onnx"
+    onnx_model_path = "models/densenet201_uint8.onnx" if uint8_input else "models/densenet201.onnx"
     
     # Get full paths
     script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -44,6 +58,6 @@ if __name__ == "__main__":
     os.makedirs(os.path.dirname(onnx_model_full_path), exist_ok=True)
     
     # Convert the model
-    convert_keras_to_onnx(keras_model_full_path, onnx_model_full_path)
+    convert_keras_to_onnx(keras_model_full_path, onnx_model_full_path, uint8_input)
     
     print(f"Run your ONNX model with: python main.py") 
\ No newline at end of file
@@ -0,0 +1,68 @@
+# This script converts the Keras drowsiness model to TensorFlow Lite (FP16 or dynamic-range INT8)
+# Run this with Python 3.10 or 3.11 which supports TensorFlow; the gateway only needs tflite-runtime
+# pip install tensorflow==2.12.0
+
+import os
+import sys
+import argparse
+import tensorflow as tf
+from convert_model import wrap_uint8_input
+
+QUANTIZATIONS = ['none', 'fp16', 'int8']
+
+def default_output_path(keras_model_path, quantization):
+    """models/densenet201.keras -> models/densenet201.fp16.tflite"""
+    stem = os.path.splitext(keras_model_path)[0]
+    suffix = '' if quantization == 'none' else f".{quantization}"
+    return f"{stem}{suffix}.tflite"
+
+def convert_keras_to_tflite(keras_model_path, tflite_model_path, quantization='fp16', uint8_input=False):
+    """Convert a .keras model to .tflite
+
+    ``fp16`` stores the weights as float16 (half the size, float32 compute on
+    CPU). ``int8`` is dynamic-range quantization: int8 weights, with
+    activations quantized on the fly, so no calibration data is needed.
+    Inputs and outputs stay float32 either way.
+    """
+    model = tf.keras.models.load_model(keras_model_path)
+
+    # Optionally fold the input normalization into the graph
+    if uint8_input:
+        model = wrap_uint8_input(model)
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantization == 'fp16':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == 'int8':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    tflite_model = converter.convert()
+
+    with open(tflite_model_path, "wb") as f:
+        f.write(tflite_model)
+
+    size_mb = os.path.getsize(tflite_model_path) / 1024 / 1024
+    print(f"Model converted and saved to {tflite_model_path} ({quantization}, {size_mb:.1f} MB)"
+          + (" (uint8 input)" if uint8_input else ""))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert the Keras drowsiness model to TensorFlow Lite")
+    parser.add_argument("keras_model", nargs="?", default="models/densenet201.keras", help="Path to the Keras model")
+    parser.add_argument("--quantization", choices=QUANTIZATIONS, nargs="+", default=['fp16', 'int8'],
+                        help="One or more variants to export")
+    parser.add_argument("--output", help="Output path (only with a single quantization)")
+    parser.add_argument("--uint8-input", action="store_true",
+                        help="Take raw uint8 pixels and normalize inside the graph")
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.keras_model):
+        print(f"Error: Keras model file {args.keras_model} does not exist")
+        sys.exit(1)
+    if args.output and len(args.quantization) > 1:
+        print("Error: --output needs a single --quantization")
+        sys.exit(1)
+
+    for quantization in args.quantization:
+        output = args.output or default_output_path(args.keras_model, quantization)
+        convert_keras_to_tflite(args.keras_model, output, quantization, args.uint8_input)
@@ -0,0 +1,231 @@
+# This script distills the DenseNet201 drowsiness model into a small student model
+# Run this with Python 3.10 or 3.11 which supports TensorFlow
+# pip install tensorflow==2.12.0 tf2onnx onnxruntime
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+from tensorflow.keras.preprocessing.image import ImageDataGenerator as data_augment
+from convert_model import convert_keras_to_onnx
+
+IMAGE_SIZE = (224, 224)
+
+def create_student(architecture, image_size=IMAGE_SIZE):
+    """Build a small classifier that takes the same [0, 1] RGB input as the teacher
+
+    The student outputs logits; softmax is appended when exporting so the
+    deployed model returns class probabilities like DenseNet201 does.
+    """
+    inputs = keras.Input(shape=image_size + (3,))
+    if architecture == 'mobilenetv3small':
+        # MobileNetV3 expects [-1, 1] when its built-in preprocessing is disabled
+        x = keras.layers.Rescaling(2.0, offset=-1.0)(inputs)
+        base = keras.applications.MobileNetV3Small(
+            input_shape=image_size + (3,), include_top=False, weights='imagenet',
+            include_preprocessing=False, pooling='avg'
+        )
+    elif architecture == 'efficientnetb0':
+        # Closest Keras application to EfficientNet-Lite0; it rescales [0, 255] input itself
+        x = keras.layers.Rescaling(255.0)(inputs)
+        base = keras.applications.EfficientNetB0(
+            input_shape=image_size + (3,), include_top=False, weights='imagenet', pooling='avg'
+        )
+    else:
+        raise ValueError(f"Unknown student architecture: {architecture}")
+
+    x = base(x)
+    x = keras.layers.Dropout(0.2)(x)
+    logits = keras.layers.Dense(2)(x)
+    return keras.Model(inputs, logits, name=f"student_{architecture}")
+
+class Distiller(keras.Model):
+    """Train a student on hard labels plus the teacher's temperature-softened predictions"""
+
+    def __init__(self, student, teacher, alpha=0.3, temperature=4.0):
+        super().__init__()
+        self.student = student
+        self.teacher = teacher
+        self.alpha = alpha
+        self.temperature = temperature
+        self.student_loss_fn = keras.losses.SparseCategoricalCrossentropy(from_logits=True)
+        self.distillation_loss_fn = keras.losses.KLDivergence()
+        self.accuracy = keras.metrics.SparseCategoricalAccuracy(name='accuracy')
+        self.loss_tracker = keras.metrics.Mean(name='loss')
+
+    @property
+    def metrics(self):
+        return [self.loss_tracker, self.accuracy]
+
+    def teacher_logits(self, x):
+        # The teacher ends in softmax, so recover logits from its probabilities
+        probabilities = self.teacher(x, training=False)
+        return tf.math.log(tf.clip_by_value(probabilities, 1e-7, 1.0))
+
+    def train_step(self, data):
+        x, y = data
+        y = tf.cast(y, tf.int32)
+        teacher_logits = self.teacher_logits(x)
+
+        with tf.GradientTape() as tape:
+            student_logits = self.student(x, training=True)
+            student_loss = self.student_loss_fn(y, student_logits)
+            distillation_loss = self.distillation_loss_fn(
+                tf.nn.softmax(teacher_logits / self.temperature),
+                tf.nn.softmax(student_logits / self.temperature),
+            ) * (self.temperature ** 2)
+            loss = self.alpha * student_loss + (1 - self.alpha) * distillation_loss
+
+        gradients = tape.gradient(loss, self.student.trainable_variables)
+        self.optimizer.apply_gradients(zip(gradients, self.student.trainable_variables))
+
+        self.loss_tracker.update_state(loss)
+        self.accuracy.update_state(y, student_logits)
+        return {m.name: m.result() for m in self.metrics}
+
+    def test_step(self, data):
+        x, y = data
+        y = tf.cast(y, tf.int32)
+        student_logits = self.student(x, training=False)
+        self.loss_tracker.update_state(self.student_loss_fn(y, student_logits))
+        self.accuracy.update_state(y, student_logits)
+        return {m.name: m.result() for m in self.metrics}
+
+    def call(self, x):
+        return self.student(x)
+
+def create_batches(data_dir, batch_size, image_size=IMAGE_SIZE):
+    """Create train/val/test generators from a DDD split made by split-folders"""
+    train_datagen = data_augment(
+        rescale=1./255,
+        brightness_range=[0.8, 1.2],
+        rotation_range=20,
+        width_shift_range=0.2,
+        height_shift_range=0.2,
+        zoom_range=[0.8, 1.2],
+        horizontal_flip=True,
+        fill_mode='nearest'
+    )
+    eval_datagen = data_augment(rescale=1./255)
+
+    train_batches = train_datagen.flow_from_directory(
+        os.path.join(data_dir, 'train'), target_size=image_size,
+        batch_size=batch_size, class_mode='binary', shuffle=True
+    )
+    val_batches = eval_datagen.flow_from_directory(
+        os.path.join(data_dir, 'val'), target_size=image_size,
+        batch_size=batch_size, class_mode='binary', shuffle=False
+    )
+    test_batches = eval_datagen.flow_from_directory(
+        os.path.join(data_dir, 'test'), target_size=image_size,
+        batch_size=batch_size, class_mode='binary', shuffle=False
+    )
+    return train_batches, val_batches, test_batches
+
+def evaluate_accuracy(model, batches):
+    """Accuracy of a model returning logits or probabilities on a non-shuffled generator"""
+    batches.reset()
+    predictions = model.predict(batches, verbose=0)
+    predicted = np.argmax(predictions, axis=1)
+    return float(np.mean(predicted == batches.classes[:len(predicted)]))
+
+def measure_keras_latency(model, runs=30, warmup=5, image_size=IMAGE_SIZE):
+    """Mean single-frame latency in milliseconds for a direct model call"""
+    image_array = tf.constant(np.random.rand(1, *image_size, 3).astype(np.float32))
+    for _ in range(warmup):
+        model(image_array, training=False)
+    start = time.perf_counter()
+    for _ in range(runs):
+        model(image_array, training=False)
+    return (time.perf_counter() - start) * 1000.0 / runs
+
+def measure_onnx_latency(model_path, runs=30, warmup=5, image_size=IMAGE_SIZE):
+    """Mean single-frame latency in milliseconds through ONNX Runtime"""
+    import onnxruntime as ort
+    session = ort.InferenceSession(model_path, providers=['CPUExecutionProvider'])
+    input_name = session.get_inputs()[0].name
+    image_array = np.random.rand(1, *image_size, 3).astype(np.float32)
+    for _ in range(warmup):
+        session.run(None, {input_name: image_array})
+    start = time.perf_counter()
+    for _ in range(runs):
+        session.run(None, {input_name: image_array})
+    return (time.perf_counter() - start) * 1000.0 / runs
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distill the DenseNet201 drowsiness model into a small student")
+    parser.add_argument("data_dir", help="DDD split folder with train/val/test subfolders (e.g. Dataset2)")
+    parser.add_argument("--teacher", default="models/densenet201.keras", help="Path to the teacher Keras model")
+    parser.add_argument("--teacher-onnx", default="models/densenet201.onnx",
+                        help="Teacher ONNX model used for the latency comparison, if present")
+    parser.add_argument("--student", choices=['mobilenetv3small', 'efficientnetb0'], default='mobilenetv3small',
+                        help="Student architecture")
+    parser.add_argument("--output", default="models/drowsiness_student.keras", help="Path for the student Keras model")
+    parser.add_argument("--epochs", type=int, default=10, help="Number of distillation epochs")
+    parser.add_argument("--batch-size", type=int, default=64, help="Training batch size")
+    parser.add_argument("--alpha", type=float, default=0.3,
+                        help="Weight of the hard-label loss (the rest goes to the teacher's soft labels)")
+    parser.add_argument("--temperature", type=float, default=4.0, help="Distillation temperature")
+    parser.add_argument("--learning-rate", type=float, default=0.001, help="Adam learning rate")
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.teacher):
+        print(f"Error: teacher model {args.teacher} does not exist")
+        sys.exit(1)
+
+    print(f"Loading teacher model from: {args.teacher}")
+    teacher = keras.models.load_model(args.teacher)
+    teacher.trainable = False
+
+    train_batches, val_batches, test_batches = create_batches(args.data_dir, args.batch_size)
+
+    student = create_student(args.student)
+    student.summary()
+
+    distiller = Distiller(student, teacher, alpha=args.alpha, temperature=args.temperature)
+    distiller.compile(optimizer=keras.optimizers.Adam(learning_rate=args.learning_rate))
+
+    start_time = time.time()
+    distiller.fit(
+        train_batches,
+        epochs=args.epochs,
+        validation_data=val_batches,
+        callbacks=[
+            keras.callbacks.EarlyStopping(monitor='val_loss', patience=3, restore_best_weights=True),
+            keras.callbacks.ReduceLROnPlateau(monitor='val_loss', factor=0.5, patience=2),
+        ]
+    )
+    print(f"Distillation time: {time.time() - start_time:.2f}s")
+
+    # Append softmax so the deployed student returns probabilities like the teacher
+    deployed_student = keras.Sequential([student, keras.layers.Softmax()], name=student.name)
+    deployed_student.build((None,) + IMAGE_SIZE + (3,))
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    deployed_student.save(args.output)
+    print(f"Student model saved to {args.output}")
+
+    onnx_output = os.path.splitext(args.output)[0] + '.onnx'
+    convert_keras_to_onnx(args.output, onnx_output)
+
+    # Report accuracy and latency of the student against the teacher
+    teacher_accuracy = evaluate_accuracy(teacher, test_batches)
+    student_accuracy = evaluate_accuracy(deployed_student, test_batches)
+    teacher_latency = measure_keras_latency(teacher)
+    student_latency = measure_keras_latency(deployed_student)
+    student_onnx_latency = measure_onnx_latency(onnx_output)
+    teacher_onnx_latency = measure_onnx_latency(args.teacher_onnx) if os.path.exists(args.teacher_onnx) else None
+
+    print("=" * 60)
+    print(f"{'':20}{'Teacher':>14}{'Student':>14}")
+    print(f"{'Parameters':20}{teacher.count_params():>14,}{deployed_student.count_params():>14,}")
+    print(f"{'Test accuracy':20}{teacher_accuracy * 100:>13.2f}%{student_accuracy * 100:>13.2f}%")
+    print(f"{'Keras latency (ms)':20}{teacher_latency:>14.2f}{student_latency:>14.2f}")
+    teacher_onnx_text = f"{teacher_onnx_latency:>14.2f}" if teacher_onnx_latency is not None else f"{'n/a':>14}"
+    print(f"{'ONNX latency (ms)':20}{teacher_onnx_text}{student_onnx_latency:>14.2f}")
+    print("=" * 60)
+    print(f"Run the server with it: python main.py --backend onnx --model {onnx_output}")
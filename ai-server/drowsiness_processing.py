@@ -0,0 +1,128 @@
+import io
+import time
+import logging
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Input size expected by the DenseNet201 drowsiness model
+MODEL_INPUT_SIZE = (224, 224)
+
+# Class labels (0=Drowsy, 1=Non-Drowsy based on the model)
+CLASS_LABELS = ["Drowsy", "Non-Drowsy"]
+
+# Reported instead of a class when face cropping finds no face in the frame
+NO_FACE_RESULT = "No Face"
+
+def load_image(source, draft_size=None):
+    """Open image bytes, a file path, a PIL Image or an RGB array as an RGB PIL Image
+
+    With ``draft_size``, JPEGs are decoded at the smallest DCT scale (1/2, 1/4
+    or 1/8) that is still at least that large, which skips most of the
+    decoding work when the image is only going to be shrunk afterwards.
+    """
+    if isinstance(source, Image.Image):
+        image = source
+    elif isinstance(source, np.ndarray):
+        image = Image.fromarray(source)
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        image = Image.open(io.BytesIO(source))
+    else:
+        image = Image.open(source)
+
+    if draft_size is not None and image.format == 'JPEG':
+        image.draft('RGB', draft_size)
+    return image.convert('RGB')
+
+def preprocess_image(source, size=MODEL_INPUT_SIZE, reduced_decode=True, dtype=np.float32):
+    """Decode, resize and normalize an image into a (H, W, 3) array
+
+    Models exported with a uint8 input do the normalization in the graph, so
+    for ``dtype=np.uint8`` the raw resized pixels are returned instead.
+    """
+    image = load_image(source, draft_size=size if reduced_decode else None)
+
+    # Resize image to required size
+    image_resized = image.resize(size)
+
+    if dtype == np.uint8:
+        return np.asarray(image_resized, dtype=np.uint8)
+
+    # Convert to numpy array and normalize
+    image_array = np.array(image_resized).astype(np.float32)
+    return image_array / 255.0
+
+class PreprocessEngine:
+    """Preprocess frames into a reusable, preallocated input buffer
+
+    Each engine owns one (batch_size, H, W, 3) buffer. Frames are copied from
+    the decoded uint8 pixels straight into a buffer slot and normalized in
+    place, so steady-state preprocessing allocates only the decoded image.
+    With ``dtype=np.uint8`` (models with normalization folded into the graph)
+    the pixels are copied as they are.
+    An engine must not be shared by callers that run at the same time.
+    """
+
+    def __init__(self, size=MODEL_INPUT_SIZE, batch_size=1, dtype=np.float32):
+        self.size = size
+        self.dtype = np.dtype(dtype)
+        self.buffer = np.empty((batch_size, size[1], size[0], 3), dtype=self.dtype)
+        self._scale = np.float32(1.0 / 255.0)
+
+    def preprocess(self, source, index=0):
+        """Decode, resize and normalize a frame into slot ``index``, returning that slot"""
+        image = load_image(source, draft_size=self.size).resize(self.size)
+        slot = self.buffer[index]
+        np.copyto(slot, np.asarray(image), casting='unsafe')
+        if self.dtype != np.uint8:
+            np.multiply(slot, self._scale, out=slot)
+        return slot
+
+    def batch(self, count=1):
+        """View of the first ``count`` slots, ready to pass to a backend"""
+        return self.buffer[:count]
+
+class PreprocessEnginePool:
+    """Hand out one PreprocessEngine per concurrent caller and reuse them afterwards"""
+
+    def __init__(self, size=MODEL_INPUT_SIZE, dtype=np.float32):
+        self.size = size
+        self.dtype = dtype
+        self._free = []
+        self.created = 0
+
+    def acquire(self):
+        if self._free:
+            return self._free.pop()
+        self.created += 1
+        return PreprocessEngine(self.size, dtype=self.dtype)
+
+    def release(self, engine):
+        self._free.append(engine)
+
+def postprocess_prediction(prediction):
+    """Turn one row of class probabilities into the drowsiness result dict"""
+    # Get class with highest probability
+    class_index = int(np.argmax(prediction))
+    probability = float(prediction[class_index])
+
+    result = CLASS_LABELS[class_index]
+
+    logger.info(f"Drowsiness detection result: {result} ({probability * 100:.2f}%)")
+
+    return {
+        "result": result,
+        "class_index": class_index,
+        "probability": probability,
+        "timestamp": time.time()
+    }
+
+def no_face_result():
+    """Result dict for frames where no face was found and the model was skipped"""
+    return {
+        "result": NO_FACE_RESULT,
+        "class_index": -1,
+        "probability": 0.0,
+        "timestamp": time.time()
+    }
@@ -0,0 +1,46 @@
+# This script exports the YOLOv8 traffic model to ONNX and OpenVINO IR at fixed input sizes,
+# so the server can run it without ultralytics or PyTorch (TRAFFIC_BACKEND=onnx or openvino)
+# pip install ultralytics onnx openvino
+
+import os
+import sys
+import shutil
+import argparse
+from yolo_runtime import YOLO_RUNTIMES, exported_model_path
+
+# ultralytics export format for each runtime
+EXPORT_FORMATS = {'onnx': 'onnx', 'openvino': 'openvino'}
+
+def export_yolo(source_path, runtime, imgsz):
+    """Export one fixed-size model and move it to the path the server looks for"""
+    from ultralytics import YOLO
+
+    exported = YOLO(source_path).export(format=EXPORT_FORMATS[runtime], imgsz=imgsz, dynamic=False, half=False)
+    target = exported_model_path(source_path, runtime, imgsz)
+    if runtime == 'openvino':
+        # ultralytics writes a <stem>_openvino_model folder; keep one folder per size
+        source_dir, target = str(exported), os.path.dirname(target)
+        if os.path.exists(target):
+            shutil.rmtree(target)
+        shutil.move(source_dir, target)
+    else:
+        os.replace(exported, target)
+    print(f"Exported {runtime} model at imgsz {imgsz} to {target}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the YOLOv8 traffic model for ONNX Runtime / OpenVINO")
+    parser.add_argument("--model", default="models/best.pt", help="Path to the YOLOv8 .pt model")
+    parser.add_argument("--runtime", choices=YOLO_RUNTIMES, nargs="+", default=list(YOLO_RUNTIMES),
+                        help="Runtimes to export for")
+    parser.add_argument("--imgsz", type=int, nargs="+", default=[640, 320],
+                        help="Input sizes; export TRAFFIC_IMGSZ and TRAFFIC_DEGRADED_IMGSZ")
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model):
+        print(f"Error: YOLO model file {args.model} does not exist")
+        sys.exit(1)
+
+    for runtime in args.runtime:
+        for imgsz in args.imgsz:
+            export_yolo(args.model, runtime, imgsz)
@@ -0,0 +1,173 @@
+import os
+import time
+import logging
+from collections import deque
+
+import numpy as np
+import cv2
+
+logger = logging.getLogger(__name__)
+
+# OpenCV LBF facemark model (68 points), used by the cascade's fast path
+LANDMARK_MODEL_PATH = 'models/face_landmarks/lbfmodel.yaml'
+
+# Eye contours in the 68-point landmark layout
+RIGHT_EYE = slice(36, 42)
+LEFT_EYE = slice(42, 48)
+
+# Reasons a frame is passed on to the full classifier
+ESCALATE_NO_FACE = 'no_face'
+ESCALATE_NO_LANDMARKS = 'no_landmarks'
+ESCALATE_EYES_CLOSED = 'eyes_closed'
+ESCALATE_AMBIGUOUS_EAR = 'ambiguous_ear'
+ESCALATE_PERCLOS = 'perclos'
+
+# Source tag of results decided by the eye check instead of the classifier
+EAR_SOURCE = 'ear'
+
+def eye_aspect_ratio(eye):
+    """EAR of one eye's six contour points: eye height over eye width, ~0.3 open and ~0.1 closed"""
+    vertical = np.linalg.norm(eye[1] - eye[5]) + np.linalg.norm(eye[2] - eye[4])
+    horizontal = np.linalg.norm(eye[0] - eye[3])
+    return float(vertical / (2.0 * horizontal)) if horizontal > 0 else 0.0
+
+class EyeLandmarkModel:
+    """68-point facial landmarks from OpenCV's LBF facemark (needs opencv-contrib-python)"""
+
+    def __init__(self, model_path=LANDMARK_MODEL_PATH):
+        if not hasattr(cv2, 'face'):
+            raise RuntimeError("cv2.face is not available, install opencv-contrib-python")
+        if not os.path.exists(model_path):
+            raise RuntimeError(f"Landmark model not found at {model_path}")
+        self.facemark = cv2.face.createFacemarkLBF()
+        self.facemark.loadModel(model_path)
+        logger.info(f"Facial landmark model loaded from {model_path}")
+
+    def eye_aspect_ratio(self, gray, box):
+        """Mean EAR of both eyes for the face in box (x1, y1, x2, y2), or None if fitting fails"""
+        x1, y1, x2, y2 = box
+        faces = np.array([[x1, y1, x2 - x1, y2 - y1]], dtype=np.int32)
+        ok, landmarks = self.facemark.fit(gray, faces)
+        if not ok or len(landmarks) == 0:
+            return None
+        points = landmarks[0][0]
+        return (eye_aspect_ratio(points[RIGHT_EYE]) + eye_aspect_ratio(points[LEFT_EYE])) / 2.0
+
+class EyeStateCascade:
+    """Per-stream cascade: a cheap eye-openness check first, the full classifier only when needed
+
+    A frame takes the fast path (a Non-Drowsy result without running the model)
+    only when the eyes are clearly open (EAR >= ``open_ear``) and PERCLOS, the
+    fraction of recent frames with closed eyes (EAR <= ``closed_ear``) over
+    ``perclos_window_s``, is at most ``max_fast_perclos``. Any sign of
+    drowsiness, an ambiguous EAR or a failed landmark fit escalates the frame
+    to the full model, so the cascade can only save work, never declare a
+    driver drowsy on its own. Every ``audit_interval``-th fast-path frame is
+    also run through the full model to measure agreement.
+
+    Fast-path results have no model probability: ``probability`` is None,
+    ``source`` is ``"ear"`` and ``ear_score`` holds the measured EAR.
+    """
+
+    def __init__(self, landmark_model, closed_ear=0.21, open_ear=0.27,
+                 perclos_window_s=10.0, max_fast_perclos=0.15, audit_interval=20, executor=None):
+        self.landmark_model = landmark_model
+        self.closed_ear = closed_ear
+        self.open_ear = open_ear
+        self.perclos_window_s = perclos_window_s
+        self.max_fast_perclos = max_fast_perclos
+        self.audit_interval = max(0, int(audit_interval))
+        self.executor = executor
+        self._eye_states = deque()
+        self.last_ear = None
+
+        self.frames = 0
+        self.fast_path = 0
+        self.escalated = 0
+        self.escalation_reasons = {}
+        self.audits = 0
+        self.audit_agreements = 0
+
+    def perclos(self, now=None):
+        """Fraction of frames with closed eyes over the recent window"""
+        now = now or time.time()
+        while self._eye_states and now - self._eye_states[0][0] > self.perclos_window_s:
+            self._eye_states.popleft()
+        if not self._eye_states:
+            return 0.0
+        return sum(1 for _, closed in self._eye_states if closed) / float(len(self._eye_states))
+
+    def assess(self, rgb_array, box):
+        """Check a decoded frame and its face box, returning (fast-path result or None, escalation reason or None)"""
+        if rgb_array is None or box is None:
+            return None, ESCALATE_NO_FACE
+
+        ear = self.landmark_model.eye_aspect_ratio(cv2.cvtColor(rgb_array, cv2.COLOR_RGB2GRAY), box)
+        self.last_ear = ear
+        if ear is None:
+            return None, ESCALATE_NO_LANDMARKS
+
+        now = time.time()
+        self._eye_states.append((now, ear <= self.closed_ear))
+        perclos = self.perclos(now)
+
+        if ear <= self.closed_ear:
+            return None, ESCALATE_EYES_CLOSED
+        if ear < self.open_ear:
+            return None, ESCALATE_AMBIGUOUS_EAR
+        if perclos > self.max_fast_perclos:
+            return None, ESCALATE_PERCLOS
+
+        return {
+            "result": "Non-Drowsy",
+            "class_index": 1,
+            "probability": None,
+            "ear_score": ear,
+            "perclos": perclos,
+            "source": EAR_SOURCE,
+            "timestamp": now
+        }, None
+
+    def process(self, rgb_array, box, classify):
+        """Return the fast-path result for clear frames, otherwise the result of ``classify()``
+
+        ``rgb_array`` and ``box`` are the decoded frame and the face box from the stream's tracker.
+        """
+        self.frames += 1
+        if self.executor is not None:
+            fast_result, reason = self.executor(self.assess, rgb_array, box)
+        else:
+            fast_result, reason = self.assess(rgb_array, box)
+
+        if fast_result is not None:
+            self.fast_path += 1
+            if self.audit_interval and self.fast_path % self.audit_interval == 0:
+                # Spot-check the fast path against the full model
+                full_result = classify()
+                if full_result and full_result.get("class_index") in (0, 1):
+                    self.audits += 1
+                    if full_result["class_index"] == fast_result["class_index"]:
+                        self.audit_agreements += 1
+                    else:
+                        logger.warning(f"Cascade fast path disagreed with the full model "
+                                       f"(EAR {self.last_ear:.3f}, full result {full_result['result']})")
+                    return full_result
+            return fast_result
+
+        self.escalated += 1
+        self.escalation_reasons[reason] = self.escalation_reasons.get(reason, 0) + 1
+        return classify()
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "fast_path": self.fast_path,
+            "escalated": self.escalated,
+            "escalation_rate": self.escalated / self.frames if self.frames else 0.0,
+            "escalation_reasons": dict(self.escalation_reasons),
+            "audits": self.audits,
+            "audit_disagreements": self.audits - self.audit_agreements,
+            "agreement_rate": self.audit_agreements / self.audits if self.audits else None,
+            "perclos": self.perclos(),
+            "last_ear": self.last_ear,
+        }
@@ -0,0 +1,145 @@
+import os
+import logging
+import numpy as np
+import cv2
+
+logger = logging.getLogger(__name__)
+
+# OpenCV's ResNet-10 SSD face detector, used when its files are present
+DNN_PROTOTXT_PATH = 'models/face_detector/deploy.prototxt'
+DNN_WEIGHTS_PATH = 'models/face_detector/res10_300x300_ssd_iter_140000.caffemodel'
+
+class FaceDetector:
+    """Fast face localization with OpenCV's DNN face detector or a Haar cascade"""
+
+    def __init__(self, method='auto', detect_width=320, dnn_confidence=0.5, min_face_size=40):
+        self.detect_width = detect_width
+        self.dnn_confidence = dnn_confidence
+        self.min_face_size = min_face_size
+        self.net = None
+        self.cascade = None
+
+        dnn_available = os.path.exists(DNN_PROTOTXT_PATH) and os.path.exists(DNN_WEIGHTS_PATH)
+        if method == 'dnn' or (method == 'auto' and dnn_available):
+            self.net = cv2.dnn.readNetFromCaffe(DNN_PROTOTXT_PATH, DNN_WEIGHTS_PATH)
+            self.method = 'dnn'
+        else:
+            cascade_path = os.path.join(cv2.data.haarcascades, 'haarcascade_frontalface_default.xml')
+            self.cascade = cv2.CascadeClassifier(cascade_path)
+            if self.cascade.empty():
+                raise RuntimeError(f"Could not load Haar cascade from {cascade_path}")
+            self.method = 'haar'
+        logger.info(f"Face detector ready ({self.method})")
+
+    def detect(self, rgb_array):
+        """Return the largest face as (x1, y1, x2, y2) in image coordinates, or None"""
+        height, width = rgb_array.shape[:2]
+
+        # Detect on a downscaled copy, the box only needs to be roughly right
+        scale = min(1.0, self.detect_width / float(width))
+        small = cv2.resize(rgb_array, (int(width * scale), int(height * scale)),
+                           interpolation=cv2.INTER_AREA) if scale < 1.0 else rgb_array
+
+        if self.net is not None:
+            boxes = self._detect_dnn(small)
+        else:
+            boxes = self._detect_haar(small)
+
+        if not boxes:
+            return None
+        x1, y1, x2, y2 = max(boxes, key=lambda b: (b[2] - b[0]) * (b[3] - b[1]))
+        return (int(x1 / scale), int(y1 / scale), int(x2 / scale), int(y2 / scale))
+
+    def _detect_haar(self, rgb_array):
+        gray = cv2.cvtColor(rgb_array, cv2.COLOR_RGB2GRAY)
+        min_size = max(1, int(self.min_face_size * gray.shape[1] / float(self.detect_width)))
+        faces = self.cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5,
+                                              minSize=(min_size, min_size))
+        return [(x, y, x + w, y + h) for (x, y, w, h) in faces]
+
+    def _detect_dnn(self, rgb_array):
+        height, width = rgb_array.shape[:2]
+        # The Caffe model was trained on BGR input with these channel means
+        blob = cv2.dnn.blobFromImage(rgb_array, 1.0, (300, 300), (104.0, 177.0, 123.0), swapRB=True)
+        self.net.setInput(blob)
+        detections = self.net.forward()[0, 0]
+        boxes = []
+        for detection in detections:
+            if detection[2] < self.dnn_confidence:
+                continue
+            x1, y1, x2, y2 = detection[3:7] * np.array([width, height, width, height])
+            boxes.append((max(0, x1), max(0, y1), min(width, x2), min(height, y2)))
+        return boxes
+
+def crop_to_region(rgb_array, region):
+    """Crop an RGB array to a (left, top, right, bottom) region"""
+    left, top, right, bottom = region
+    return rgb_array[top:bottom, left:right]
+
+class FaceRegionTracker:
+    """Per-stream face crop that reuses the last face box across frames
+
+    Detection runs every ``redetect_interval`` frames. In between, and for up
+    to ``max_missed_frames`` frames after the face is lost, the previous box
+    is reused so short detector misses don't drop frames.
+    """
+
+    def __init__(self, face_detector, padding=0.25, redetect_interval=5, max_missed_frames=3):
+        self.face_detector = face_detector
+        self.padding = padding
+        self.redetect_interval = max(1, redetect_interval)
+        self.max_missed_frames = max_missed_frames
+        self.last_box = None
+        self.frames_since_detect = 0
+        self.missed_frames = 0
+        self.frames = 0
+        self.no_face_frames = 0
+
+    def locate(self, rgb_array):
+        """Return the face box to use for this frame, or None when there is no face"""
+        self.frames += 1
+        if self.last_box is not None and self.frames_since_detect < self.redetect_interval:
+            self.frames_since_detect += 1
+            return self.last_box
+
+        box = self.face_detector.detect(rgb_array)
+        self.frames_since_detect = 1
+        if box is not None:
+            self.last_box = box
+            self.missed_frames = 0
+        elif self.last_box is not None and self.missed_frames < self.max_missed_frames:
+            self.missed_frames += 1
+            box = self.last_box
+        else:
+            self.last_box = None
+
+        if box is None:
+            self.no_face_frames += 1
+        return box
+
+    def crop(self, rgb_array):
+        """Return the padded, square face crop of an RGB array, or None when there is no face"""
+        box = self.locate(rgb_array)
+        if box is None:
+            return None
+        return crop_to_region(rgb_array, self.crop_region(box, rgb_array.shape))
+
+    def crop_region(self, box, image_shape):
+        """Return the padded, square region (left, top, right, bottom) to crop around a face box"""
+        height, width = image_shape[:2]
+        x1, y1, x2, y2 = box
+        # Square crop around the face so the resize to the model input keeps the aspect ratio
+        side = max(x2 - x1, y2 - y1) * (1.0 + 2 * self.padding)
+        center_x, center_y = (x1 + x2) / 2.0, (y1 + y2) / 2.0
+        left = int(max(0, center_x - side / 2))
+        top = int(max(0, center_y - side / 2))
+        right = int(min(width, center_x + side / 2))
+        bottom = int(min(height, center_y + side / 2))
+        return (left, top, right, bottom)
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "no_face_frames": self.no_face_frames,
+            "has_face": self.last_box is not None,
+        }
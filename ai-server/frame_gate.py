@@ -0,0 +1,112 @@
+import time
+import logging
+import numpy as np
+import cv2
+
+logger = logging.getLogger(__name__)
+
+# Decisions made by FrameChangeGate for each frame
+CHANGED = 'changed'
+UNCHANGED = 'unchanged'
+DARK = 'dark'
+
+class FrameChangeGate:
+    """Per-stream gate that skips inference on frames that barely changed
+
+    Each frame is decoded at 1/8 scale in grayscale (cheap, the JPEG decoder
+    works in the DCT domain) and shrunk to a small thumbnail. The thumbnail is
+    compared to the one of the last frame that actually went through the
+    model. If the mean absolute pixel difference is below ``diff_threshold``,
+    or the frame is nearly black, the previous result is reused instead.
+    Inference is forced again after ``max_skip_seconds`` so results never go
+    completely stale. ``executor`` runs the thumbnail decode, e.g. in a thread pool.
+    """
+
+    def __init__(self, diff_threshold=3.0, brightness_threshold=12.0, dark_threshold=16.0,
+                 max_skip_seconds=2.0, thumbnail_size=(32, 24), executor=None):
+        self.diff_threshold = diff_threshold
+        self.brightness_threshold = brightness_threshold
+        self.dark_threshold = dark_threshold
+        self.max_skip_seconds = max_skip_seconds
+        self.thumbnail_size = thumbnail_size
+        self.executor = executor
+
+        self.reference = None
+        self.reference_time = 0.0
+        self.last_result = None
+        self.last_decision = None
+
+        self.frames = 0
+        self.inferred = 0
+        self.no_result = 0
+        self.skipped_unchanged = 0
+        self.skipped_dark = 0
+
+    def thumbnail(self, image_data):
+        """Return a small float32 grayscale thumbnail of JPEG bytes, or None if undecodable"""
+        buffer = np.frombuffer(image_data, dtype=np.uint8)
+        gray = cv2.imdecode(buffer, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+        if gray is None:
+            return None
+        return cv2.resize(gray, self.thumbnail_size, interpolation=cv2.INTER_AREA).astype(np.float32)
+
+    def check(self, thumbnail):
+        """Decide whether a frame needs inference given its thumbnail"""
+        if thumbnail is None or self.reference is None or self.last_result is None:
+            return CHANGED
+        if time.time() - self.reference_time > self.max_skip_seconds:
+            return CHANGED
+
+        brightness = float(thumbnail.mean())
+        if brightness < self.dark_threshold:
+            return DARK
+
+        # A global brightness jump (lights, tunnel) always counts as a change
+        if abs(brightness - float(self.reference.mean())) > self.brightness_threshold:
+            return CHANGED
+
+        difference = float(np.mean(np.abs(thumbnail - self.reference)))
+        return CHANGED if difference >= self.diff_threshold else UNCHANGED
+
+    def process(self, image_data, infer):
+        """Return ``infer(image_data)``, or the previous result when the frame hasn't changed"""
+        self.frames += 1
+        if self.executor is not None:
+            thumbnail = self.executor(self.thumbnail, image_data)
+        else:
+            thumbnail = self.thumbnail(image_data)
+        self.last_decision = self.check(thumbnail)
+
+        if self.last_decision == UNCHANGED:
+            self.skipped_unchanged += 1
+            return self.last_result
+        if self.last_decision == DARK:
+            self.skipped_dark += 1
+            return self.last_result
+
+        result = infer(image_data)
+        if result is None:
+            # Skipped by the caller (degradation) or failed, nothing was inferred
+            self.no_result += 1
+        else:
+            self.inferred += 1
+            self.last_result = result
+            self.reference = thumbnail
+            self.reference_time = time.time()
+        return result
+
+    @property
+    def reused(self):
+        """True when the last processed frame reused the previous result"""
+        return self.last_decision in (UNCHANGED, DARK)
+
+    def stats(self):
+        skipped = self.skipped_unchanged + self.skipped_dark
+        return {
+            "frames": self.frames,
+            "inferred": self.inferred,
+            "no_result": self.no_result,
+            "skipped_unchanged": self.skipped_unchanged,
+            "skipped_dark": self.skipped_dark,
+            "skip_rate": skipped / self.frames if self.frames else 0.0,
+        }
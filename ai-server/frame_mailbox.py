@@ -0,0 +1,80 @@
+import time
+import logging
+from collections import deque
+
+from eventlet.event import Event
+
+logger = logging.getLogger(__name__)
+
+class LatestFrameMailbox:
+    """Single-slot, latest-wins hand-off between a camera read loop and its inference loop
+
+    The read loop ``put()``s every received frame without waiting. A newer frame
+    replaces one that hasn't been picked up yet, so inference never works
+    through a backlog. ``get()`` waits for the next frame and drops it if it is
+    older than ``max_age_ms`` by the time inference is free to take it.
+    """
+
+    def __init__(self, max_age_ms=500.0, stats_window=200):
+        self.max_age = max_age_ms / 1000.0 if max_age_ms and max_age_ms > 0 else None
+        self._frame = None
+        self._received_at = 0.0
+        self._waiter = Event()
+        self._closed = False
+
+        self._ages = deque(maxlen=stats_window)
+        self.received = 0
+        self.processed = 0
+        self.replaced = 0
+        self.expired = 0
+
+    def put(self, frame, received_at=None):
+        """Store the newest frame, replacing an unprocessed older one"""
+        self.received += 1
+        if self._frame is not None:
+            self.replaced += 1
+        self._frame = frame
+        self._received_at = received_at or time.time()
+        if not self._waiter.ready():
+            self._waiter.send()
+
+    def get(self):
+        """Wait for the next fresh frame; returns (frame, age in seconds), or (None, 0) once closed"""
+        while True:
+            while self._frame is None:
+                if self._closed:
+                    return None, 0.0
+                self._waiter.wait()
+                self._waiter = Event()
+
+            frame, received_at = self._frame, self._received_at
+            self._frame = None
+            age = time.time() - received_at
+            if self.max_age is not None and age > self.max_age:
+                # Too old to describe what the camera sees now
+                self.expired += 1
+                continue
+
+            self.processed += 1
+            self._ages.append(age)
+            return frame, age
+
+    def close(self):
+        """Wake the inference loop so it can exit"""
+        self._closed = True
+        self._frame = None
+        if not self._waiter.ready():
+            self._waiter.send()
+
+    def stats(self):
+        ages = list(self._ages)
+        return {
+            "max_age_ms": self.max_age * 1000.0 if self.max_age is not None else None,
+            "received": self.received,
+            "processed": self.processed,
+            "replaced": self.replaced,
+            "expired": self.expired,
+            "pending": self._frame is not None,
+            "avg_age_ms": sum(ages) / len(ages) * 1000.0 if ages else 0.0,
+            "max_recent_age_ms": max(ages) * 1000.0 if ages else 0.0,
+        }
@@ -0,0 +1,373 @@
+import os
+import re
+import time
+import hashlib
+import logging
+import threading
+import numpy as np
+from drowsiness_processing import MODEL_INPUT_SIZE
+from thread_config import configure_tf_threads, pinned_thread
+
+logger = logging.getLogger(__name__)
+
+# Environment variable used to pick the runtime when no CLI flag is given
+BACKEND_ENV_VAR = 'DROWSY_BACKEND'
+
+# Default model file for each runtime
+DEFAULT_MODEL_PATHS = {
+    'keras': 'models/densenet201.keras',
+    'onnx': 'models/densenet201.onnx',
+    'tflite': 'models/densenet201.fp16.tflite',
+}
+
+def _env_flag(name, default):
+    return os.environ.get(name, default).lower() in ('1', 'true', 'yes', 'on')
+
+class OrtSessionConfig:
+    """Explicit ONNX Runtime session settings, defaulting to the ORT_* environment variables"""
+
+    def __init__(self, optimization_level=None, execution_mode=None, enable_mem_arena=None,
+                 enable_mem_pattern=None, intra_op_threads=None, inter_op_threads=None,
+                 cache_optimized_model=None, intra_op_affinities=None, caller_core=None):
+        self.optimization_level = (optimization_level or os.environ.get('ORT_OPTIMIZATION_LEVEL', 'all')).lower()
+        self.execution_mode = (execution_mode or os.environ.get('ORT_EXECUTION_MODE', 'sequential')).lower()
+        self.enable_mem_arena = (_env_flag('ORT_ENABLE_MEM_ARENA', '1')
+                                 if enable_mem_arena is None else enable_mem_arena)
+        self.enable_mem_pattern = (_env_flag('ORT_ENABLE_MEM_PATTERN', '1')
+                                   if enable_mem_pattern is None else enable_mem_pattern)
+        self.intra_op_threads = int(os.environ.get('ORT_INTRA_OP_THREADS', '0')
+                                    if intra_op_threads is None else intra_op_threads)
+        self.inter_op_threads = int(os.environ.get('ORT_INTER_OP_THREADS', '0')
+                                    if inter_op_threads is None else inter_op_threads)
+        # Cores for the intra-op pool threads, e.g. "2;3;4" (1-based, see tune_threads.py)
+        self.intra_op_affinities = (os.environ.get('ORT_INTRA_OP_AFFINITIES') or None
+                                    if intra_op_affinities is None else intra_op_affinities)
+        # Core the thread calling run() is moved to for the call (0-based, see thread_config.py)
+        caller_core = os.environ.get('ORT_CALLER_CORE', '') if caller_core is None else caller_core
+        self.caller_core = int(caller_core) if str(caller_core).strip() else None
+        self.cache_optimized_model = (_env_flag('ORT_CACHE_OPTIMIZED_MODEL', '1')
+                                      if cache_optimized_model is None else cache_optimized_model)
+
+    def build(self, optimization_level=None):
+        """Create SessionOptions, optionally overriding the graph optimization level"""
+        import onnxruntime as ort
+
+        optimization_levels = {
+            'disable': ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+            'basic': ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+            'extended': ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+            'all': ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+        }
+        execution_modes = {
+            'sequential': ort.ExecutionMode.ORT_SEQUENTIAL,
+            'parallel': ort.ExecutionMode.ORT_PARALLEL,
+        }
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = optimization_levels[optimization_level or self.optimization_level]
+        options.execution_mode = execution_modes[self.execution_mode]
+        options.enable_cpu_mem_arena = self.enable_mem_arena
+        options.enable_mem_pattern = self.enable_mem_pattern
+        # 0 lets ONNX Runtime pick its own thread pool size
+        options.intra_op_num_threads = self.intra_op_threads
+        options.inter_op_num_threads = self.inter_op_threads
+        if self.intra_op_affinities and self.intra_op_threads > 1:
+            options.add_session_config_entry('session.intra_op_thread_affinities', self.intra_op_affinities)
+        return options
+
+    def describe(self):
+        return (f"optimization={self.optimization_level}, execution={self.execution_mode}, "
+                f"mem_arena={self.enable_mem_arena}, mem_pattern={self.enable_mem_pattern}, "
+                f"intra_op_threads={self.intra_op_threads}, inter_op_threads={self.inter_op_threads}, "
+                f"affinities={self.intra_op_affinities}, caller_core={self.caller_core}")
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """Hash a file in chunks so large models don't need to fit in memory twice"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def optimized_model_path(model_path, optimization_level, ort_version):
+    """Cache file next to the source model, keyed by its hash, the ORT version and the level"""
+    stem = os.path.splitext(model_path)[0]
+    source_hash = file_sha256(model_path)[:16]
+    return f"{stem}.{source_hash}.ort-{ort_version}.{optimization_level}.optimized.onnx"
+
+def remove_stale_optimized_models(model_path, ort_version):
+    """Delete cached optimized graphs left behind by older models or ORT versions
+
+    Caches of the current model and ORT version are kept for every
+    optimization level, and files of other models sharing the name prefix
+    (``densenet201.int8.*`` next to ``densenet201.onnx``) are left alone.
+    """
+    model_dir = os.path.dirname(os.path.abspath(model_path))
+    stem = os.path.basename(os.path.splitext(model_path)[0])
+    cache_pattern = re.compile(re.escape(stem) + r'\.([0-9a-f]{16})\.ort-(.+)\.(disable|basic|extended|all)\.optimized\.onnx')
+    source_hash = file_sha256(model_path)[:16]
+    for file_name in os.listdir(model_dir):
+        match = cache_pattern.fullmatch(file_name)
+        if match and (match.group(1) != source_hash or match.group(2) != ort_version):
+            os.remove(os.path.join(model_dir, file_name))
+
+class InferenceBackend:
+    """Common interface for the runtimes that can execute the drowsiness model"""
+    name = None
+    # float32 for models expecting [0, 1] input, uint8 for models that normalize in the graph
+    input_dtype = np.float32
+    # (width, height) of the model input, read from the model when it declares it
+    input_size = MODEL_INPUT_SIZE
+
+    def __init__(self, model_path):
+        self.model_path = model_path
+
+    def load(self):
+        """Load the model, raising on failure"""
+        raise NotImplementedError
+
+    def predict(self, batch):
+        """Return (N, 2) class probabilities for a (N, height, width, 3) batch of input_dtype"""
+        raise NotImplementedError
+
+class KerasBackend(InferenceBackend):
+    """TensorFlow/Keras runtime for the original .keras model
+
+    By default frames go through a ``tf.function`` traced once with a fixed
+    input signature and called directly. ``model.predict`` builds a data
+    adapter and runs callbacks on every call, which dominates batch-of-one
+    latency. ``KERAS_FAST_CALL=0`` goes back to ``predict``;
+    ``KERAS_XLA=1`` additionally JIT-compiles the function with XLA.
+    """
+    name = 'keras'
+
+    def __init__(self, model_path, fast_call=None, jit_compile=None):
+        super().__init__(model_path)
+        self.model = None
+        self.fast_call = _env_flag('KERAS_FAST_CALL', '1') if fast_call is None else fast_call
+        self.jit_compile = _env_flag('KERAS_XLA', '0') if jit_compile is None else jit_compile
+        self._call = None
+
+    def load(self):
+        # Imported lazily so ONNX-only deployments don't need TensorFlow
+        from tensorflow.keras.models import load_model
+        configure_tf_threads()
+        self.model = load_model(self.model_path)
+        if self.model.inputs[0].dtype == 'uint8':
+            self.input_dtype = np.uint8
+        height, width = self.model.inputs[0].shape[1:3]
+        if height and width:
+            self.input_size = (int(width), int(height))
+        if self.fast_call:
+            self._call = self.build_fast_call(self.jit_compile)
+        logger.info(f"Keras model loaded successfully from {self.model_path} "
+                    f"(fast_call={self.fast_call}, xla={self.jit_compile})")
+
+    def build_fast_call(self, jit_compile=False):
+        """Trace the model once for any batch size of (height, width, 3) frames"""
+        import tensorflow as tf
+
+        model_input = self.model.inputs[0]
+        signature = [tf.TensorSpec((None,) + tuple(model_input.shape[1:]), dtype=model_input.dtype)]
+        model = self.model
+
+        @tf.function(input_signature=signature, jit_compile=jit_compile)
+        def call(batch):
+            return model(batch, training=False)
+
+        return call
+
+    def predict(self, batch):
+        if self._call is not None:
+            return self._call(batch).numpy()
+        return self.model.predict(batch, verbose=0)  # Set verbose=0 to reduce console output
+
+class OnnxRuntimeBackend(InferenceBackend):
+    """ONNX Runtime backend for the converted .onnx model"""
+    name = 'onnx'
+
+    def __init__(self, model_path, session_config=None):
+        super().__init__(model_path)
+        self.session_config = session_config or OrtSessionConfig()
+        self.session = None
+        self.input_name = None
+        self.output_name = None
+        self.num_classes = None
+        # IOBinding and output buffers are reused per thread
+        self._local = threading.local()
+
+    def load(self):
+        import onnxruntime as ort
+        started = time.time()
+        self.session = self._create_session(ort)
+
+        # Input and output names never change, so look them up once
+        self.input_name = self.session.get_inputs()[0].name
+        if self.session.get_inputs()[0].type == 'tensor(uint8)':
+            self.input_dtype = np.uint8
+        height, width = self.session.get_inputs()[0].shape[1:3]
+        if isinstance(height, int) and isinstance(width, int):
+            self.input_size = (width, height)
+        self.output_name = self.session.get_outputs()[0].name
+        self.num_classes = self.session.get_outputs()[0].shape[-1]
+        logger.info(f"ONNX model loaded successfully from {self.model_path} in {time.time() - started:.2f}s "
+                    f"(input {np.dtype(self.input_dtype).name} {self.input_size[0]}x{self.input_size[1]}, "
+                    f"{self.session_config.describe()})")
+
+    def _create_session(self, ort):
+        config = self.session_config
+        if not config.cache_optimized_model or config.optimization_level == 'disable':
+            return ort.InferenceSession(self.model_path, config.build(), providers=['CPUExecutionProvider'])
+
+        # 'all' adds layout transforms for this CPU's instruction set, so the file only keeps the
+        # portable 'extended' graph and the configured level is applied on top of it when loading
+        cache_level = 'extended' if config.optimization_level == 'all' else config.optimization_level
+        cache_path = optimized_model_path(self.model_path, cache_level, ort.__version__)
+        if not os.path.exists(cache_path):
+            # First start: optimize the graph once and persist the result for later starts
+            options = config.build(optimization_level=cache_level)
+            temp_path = f"{cache_path}.{os.getpid()}.tmp"
+            options.optimized_model_filepath = temp_path
+            try:
+                ort.InferenceSession(self.model_path, options, providers=['CPUExecutionProvider'])
+                remove_stale_optimized_models(self.model_path, ort.__version__)
+                os.replace(temp_path, cache_path)
+                logger.info(f"Saved optimized ONNX model to {cache_path}")
+            except Exception as e:
+                logger.warning(f"Could not write optimized model cache {cache_path}: {e}")
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                return ort.InferenceSession(self.model_path, config.build(), providers=['CPUExecutionProvider'])
+
+        try:
+            session = ort.InferenceSession(cache_path, config.build(), providers=['CPUExecutionProvider'])
+            logger.info(f"Using cached optimized ONNX model {cache_path}")
+            return session
+        except Exception as e:
+            logger.warning(f"Ignoring unusable optimized model cache {cache_path}: {e}")
+            return ort.InferenceSession(self.model_path, config.build(), providers=['CPUExecutionProvider'])
+
+    def _output_buffer(self, batch_size):
+        buffer = getattr(self._local, 'output', None)
+        if buffer is None or buffer.shape[0] < batch_size:
+            buffer = np.empty((batch_size, self.num_classes), dtype=np.float32)
+            self._local.output = buffer
+        return buffer[:batch_size]
+
+    def predict(self, batch):
+        """Run the batch with IOBinding so the output lands in a preallocated array
+
+        The returned array is reused by the next predict() call on the same
+        thread, so callers must copy anything they keep.
+        """
+        # No copy when the batch already is a contiguous array of the input dtype
+        batch = np.ascontiguousarray(batch, dtype=self.input_dtype)
+        binding = getattr(self._local, 'binding', None)
+        if binding is None:
+            binding = self.session.io_binding()
+            self._local.binding = binding
+
+        output = self._output_buffer(batch.shape[0])
+        binding.bind_cpu_input(self.input_name, batch)
+        binding.bind_output(self.output_name, 'cpu', 0, np.float32, list(output.shape), output.ctypes.data)
+        if self.session_config.caller_core is not None:
+            # The calling thread does part of the work, keep it on the drowsiness cores
+            with pinned_thread(self.session_config.caller_core):
+                self.session.run_with_iobinding(binding)
+        else:
+            self.session.run_with_iobinding(binding)
+        return output
+
+class TFLiteBackend(InferenceBackend):
+    """TensorFlow Lite runtime for .tflite models (see convert_tflite.py)
+
+    Uses the small ``tflite-runtime`` package when installed and falls back to
+    ``tf.lite`` otherwise. Float and FP16 models run on the XNNPACK delegate
+    the interpreter applies by default, with ``TFLITE_THREADS`` threads (0
+    lets the runtime decide); ``TFLITE_XNNPACK=0`` uses the builtin kernels.
+
+    Resizing an interpreter's input re-plans the graph, so each batch size
+    the micro-batcher produces gets its own interpreter, created on first use.
+    """
+    name = 'tflite'
+
+    def __init__(self, model_path, num_threads=None, use_xnnpack=None):
+        super().__init__(model_path)
+        self.num_threads = int(os.environ.get('TFLITE_THREADS', '0') if num_threads is None else num_threads)
+        self.use_xnnpack = _env_flag('TFLITE_XNNPACK', '1') if use_xnnpack is None else use_xnnpack
+        self.interpreter = None
+        self.input_index = None
+        self.output_index = None
+        self.batch_size = None
+        # batch size -> (interpreter, lock); an interpreter is not thread-safe
+        self._interpreters = {}
+        self._lock = threading.Lock()
+        self._create_interpreter = None
+
+    def load(self):
+        try:
+            from tflite_runtime.interpreter import Interpreter, OpResolverType
+        except ImportError:
+            # Imported lazily so gateways only need tflite-runtime
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+            OpResolverType = tf.lite.experimental.OpResolverType
+
+        started = time.time()
+        resolver = OpResolverType.AUTO if self.use_xnnpack else OpResolverType.BUILTIN_WITHOUT_DEFAULT_DELEGATES
+        self._create_interpreter = lambda: Interpreter(model_path=self.model_path,
+                                                       num_threads=self.num_threads or None,
+                                                       experimental_op_resolver_type=resolver)
+        self.interpreter = self._create_interpreter()
+        self.interpreter.allocate_tensors()
+
+        input_details = self.interpreter.get_input_details()[0]
+        self.input_index = input_details['index']
+        self.output_index = self.interpreter.get_output_details()[0]['index']
+        if input_details['dtype'] == np.uint8:
+            self.input_dtype = np.uint8
+        self.batch_size, height, width = (int(dim) for dim in input_details['shape'][:3])
+        self.input_size = (width, height)
+        self._interpreters[self.batch_size] = (self.interpreter, threading.Lock())
+        logger.info(f"TFLite model loaded successfully from {self.model_path} in {time.time() - started:.2f}s "
+                    f"(input {np.dtype(self.input_dtype).name} {width}x{height}, "
+                    f"threads={self.num_threads or 'default'}, xnnpack={self.use_xnnpack})")
+
+    def _interpreter_for(self, batch_shape):
+        with self._lock:
+            entry = self._interpreters.get(batch_shape[0])
+            if entry is None:
+                interpreter = self._create_interpreter()
+                interpreter.resize_tensor_input(self.input_index, list(batch_shape))
+                interpreter.allocate_tensors()
+                entry = (interpreter, threading.Lock())
+                self._interpreters[batch_shape[0]] = entry
+            return entry
+
+    def predict(self, batch):
+        batch = np.ascontiguousarray(batch, dtype=self.input_dtype)
+        interpreter, lock = self._interpreter_for(batch.shape)
+        with lock:
+            interpreter.set_tensor(self.input_index, batch)
+            interpreter.invoke()
+            return interpreter.get_tensor(self.output_index)
+
+BACKENDS = {
+    KerasBackend.name: KerasBackend,
+    OnnxRuntimeBackend.name: OnnxRuntimeBackend,
+    TFLiteBackend.name: TFLiteBackend,
+}
+
+def get_backend_name(cli_value=None, default='keras'):
+    """Resolve the backend name from a CLI flag, then the environment, then the default"""
+    name = (cli_value or os.environ.get(BACKEND_ENV_VAR) or default).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{name}', choose from: {', '.join(BACKENDS)}")
+    return name
+
+def create_backend(name, model_path=None):
+    """Create and load a backend, falling back to the default model path for it"""
+    backend_class = BACKENDS[name]
+    backend = backend_class(model_path or DEFAULT_MODEL_PATHS[name])
+    backend.load()
+    return backend
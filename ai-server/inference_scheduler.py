@@ -0,0 +1,207 @@
+import time
+import heapq
+import logging
+import itertools
+from collections import deque
+
+from eventlet.event import Event
+
+logger = logging.getLogger(__name__)
+
+# Traffic degradation levels, applied one after another while drowsiness latency is under pressure
+FULL = 'full'
+REDUCED_RATE = 'reduced_rate'
+REDUCED_SIZE = 'reduced_size'
+SKIP = 'skip'
+DEGRADATION_LEVELS = [FULL, REDUCED_RATE, REDUCED_SIZE, SKIP]
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+class SchedulingClass:
+    """Priority, latency SLO and recent timings of one kind of inference job"""
+
+    def __init__(self, name, priority, slo_ms, stats_window=200):
+        self.name = name
+        self.priority = priority
+        self.slo_ms = slo_ms
+        # (finished time, queue wait, run time) of recent jobs
+        self.recent = deque(maxlen=stats_window)
+        self.total_jobs = 0
+        self.slo_violations = 0
+        self.skipped = 0
+
+    def record(self, finished, wait, run):
+        self.recent.append((finished, wait, run))
+        self.total_jobs += 1
+        if (wait + run) * 1000.0 > self.slo_ms:
+            self.slo_violations += 1
+
+    def latency_p95_ms(self, since=None):
+        """p95 of queue wait plus run time, optionally only for jobs finished after ``since``"""
+        return percentile([wait + run for finished, wait, run in self.recent
+                           if since is None or finished >= since], 0.95) * 1000.0
+
+    def stats(self):
+        waits = [wait for _, wait, _ in self.recent]
+        runs = [run for _, _, run in self.recent]
+        return {
+            "priority": self.priority,
+            "slo_ms": self.slo_ms,
+            "total_jobs": self.total_jobs,
+            "skipped": self.skipped,
+            "slo_violations": self.slo_violations,
+            "slo_violation_rate": self.slo_violations / self.total_jobs if self.total_jobs else 0.0,
+            "avg_wait_ms": sum(waits) / len(waits) * 1000.0 if waits else 0.0,
+            "p95_wait_ms": percentile(waits, 0.95) * 1000.0,
+            "avg_run_ms": sum(runs) / len(runs) * 1000.0 if runs else 0.0,
+            "p95_latency_ms": self.latency_p95_ms(),
+        }
+
+class PriorityInferenceScheduler:
+    """Admit inference jobs from all streams in priority order
+
+    At most ``concurrency`` jobs run at once. When a slot frees up, the waiting
+    job with the highest priority (lowest number) goes next, first come first
+    served within a class. ``run()`` parks only the calling greenlet and calls
+    the job in it, so the caller decides whether the job itself is offloaded.
+    """
+
+    def __init__(self, classes, concurrency=1):
+        self.classes = {job_class.name: job_class for job_class in classes}
+        self.concurrency = max(1, int(concurrency))
+        self._running = 0
+        self._waiting = []
+        self._sequence = itertools.count()
+
+    def run(self, class_name, fn, *args, **kwargs):
+        job_class = self.classes[class_name]
+        enqueued = time.time()
+        entry = self._enqueue(job_class.priority)
+        if entry is not None:
+            turn = entry[2]
+            try:
+                # The releasing job hands its slot over directly
+                turn.wait()
+            except BaseException:
+                if turn.ready():
+                    # The slot was handed over just before, pass it on
+                    self._release()
+                else:
+                    # Killed or timed out while queued, so no slot must go to this waiter
+                    self._waiting.remove(entry)
+                    heapq.heapify(self._waiting)
+                raise
+        started = time.time()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            finished = time.time()
+            self._release()
+            job_class.record(finished, started - enqueued, finished - started)
+
+    def waiting(self, class_name=None):
+        if class_name is None:
+            return len(self._waiting)
+        priority = self.classes[class_name].priority
+        return sum(1 for job_priority, _, _ in self._waiting if job_priority == priority)
+
+    def _enqueue(self, priority):
+        """Take a free slot and return None, or queue up and return the heap entry to wait on"""
+        if self._running < self.concurrency and not self._waiting:
+            self._running += 1
+            return None
+        entry = (priority, next(self._sequence), Event())
+        heapq.heappush(self._waiting, entry)
+        return entry
+
+    def _release(self):
+        if self._waiting:
+            _, _, turn = heapq.heappop(self._waiting)
+            turn.send()
+        else:
+            self._running -= 1
+
+    def stats(self):
+        return {
+            "concurrency": self.concurrency,
+            "running": self._running,
+            "waiting": len(self._waiting),
+            "classes": {name: job_class.stats() for name, job_class in self.classes.items()},
+        }
+
+class DegradationController:
+    """Degrade a low-priority class step by step while a protected class is near its SLO
+
+    Pressure is the protected class's recent p95 latency over its SLO. Above
+    ``escalate_ratio`` (or while protected jobs are queued) the level steps
+    up: full, then ``degraded_rate_hz``, then also ``degraded_imgsz``, then
+    skipping. Below ``recover_ratio`` for ``hold_seconds`` it steps back down.
+    """
+
+    def __init__(self, scheduler, degraded_class, protected_class, degraded_rate_hz=2.0,
+                 full_imgsz=640, degraded_imgsz=320, escalate_ratio=0.8, recover_ratio=0.5,
+                 escalate_interval=1.0, hold_seconds=3.0, pressure_window=5.0):
+        self.scheduler = scheduler
+        self.degraded_class = scheduler.classes[degraded_class]
+        self.protected_class = scheduler.classes[protected_class]
+        self.degraded_rate_hz = degraded_rate_hz
+        self.full_imgsz = full_imgsz
+        self.degraded_imgsz = degraded_imgsz
+        self.escalate_ratio = escalate_ratio
+        self.recover_ratio = recover_ratio
+        self.escalate_interval = escalate_interval
+        self.hold_seconds = hold_seconds
+        self.pressure_window = pressure_window
+        self.level = 0
+        self.level_changed_at = 0.0
+        self.last_admitted = 0.0
+        self.level_changes = 0
+
+    @property
+    def level_name(self):
+        return DEGRADATION_LEVELS[self.level]
+
+    def pressure(self, now):
+        """Recent protected-class p95 latency as a fraction of its SLO"""
+        return self.protected_class.latency_p95_ms(since=now - self.pressure_window) / self.protected_class.slo_ms
+
+    def _update_level(self, now):
+        pressure = self.pressure(now)
+        # A protected job queued behind this class is contention, whatever the recent latency
+        contended = self.scheduler.waiting(self.protected_class.name) > 0
+        since_change = now - self.level_changed_at
+        level = self.level
+        if (pressure > self.escalate_ratio or contended) and since_change >= self.escalate_interval:
+            level = min(len(DEGRADATION_LEVELS) - 1, self.level + 1)
+        elif pressure < self.recover_ratio and not contended and since_change >= self.hold_seconds:
+            level = max(0, self.level - 1)
+        if level != self.level:
+            logger.info(f"{self.degraded_class.name} degradation: {self.level_name} -> {DEGRADATION_LEVELS[level]} "
+                        f"({self.protected_class.name} at {pressure:.2f}x of its SLO)")
+            self.level = level
+            self.level_changed_at = now
+            self.level_changes += 1
+
+    def admit(self, now=None):
+        """Return the input size to run this frame at, or None to skip it"""
+        now = now or time.time()
+        self._update_level(now)
+        level = self.level_name
+        if level == SKIP or (level != FULL and now - self.last_admitted < 1.0 / self.degraded_rate_hz):
+            self.degraded_class.skipped += 1
+            return None
+        self.last_admitted = now
+        return self.degraded_imgsz if level == REDUCED_SIZE else self.full_imgsz
+
+    def stats(self):
+        return {
+            "level": self.level_name,
+            "level_changes": self.level_changes,
+            "pressure": self.pressure(time.time()),
+            "degraded_rate_hz": self.degraded_rate_hz,
+            "imgsz": self.degraded_imgsz if self.level_name == REDUCED_SIZE else self.full_imgsz,
+        }
@@ -0,0 +1,281 @@
+import os
+import time
+import logging
+import itertools
+import multiprocessing
+from collections import deque
+from multiprocessing import shared_memory
+
+import eventlet
+from eventlet import tpool, patcher
+from eventlet.event import Event
+from eventlet.queue import Queue
+
+logger = logging.getLogger(__name__)
+
+# Defaults for the frame ring buffer
+DEFAULT_SLOT_BYTES = 1024 * 1024
+DEFAULT_JOB_TIMEOUT = 10.0
+
+# How a worker hands a result back: written into the frame's slot, or sent through the queue
+RESULT_IN_SLOT = 'slot'
+RESULT_IN_QUEUE = 'queue'
+# Bytes entry of a dict result that is returned through the slot
+SLOT_RESULT_KEY = 'image'
+RESULT_ERROR = 'error'
+WORKER_READY = 'ready'
+
+class SharedFrameRing:
+    """Fixed-size frame slots in one shared memory block
+
+    The parent writes a JPEG frame into a free slot and only sends the slot
+    index and length to a worker, so frame bytes are never pickled. Workers
+    write binary results (annotated images) back into the same slot.
+    """
+
+    def __init__(self, slots, slot_bytes=DEFAULT_SLOT_BYTES):
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self._shm = shared_memory.SharedMemory(create=True, size=slots * slot_bytes)
+        self._free = Queue()
+        for slot in range(slots):
+            self._free.put(slot)
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    def acquire(self):
+        """Wait (as a greenlet) for a free slot"""
+        return self._free.get()
+
+    def release(self, slot):
+        self._free.put(slot)
+
+    def free_slots(self):
+        return self._free.qsize()
+
+    def write(self, slot, data):
+        offset = slot * self.slot_bytes
+        self._shm.buf[offset:offset + len(data)] = data
+
+    def read(self, slot, length):
+        offset = slot * self.slot_bytes
+        return bytes(self._shm.buf[offset:offset + length])
+
+    def close(self):
+        self._shm.close()
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+
+class InferenceWorkerPool:
+    """Run inference tasks in forked worker processes fed through a shared frame ring
+
+    ``tasks`` maps a task name to a function taking the frame bytes. The models
+    those functions use should be loaded by ``worker_init``, which runs once in
+    each worker after the fork: a runtime that has started its thread pools
+    before the fork leaves the children with pools whose threads are gone.
+    A task can return bytes, or a dict whose ``image`` entry holds bytes; those
+    bytes are written back into the frame's slot instead of being pickled.
+    ``submit()`` blocks only the calling greenlet; results are
+    collected by one greenlet that waits on the result queue in eventlet's
+    thread pool, so the hub keeps serving sockets.
+    """
+
+    def __init__(self, tasks, num_workers, slots=None, slot_bytes=DEFAULT_SLOT_BYTES,
+                 worker_init=None, job_timeout=DEFAULT_JOB_TIMEOUT, stats_window=200):
+        self.tasks = tasks
+        self.num_workers = max(1, int(num_workers))
+        self.worker_init = worker_init
+        self.job_timeout = job_timeout
+        self.ring = SharedFrameRing(slots or 2 * self.num_workers, slot_bytes)
+
+        # Fork shares the task functions and their detectors with the workers without pickling them
+        context = multiprocessing.get_context('fork')
+        self._jobs = context.Queue()
+        # Workers write results straight to the pipe; a Queue would need a feeder
+        # thread, which is a green thread in the worker and never gets scheduled
+        self._results = context.SimpleQueue()
+        self._context = context
+        self._processes = []
+        self._parent_pid = os.getpid()
+        self._collector = None
+        self._job_ids = itertools.count(1)
+        self._pending = {}
+        # Slots of timed-out jobs, released once the late result comes back
+        self._abandoned = {}
+        self._ready_workers = set()
+        self._init_results = {}
+        self._on_ready = None
+
+        self._latencies = deque(maxlen=stats_window)
+        self._jobs_per_worker = {}
+        self._total_jobs = 0
+        self._total_errors = 0
+        self._total_timeouts = 0
+        self._oversize_frames = 0
+
+    def start(self, on_ready=None):
+        """Fork the workers; ``on_ready`` is called once every worker has initialized
+
+        It gets a dict of worker id to the value ``worker_init`` returned in that worker.
+        """
+        self._on_ready = on_ready
+        for worker_id in range(self.num_workers):
+            process = self._context.Process(target=self._worker_main, args=(worker_id,),
+                                            name=f"inference-worker-{worker_id}", daemon=True)
+            process.start()
+            self._processes.append(process)
+        self._collector = eventlet.spawn(self._collect_results)
+        logger.info(f"Started {self.num_workers} inference workers "
+                    f"({self.ring.slots} frame slots of {self.ring.slot_bytes // 1024} KB)")
+
+    def submit(self, task, data, **options):
+        """Run a task on one frame in a worker and wait for its result; options are passed to the task"""
+        job_id = next(self._job_ids)
+        done = Event()
+        slot = self.ring.acquire()
+        submitted = time.time()
+
+        self._pending[job_id] = (done, slot, submitted)
+        if len(data) <= self.ring.slot_bytes:
+            self.ring.write(slot, data)
+            self._jobs.put((job_id, task, slot, len(data), None, options))
+        else:
+            # Larger than a slot, fall back to pickling the frame through the queue
+            self._oversize_frames += 1
+            self._jobs.put((job_id, task, slot, 0, bytes(data), options))
+
+        try:
+            with eventlet.Timeout(self.job_timeout):
+                return done.wait()
+        except eventlet.Timeout:
+            # Keep the slot reserved, the worker may still write into it
+            self._pending.pop(job_id, None)
+            self._abandoned[job_id] = slot
+            self._total_timeouts += 1
+            raise TimeoutError(f"{task} job timed out after {self.job_timeout}s")
+
+    def _collect_results(self):
+        while True:
+            message = tpool.execute(self._results.get)
+            if message is None:
+                break
+            try:
+                self._handle_result(*message)
+            except Exception as e:
+                logger.error(f"Error handling inference worker result: {e}")
+
+    def _handle_result(self, job_id, worker_id, kind, payload):
+        if kind == WORKER_READY:
+            pid, init_result = payload
+            self._ready_workers.add(worker_id)
+            self._init_results[worker_id] = init_result
+            logger.info(f"Inference worker {worker_id} ready (pid {pid})")
+            if len(self._ready_workers) == self.num_workers and self._on_ready is not None:
+                self._on_ready(dict(self._init_results))
+            return
+
+        if job_id in self._abandoned:
+            self.ring.release(self._abandoned.pop(job_id))
+            return
+        pending = self._pending.pop(job_id, None)
+        if pending is None:
+            return
+        done, slot, submitted = pending
+
+        self._total_jobs += 1
+        self._jobs_per_worker[worker_id] = self._jobs_per_worker.get(worker_id, 0) + 1
+        self._latencies.append(time.time() - submitted)
+        try:
+            if kind == RESULT_IN_SLOT:
+                length, metadata = payload
+                result = self.ring.read(slot, length)
+                if metadata is not None:
+                    result = dict(metadata, **{SLOT_RESULT_KEY: result})
+            elif kind == RESULT_ERROR:
+                self._total_errors += 1
+                result = RuntimeError(payload)
+            else:
+                result = payload
+        finally:
+            self.ring.release(slot)
+
+        if isinstance(result, Exception):
+            done.send_exception(result)
+        else:
+            done.send(result)
+
+    def _worker_main(self, worker_id):
+        """Worker process loop: read frames from the ring, run the task, send back results"""
+        init_result = None
+        if self.worker_init is not None:
+            init_result = self.worker_init(worker_id)
+        self._results.put((None, worker_id, WORKER_READY, (os.getpid(), init_result)))
+
+        # Exit with the server instead of lingering as an orphan. This is a native
+        # thread: the green hub copied by fork must never run in the worker
+        native_threading = patcher.original('threading')
+        native_threading.Thread(target=self._exit_with_parent, daemon=True).start()
+
+        # The parent's SharedMemory handle is inherited through fork
+        buf = self.ring._shm.buf
+        while True:
+            # Blocking get without a timeout stays on native locks and reads, no green poll
+            job = self._jobs.get()
+            if job is None:
+                break
+            job_id, task, slot, length, inline_data, options = job
+            offset = slot * self.ring.slot_bytes
+            try:
+                data = inline_data if inline_data is not None else bytes(buf[offset:offset + length])
+                result = self.tasks[task](data, **options)
+                image, metadata = result, None
+                if isinstance(result, dict):
+                    # Only the small metadata is pickled, the image goes back through the slot
+                    image = result.get(SLOT_RESULT_KEY)
+                    metadata = {key: value for key, value in result.items() if key != SLOT_RESULT_KEY}
+                if isinstance(image, (bytes, bytearray)) and len(image) <= self.ring.slot_bytes:
+                    buf[offset:offset + len(image)] = image
+                    self._results.put((job_id, worker_id, RESULT_IN_SLOT, (len(image), metadata)))
+                else:
+                    self._results.put((job_id, worker_id, RESULT_IN_QUEUE, result))
+            except Exception as e:
+                self._results.put((job_id, worker_id, RESULT_ERROR, f"{type(e).__name__}: {e}"))
+
+    def _exit_with_parent(self):
+        native_time = patcher.original('time')
+        while os.getppid() == self._parent_pid:
+            native_time.sleep(1.0)
+        os._exit(0)
+
+    def stats(self):
+        """Return job counts, latency and ring usage figures over the recent window"""
+        latencies = list(self._latencies)
+        return {
+            "workers": self.num_workers,
+            "ready_workers": len(self._ready_workers),
+            "alive_workers": sum(1 for process in self._processes if process.is_alive()),
+            "slots": self.ring.slots,
+            "free_slots": self.ring.free_slots(),
+            "in_flight": len(self._pending),
+            "total_jobs": self._total_jobs,
+            "total_errors": self._total_errors,
+            "total_timeouts": self._total_timeouts,
+            "oversize_frames": self._oversize_frames,
+            "jobs_per_worker": dict(self._jobs_per_worker),
+            "avg_latency_ms": sum(latencies) / len(latencies) * 1000.0 if latencies else 0.0,
+        }
+
+    def close(self):
+        """Stop the workers and free the shared memory"""
+        for _ in self._processes:
+            self._jobs.put(None)
+        for process in self._processes:
+            process.join(timeout=2)
+            if process.is_alive():
+                process.terminate()
+        self._results.put(None)
+        self.ring.close()
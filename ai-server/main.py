@@ -1,45 +1,44 @@
-import socketio
 import eventlet
-from eventlet import websocket
+# Patch sockets, threads and time before anything else is imported. os stays
+# unpatched: its green read() can't be used from tpool threads or worker processes
+eventlet.monkey_patch(os=False)
+import socketio
+from eventlet import websocket, tpool
+from eventlet.semaphore import Semaphore
 import logging
-import io
 import numpy as np
 import os
-import json
 import time
-from PIL import Image
 import paho.mqtt.client as mqtt
 import sys
 import subprocess
-from watchdog.observers import Observer
+# Polling observer: the inotify observer blocks in os.read, which would stall the hub
+from watchdog.observers.polling import PollingObserver as Observer
 from watchdog.events import FileSystemEventHandler
 import cv2
+import argparse
+import itertools
+from urllib.parse import parse_qs
+from batch_inference import BatchingInferenceQueue
+from drowsiness_processing import load_image, PreprocessEnginePool, postprocess_prediction, no_face_result
+from face_roi import FaceDetector, FaceRegionTracker, crop_to_region
+from frame_gate import FrameChangeGate
+from adaptive_sampling import AdaptiveSampler
+from result_cache import ResultCache
+from inference_backends import BACKENDS, DEFAULT_MODEL_PATHS, get_backend_name, create_backend
+from readiness import ModelReadiness, LOADING, WARMING_UP, READY, FAILED
+from inference_workers import InferenceWorkerPool
+from offload import BlockingOffload, HubLagMonitor
+from frame_mailbox import LatestFrameMailbox
+from eye_cascade import EyeLandmarkModel, EyeStateCascade
+from inference_scheduler import SchedulingClass, PriorityInferenceScheduler, DegradationController
+from yolo_runtime import YOLO_RUNTIMES, YoloRuntimeDetector, find_exported_models
+from thread_config import DEFAULT_THREAD_CONFIG_PATH, load_thread_config, apply_thread_config, configure_torch_threads
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# Import TensorFlow and Keras
-try:
-    import tensorflow as tf
-    from tensorflow.keras.models import load_model
-    logger.info("TensorFlow imported successfully")
-    have_tensorflow = True
-except ImportError:
-    logger.error("TensorFlow import failed - please install tensorflow")
-    print("WARNING: TensorFlow import failed - drowsiness detection will be disabled")
-    have_tensorflow = False
-
-# Import ultralytics YOLOv8
-try:
-    from ultralytics import YOLO
-    logger.info("YOLOv8 imported successfully")
-    have_yolo = True
-except ImportError:
-    logger.error("YOLOv8 import failed - please install ultralytics")
-    print("WARNING: YOLOv8 import failed - traffic sign detection will be disabled")
-    have_yolo = False
-
 # Socket.IO setup
 sio = socketio.Server(cors_allowed_origins='*', binary=True)
 app = socketio.WSGIApp(sio)
@@ -48,6 +47,8 @@ app = socketio.WSGIApp(sio)
 clients_connected = 0
 last_esp32_image = None
 last_driver_image = None
+# Newest annotated front camera frame, for viewers that opted in to annotated JPEGs
+last_annotated_esp32_image = None
 
 # MQTT Configuration from Flutter app config
 MQTT_BROKER = 'fd66ecb3.ala.asia-southeast1.emqxsl.com'
@@ -57,9 +58,116 @@ MQTT_USERNAME = 'trancon2'
 MQTT_PASSWORD = '123'
 MQTT_TOPIC_DROWSY = "/drowsy"
 
-# Model path - using only Keras
+# Model paths for each drowsiness backend
 KERAS_MODEL_PATH = 'models/densenet201.keras'
 FULL_MODEL_PATH = os.path.join('C:', os.sep, 'Users', 'tranv', 'Workspace', 'pt_iot', 'ai-server', 'models', 'densenet201.keras')
+ONNX_MODEL_PATH = 'models/densenet201.onnx'
+
+# Command-line options (unknown arguments such as --restart are ignored here)
+arg_parser = argparse.ArgumentParser(description="AI server for drowsiness and traffic sign detection")
+arg_parser.add_argument("--backend", choices=list(BACKENDS),
+                        help="Drowsiness inference backend (default: $DROWSY_BACKEND or keras)")
+arg_parser.add_argument("--model", default=os.environ.get('DROWSY_MODEL_PATH'),
+                        help="Path to the drowsiness model file for the selected backend")
+cli_args, _ = arg_parser.parse_known_args()
+DROWSY_BACKEND = get_backend_name(cli_args.backend)
+
+# Drowsiness micro-batching: frames from all driver streams are grouped into one
+# model call for up to DROWSY_BATCH_MAX_WAIT_MS or DROWSY_BATCH_MAX_SIZE frames
+DROWSY_BATCH_MAX_SIZE = int(os.environ.get('DROWSY_BATCH_MAX_SIZE', '8'))
+DROWSY_BATCH_MAX_WAIT_MS = float(os.environ.get('DROWSY_BATCH_MAX_WAIT_MS', '15'))
+
+# Face region-of-interest cropping: only the padded face crop goes to the
+# drowsiness model, and frames without a face skip the model entirely
+DROWSY_FACE_ROI = os.environ.get('DROWSY_FACE_ROI', '0').lower() in ('1', 'true', 'yes', 'on')
+DROWSY_FACE_DETECTOR = os.environ.get('DROWSY_FACE_DETECTOR', 'auto')  # auto, dnn or haar
+DROWSY_FACE_PADDING = float(os.environ.get('DROWSY_FACE_PADDING', '0.25'))
+DROWSY_FACE_REDETECT_INTERVAL = int(os.environ.get('DROWSY_FACE_REDETECT_INTERVAL', '5'))
+
+# Cascade mode: an eye-aspect-ratio check decides clear frames, only the rest run the full model
+DROWSY_CASCADE = os.environ.get('DROWSY_CASCADE', '0').lower() in ('1', 'true', 'yes', 'on')
+DROWSY_CASCADE_CLOSED_EAR = float(os.environ.get('DROWSY_CASCADE_CLOSED_EAR', '0.21'))
+DROWSY_CASCADE_OPEN_EAR = float(os.environ.get('DROWSY_CASCADE_OPEN_EAR', '0.27'))
+DROWSY_CASCADE_MAX_PERCLOS = float(os.environ.get('DROWSY_CASCADE_MAX_PERCLOS', '0.15'))
+DROWSY_CASCADE_PERCLOS_WINDOW = float(os.environ.get('DROWSY_CASCADE_PERCLOS_WINDOW', '10'))
+DROWSY_CASCADE_AUDIT_INTERVAL = int(os.environ.get('DROWSY_CASCADE_AUDIT_INTERVAL', '20'))
+
+# Frame-change gating: skip inference on frames that barely differ from the
+# last inferred frame of the same stream and reuse the previous result
+FRAME_GATE_ENABLED = os.environ.get('FRAME_GATE_ENABLED', '1').lower() in ('1', 'true', 'yes', 'on')
+FRAME_GATE_DIFF_THRESHOLD = float(os.environ.get('FRAME_GATE_DIFF_THRESHOLD', '3.0'))
+FRAME_GATE_BRIGHTNESS_THRESHOLD = float(os.environ.get('FRAME_GATE_BRIGHTNESS_THRESHOLD', '12.0'))
+FRAME_GATE_DARK_THRESHOLD = float(os.environ.get('FRAME_GATE_DARK_THRESHOLD', '16.0'))
+FRAME_GATE_MAX_SKIP_SECONDS = float(os.environ.get('FRAME_GATE_MAX_SKIP_SECONDS', '2.0'))
+
+# Adaptive drowsiness sampling: infer sparsely while a driver is confidently
+# awake and every frame as soon as the drowsy probability starts rising
+DROWSY_ADAPTIVE_SAMPLING = os.environ.get('DROWSY_ADAPTIVE_SAMPLING', '1').lower() in ('1', 'true', 'yes', 'on')
+DROWSY_CALM_RATE_HZ = float(os.environ.get('DROWSY_CALM_RATE_HZ', '1.5'))
+DROWSY_WATCH_RATE_HZ = float(os.environ.get('DROWSY_WATCH_RATE_HZ', '5.0'))
+
+# Content-hash result caches: byte-identical frames (re-pushed on reconnect or
+# received twice) are never decoded or inferred again
+DROWSY_CACHE_MAX_MB = float(os.environ.get('DROWSY_CACHE_MAX_MB', '4'))
+TRAFFIC_CACHE_MAX_MB = float(os.environ.get('TRAFFIC_CACHE_MAX_MB', '32'))
+
+# Number of dummy inferences run on each model after loading, before it is marked ready
+MODEL_WARMUP_RUNS = int(os.environ.get('MODEL_WARMUP_RUNS', '3'))
+
+# Run model calls, decoding and drawing in eventlet's native thread pool instead of on the hub
+INFERENCE_OFFLOAD = os.environ.get('INFERENCE_OFFLOAD', '1') == '1'
+
+# Frames waiting longer than this for inference are dropped (0 disables the deadline)
+FRAME_MAX_AGE_MS = float(os.environ.get('FRAME_MAX_AGE_MS', '500'))
+
+# Number of forked inference worker processes (0 runs inference inside the server process)
+INFERENCE_WORKERS = int(os.environ.get('INFERENCE_WORKERS', '0'))
+# Frame slots in the shared memory ring (0 uses two per worker) and the size of each slot
+INFERENCE_WORKER_SLOTS = int(os.environ.get('INFERENCE_WORKER_SLOTS', '0'))
+INFERENCE_SLOT_KB = int(os.environ.get('INFERENCE_SLOT_KB', '1024'))
+
+# Priority scheduling: drowsiness jobs always go first, traffic detection degrades under contention
+INFERENCE_CONCURRENCY = int(os.environ.get('INFERENCE_CONCURRENCY', str(max(1, INFERENCE_WORKERS))))
+DROWSY_SLO_MS = float(os.environ.get('DROWSY_SLO_MS', '250'))
+TRAFFIC_SLO_MS = float(os.environ.get('TRAFFIC_SLO_MS', '1000'))
+TRAFFIC_IMGSZ = int(os.environ.get('TRAFFIC_IMGSZ', '640'))
+TRAFFIC_DEGRADED_IMGSZ = int(os.environ.get('TRAFFIC_DEGRADED_IMGSZ', '320'))
+TRAFFIC_DEGRADED_RATE_HZ = float(os.environ.get('TRAFFIC_DEGRADED_RATE_HZ', '2'))
+
+# Front camera delivery: raw frames plus a 'frontcam_detections' event per inferred frame.
+# Annotated JPEGs are only drawn for viewers that opt in (FRONTCAM_METADATA=0 sends them to everyone)
+FRONTCAM_METADATA = os.environ.get('FRONTCAM_METADATA', '1').lower() in ('1', 'true', 'yes', 'on')
+FRONTCAM_ANNOTATED_JPEG_QUALITY = int(os.environ.get('FRONTCAM_ANNOTATED_JPEG_QUALITY', '75'))
+
+# Traffic detection runtime: ultralytics (PyTorch) or an export from export_yolo.py on onnx / openvino
+TRAFFIC_BACKEND = os.environ.get('TRAFFIC_BACKEND', 'ultralytics').lower()
+
+# Thread counts and core pinning written by tune_threads.py, applied before any model loads
+INFERENCE_THREAD_CONFIG = os.environ.get('INFERENCE_THREAD_CONFIG', DEFAULT_THREAD_CONFIG_PATH)
+thread_config = load_thread_config(INFERENCE_THREAD_CONFIG)
+if thread_config and INFERENCE_WORKERS > 0:
+    # The tuned counts are for one process running both models; N workers would oversubscribe the cores
+    logger.warning(f"Ignoring {INFERENCE_THREAD_CONFIG} in worker mode, each worker uses one runtime thread")
+elif thread_config:
+    tuned_traffic_backend = thread_config.get('traffic', {}).get('backend', 'ultralytics')
+    if tuned_traffic_backend != TRAFFIC_BACKEND:
+        logger.warning(f"{INFERENCE_THREAD_CONFIG} was tuned with the {tuned_traffic_backend} traffic model, "
+                       f"rerun tune_threads.py --traffic-backend {TRAFFIC_BACKEND}")
+    apply_thread_config(thread_config)
+
+offload = BlockingOffload(enabled=INFERENCE_OFFLOAD)
+hub_lag = HubLagMonitor()
+
+scheduler = PriorityInferenceScheduler([
+    SchedulingClass('drowsiness', priority=0, slo_ms=DROWSY_SLO_MS),
+    SchedulingClass('traffic', priority=1, slo_ms=TRAFFIC_SLO_MS),
+], concurrency=INFERENCE_CONCURRENCY)
+traffic_degradation = DegradationController(
+    scheduler, 'traffic', protected_class='drowsiness',
+    degraded_rate_hz=TRAFFIC_DEGRADED_RATE_HZ,
+    full_imgsz=TRAFFIC_IMGSZ,
+    degraded_imgsz=TRAFFIC_DEGRADED_IMGSZ
+)
 
 # YOLOv8 model path
 YOLO_MODEL_PATH = 'models/best.pt'
@@ -68,13 +176,30 @@ FULL_YOLO_MODEL_PATH = os.path.join('C:', os.sep, 'Users', 'tranv', 'Workspace',
 # Class names for YOLOv8 model
 YOLO_CLASS_NAMES = ['Speed Limit -10-','Speed Limit -100-','Speed Limit -110-','Speed Limit -120-','Speed Limit -20-','Speed Limit -30-','Speed Limit -40-','Speed Limit -50-','Speed Limit -60-','Speed Limit -70-','Speed Limit -80-','Speed Limit -90-', 'Traffic Green', 'Traffic Red', 'Traffic Yellow']
 
+def detection_metadata(detection, width, height):
+    """Compact description of one (x1, y1, x2, y2, confidence, class id) detection, box normalized to 0-1"""
+    x1, y1, x2, y2, confidence, cls_id = (float(value) for value in detection)
+    cls_id = int(cls_id)
+    return {
+        "class": YOLO_CLASS_NAMES[cls_id] if cls_id < len(YOLO_CLASS_NAMES) else f"Class {cls_id}",
+        "class_id": cls_id,
+        "confidence": round(confidence, 3),
+        "box": [round(x1 / width, 4), round(y1 / height, 4), round(x2 / width, 4), round(y2 / height, 4)],
+    }
+
 class TrafficDetector:
-    def __init__(self):
+    def __init__(self, load=True):
         self.model = None
-        self.load_model()
+        # Set once the model is loaded and warmed up
+        self.ready = False
+        if load:
+            self.load_model()
     
     def load_model(self):
         """Load YOLOv8 model"""
+        if TRAFFIC_BACKEND in YOLO_RUNTIMES:
+            return self.load_exported_model()
+        
         # Debug information
         print(f"Current working directory: {os.getcwd()}")
         absolute_path = os.path.abspath(FULL_YOLO_MODEL_PATH)
@@ -103,6 +228,9 @@ class TrafficDetector:
             
         # If ultralytics is available, try to load the model
         if have_ultralytics:
+            # Thread counts from the tuned configuration, before PyTorch starts its pools
+            configure_torch_threads()
+            
             model_paths_to_try = [
                 FULL_YOLO_MODEL_PATH,  # Try the absolute path first
                 YOLO_MODEL_PATH,       # Then try the relative path
@@ -126,135 +254,474 @@ class TrafficDetector:
             logger.error("Failed to load YOLOv8 model")
         return False
     
-    def detect_and_draw(self, image_data):
-        """Detect objects in image and draw bounding boxes"""
+    def model_available(self):
+        """Whether the model files exist, without loading them"""
+        if TRAFFIC_BACKEND in YOLO_RUNTIMES:
+            return bool(find_exported_models(YOLO_MODEL_PATH, TRAFFIC_BACKEND, (TRAFFIC_IMGSZ, TRAFFIC_DEGRADED_IMGSZ)))
+        return os.path.exists(FULL_YOLO_MODEL_PATH) or os.path.exists(YOLO_MODEL_PATH)
+    
+    def load_exported_model(self):
+        """Load the fixed-size ONNX / OpenVINO exports, without ultralytics or PyTorch"""
+        model_paths = find_exported_models(YOLO_MODEL_PATH, TRAFFIC_BACKEND, (TRAFFIC_IMGSZ, TRAFFIC_DEGRADED_IMGSZ))
+        if not model_paths:
+            logger.error(f"No {TRAFFIC_BACKEND} export of {YOLO_MODEL_PATH} found, run export_yolo.py first")
+            return False
+        try:
+            model = YoloRuntimeDetector(model_paths, runtime=TRAFFIC_BACKEND)
+            model.load()
+            self.model = model
+            return True
+        except Exception as e:
+            logger.error(f"Error loading {TRAFFIC_BACKEND} YOLO model: {e}")
+            return False
+    
+    def detect(self, cv_image, imgsz=TRAFFIC_IMGSZ):
+        """Return an (N, 6) array of x1, y1, x2, y2, confidence, class id for a BGR image"""
+        if isinstance(self.model, YoloRuntimeDetector):
+            return self.model.detect(cv_image, imgsz)
+        boxes = self.model(cv_image, imgsz=imgsz, verbose=False)[0].boxes
+        return np.column_stack([boxes.xyxy.cpu().numpy(), boxes.conf.cpu().numpy(), boxes.cls.cpu().numpy()])
+    
+    def warm_up(self, runs=MODEL_WARMUP_RUNS):
+        """Run dummy inferences so the first real frame doesn't pay allocator warm-up"""
+        dummy_frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        for _ in range(runs):
+            for imgsz in sorted({TRAFFIC_IMGSZ, TRAFFIC_DEGRADED_IMGSZ}):
+                self.detect(dummy_frame, imgsz)
+    
+    def detect_frame(self, image_data, imgsz=TRAFFIC_IMGSZ, annotate=False):
+        """Detect objects in a camera frame
+        
+        Returns the frame size and the detections, each with its class,
+        confidence and box normalized to 0-1. With ``annotate`` the result also
+        holds the frame re-encoded with the boxes drawn under "image", for
+        legacy viewers. Returns None when the frame can't be processed.
+        """
         if self.model is None:
             logger.error("YOLOv8 model not loaded. Cannot perform detection.")
-            # Just return the original image without processing
-            return image_data
+            return None
         
         try:
-            # Convert binary image data to PIL Image
-            pil_image = Image.open(io.BytesIO(image_data))
-            
-            # Convert PIL Image to OpenCV format (numpy array)
-            cv_image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
+            # Decode straight to BGR for the model
+            cv_image = cv2.imdecode(np.frombuffer(image_data, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if cv_image is None:
+                raise ValueError("frame could not be decoded")
+            height, width = cv_image.shape[:2]
             
             # Run YOLOv8 inference
-            results = self.model(cv_image)
-            
-            # Draw detection results on the image
-            for result in results:
-                boxes = result.boxes
-                for i, box in enumerate(boxes):
-                    # Get box coordinates, confidence and class
-                    x1, y1, x2, y2 = box.xyxy[0].tolist()
-                    confidence = box.conf[0].item()
-                    cls_id = int(box.cls[0].item())
-                    
-                    # Convert to integers
-                    x1, y1, x2, y2 = int(x1), int(y1), int(x2), int(y2)
-                    
-                    # Get class name
-                    class_name = YOLO_CLASS_NAMES[cls_id] if cls_id < len(YOLO_CLASS_NAMES) else f"Class {cls_id}"
-                    
-                    # Draw bounding box
-                    cv2.rectangle(cv_image, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                    
-                    # Draw label background
-                    text = f"{class_name}: {confidence:.2f}"
-                    text_size, _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 2)
-                    cv2.rectangle(cv_image, (x1, y1 - text_size[1] - 5), (x1 + text_size[0], y1), (0, 255, 0), -1)
-                    
-                    # Draw label text
-                    cv2.putText(cv_image, text, (x1, y1 - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 2)
-            
-            # Convert back to PIL Image
-            pil_image_result = Image.fromarray(cv2.cvtColor(cv_image, cv2.COLOR_BGR2RGB))
+            detections = self.detect(cv_image, imgsz)
             
-            # Convert to binary data
-            img_byte_arr = io.BytesIO()
-            pil_image_result.save(img_byte_arr, format=pil_image.format or 'JPEG')
-            img_byte_arr = img_byte_arr.getvalue()
+            result = {
+                "width": width,
+                "height": height,
+                "imgsz": imgsz,
+                "detections": [detection_metadata(detection, width, height) for detection in detections],
+                "image": self.draw_detections(cv_image, detections) if annotate else None,
+            }
             
-            logger.info(f"YOLOv8 detection completed with {len(results[0].boxes)} detections")
-            return img_byte_arr
+            logger.info(f"YOLOv8 detection completed with {len(detections)} detections")
+            return result
             
         except Exception as e:
             logger.error(f"Error in YOLOv8 detection: {e}")
-            return image_data  # Return original image on error
+            return None
+    
+    def draw_detections(self, cv_image, detections):
+        """Draw bounding boxes and labels on a BGR image and return it as JPEG bytes"""
+        for x1, y1, x2, y2, confidence, cls_id in detections:
+            # Convert to integers
+            x1, y1, x2, y2, cls_id = int(x1), int(y1), int(x2), int(y2), int(cls_id)
+            
+            # Get class name
+            class_name = YOLO_CLASS_NAMES[cls_id] if cls_id < len(YOLO_CLASS_NAMES) else f"Class {cls_id}"
+            
+            # Draw bounding box
+            cv2.rectangle(cv_image, (x1, y1), (x2, y2), (0, 255, 0), 2)
+            
+            # Draw label background
+            text = f"{class_name}: {confidence:.2f}"
+            text_size, _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 2)
+            cv2.rectangle(cv_image, (x1, y1 - text_size[1] - 5), (x1 + text_size[0], y1), (0, 255, 0), -1)
+            
+            # Draw label text
+            cv2.putText(cv_image, text, (x1, y1 - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 2)
+        
+        ok, encoded = cv2.imencode('.jpg', cv_image, [cv2.IMWRITE_JPEG_QUALITY, FRONTCAM_ANNOTATED_JPEG_QUALITY])
+        if not ok:
+            raise ValueError("annotated frame could not be encoded")
+        return encoded.tobytes()
 
 class DrowsinessDetector:
-    def __init__(self):
+    def __init__(self, backend_name=DROWSY_BACKEND, model_path=None, load=True):
         self.model = None
-        self.load_model()
+        # Set once the model is loaded and warmed up
+        self.ready = False
+        self.batcher = None
+        # Reusable input buffers, one per frame being processed at the same time
+        self.engines = PreprocessEnginePool()
+        self.backend_name = backend_name
+        self.model_path = model_path
+        if load:
+            self.load_model()
+    
+    def model_paths(self):
+        """Model files to try for the selected backend, in order"""
+        if self.model_path:
+            return [self.model_path]
+        if self.backend_name == 'keras':
+            return [
+                FULL_MODEL_PATH,  # Try the absolute path first
+                KERAS_MODEL_PATH  # Then try the relative path
+            ]
+        if self.backend_name == 'onnx':
+            return [ONNX_MODEL_PATH]
+        return [DEFAULT_MODEL_PATHS[self.backend_name]]
+    
+    def model_available(self):
+        """Whether a model file exists, without loading it"""
+        return any(os.path.exists(model_path) for model_path in self.model_paths())
     
     def load_model(self):
-        """Load Keras model"""
-        model_paths_to_try = [
-            FULL_MODEL_PATH,  # Try the absolute path first
-            KERAS_MODEL_PATH  # Then try the relative path
-        ]
-        
-        for model_path in model_paths_to_try:
+        """Load the drowsiness model with the selected inference backend"""
+        for model_path in self.model_paths():
             if os.path.exists(model_path):
                 try:
-                    self.model = load_model(model_path)
-                    logger.info(f"Keras model loaded successfully from {model_path}")
+                    self.model = create_backend(self.backend_name, model_path)
+                    # uint8-input models normalize in the graph, so buffers hold raw pixels
+                    self.engines = PreprocessEnginePool(size=self.model.input_size, dtype=self.model.input_dtype)
+                    logger.info(f"Drowsiness model loaded with {self.backend_name} backend from {model_path}")
                     return True
                 except Exception as e:
-                    logger.error(f"Error loading Keras model from {model_path}: {e}")
+                    logger.error(f"Error loading {self.backend_name} model from {model_path}: {e}")
             else:
                 logger.warning(f"Model not found at {model_path}")
         
         logger.error("Could not load model from any available path")
         return False
     
-    def detect(self, image_data):
-        """Detect drowsiness in image"""
+    def enable_batching(self, max_batch_size, max_wait_ms):
+        """Route detect() calls from all streams through one micro-batching queue"""
+        self.batcher = BatchingInferenceQueue(
+            self.predict_batch,
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_wait_ms,
+            name="drowsiness",
+            executor=self.run_model
+        )
+        self.batcher.start()
+    
+    def predict_batch(self, batch):
+        """Run the model on a (N, height, width, 3) batch"""
+        return self.model.predict(batch)
+    
+    def run_model(self, predict_fn, batch):
+        """Run a model call as a high-priority scheduler job in the thread pool"""
+        return scheduler.run('drowsiness', offload.run, predict_fn, batch)
+    
+    def warm_up(self, runs=MODEL_WARMUP_RUNS, batch_sizes=(1,)):
+        """Run dummy batches so graph tracing and allocator warm-up happen before real frames"""
+        for batch_size in batch_sizes:
+            width, height = self.model.input_size
+            dummy_batch = np.zeros((batch_size, height, width, 3), dtype=self.model.input_dtype)
+            for _ in range(runs):
+                self.predict_batch(dummy_batch)
+    
+    def detect(self, image_data, face_region=None, rgb_array=None):
+        """Detect drowsiness in image, optionally on the face region only
+        
+        ``rgb_array`` is the already decoded frame, when the caller has one.
+        """
         if self.model is None:
             logger.error("Model not loaded. Cannot perform detection.")
             return None
         
+        engine = self.engines.acquire()
         try:
-            # Convert binary image data to PIL Image
-            image = Image.open(io.BytesIO(image_data))
-            
-            # Resize image to required size
-            image_resized = image.resize((224, 224))
-            
-            # Convert to numpy array and normalize
-            image_array = np.array(image_resized).astype(np.float32)
-            image_array = image_array / 255.0
-            
-            # Add batch dimension
-            image_array = np.expand_dims(image_array, axis=0)
-            
-            # Make prediction with TensorFlow/Keras
-            predictions = self.model.predict(image_array, verbose=0)  # Set verbose=0 to reduce console output
-            
-            # Get class with highest probability
-            class_index = np.argmax(predictions[0])
-            probability = float(predictions[0][class_index])
-            
-            # Determine result (0=Drowsy, 1=Non-Drowsy based on the model)
-            result = "Drowsy" if class_index == 0 else "Non-Drowsy"
+            if face_region is not None:
+                if rgb_array is None:
+                    rgb_array = offload.run(decode_rgb, image_data)
+                image_array = offload.run(engine.preprocess, crop_to_region(rgb_array, face_region))
+            else:
+                image_array = offload.run(engine.preprocess, image_data)
             
-            logger.info(f"Drowsiness detection result: {result} ({probability * 100:.2f}%)")
+            if self.batcher is not None:
+                # Share one model call with frames from the other driver streams
+                prediction = self.batcher.submit(image_array)
+            else:
+                prediction = self.run_model(self.predict_batch, engine.batch(1))[0]
             
-            return {
-                "result": result,
-                "class_index": int(class_index),
-                "probability": probability,
-                "timestamp": time.time()
-            }
+            return postprocess_prediction(prediction)
         except Exception as e:
             logger.error(f"Error in drowsiness detection: {e}")
             return None
+        finally:
+            self.engines.release(engine)
+
+# Create detectors; the models are loaded in the background once the ports are bound
+detector = DrowsinessDetector(DROWSY_BACKEND, cli_args.model, load=False)
+traffic_detector = TrafficDetector(load=False)
+
+# The result caches are checked in this process before any decoding, also in worker mode
+drowsiness_cache = None
+if DROWSY_CACHE_MAX_MB > 0:
+    drowsiness_cache = ResultCache(int(DROWSY_CACHE_MAX_MB * 1024 * 1024), name="drowsiness")
+traffic_cache = None
+if TRAFFIC_CACHE_MAX_MB > 0:
+    traffic_cache = ResultCache(int(TRAFFIC_CACHE_MAX_MB * 1024 * 1024), name="traffic")
 
-# Initialize detectors
-detector = DrowsinessDetector()
-traffic_detector = TrafficDetector()
+def publish_model_status(status):
+    """Tell every Socket.IO client about a model readiness change"""
+    sio.emit('model_status', status)
+
+model_readiness = ModelReadiness(['drowsiness', 'traffic'], on_change=publish_model_status)
+
+def load_detector(name, detector_instance, after_load=None, warm_up_kwargs=None):
+    """Load and warm up one detector in a worker thread so the hub keeps serving sockets"""
+    model_readiness.set_state(name, LOADING)
+    try:
+        loaded = tpool.execute(detector_instance.load_model)
+        if not loaded or detector_instance.model is None:
+            model_readiness.set_state(name, FAILED, "model could not be loaded")
+            return
+        if after_load is not None:
+            after_load()
+        
+        model_readiness.set_state(name, WARMING_UP)
+        started = time.time()
+        tpool.execute(detector_instance.warm_up, **(warm_up_kwargs or {}))
+        logger.info(f"{name} model warmed up in {time.time() - started:.2f}s")
+        
+        detector_instance.ready = True
+        model_readiness.set_state(name, READY)
+    except Exception as e:
+        logger.error(f"Error loading {name} model: {e}")
+        model_readiness.set_state(name, FAILED, e)
+
+def load_models_in_background():
+    """Load both models after the servers are listening; frames pass through until then"""
+    eventlet.spawn(load_detector, 'drowsiness', detector,
+                   after_load=lambda: detector.enable_batching(DROWSY_BATCH_MAX_SIZE, DROWSY_BATCH_MAX_WAIT_MS),
+                   warm_up_kwargs={"batch_sizes": (1, DROWSY_BATCH_MAX_SIZE)})
+    eventlet.spawn(load_detector, 'traffic', traffic_detector)
+
+worker_pool = None
+traffic_inference_lock = Semaphore(1)
+
+def init_inference_worker(worker_id, task_names):
+    """Runs in each forked worker: one runtime thread per process, then load and warm up the models
+    
+    Returns the names of the models that loaded.
+    """
+    # The parent's thread pool doesn't survive the fork, workers run inference directly
+    offload.enabled = False
+    if TRAFFIC_BACKEND == 'ultralytics' and 'traffic' in task_names:
+        # Exported traffic models run without torch, so it is only imported for ultralytics
+        try:
+            import torch
+            torch.set_num_threads(1)
+        except ImportError:
+            pass
+    loaded = []
+    for name, detector_instance in (('drowsiness', detector), ('traffic', traffic_detector)):
+        if name in task_names and detector_instance.load_model() and detector_instance.model is not None:
+            detector_instance.warm_up()
+            loaded.append(name)
+    return loaded
+
+def start_inference_workers(num_workers):
+    """Fork workers that each load both models
+    
+    The models are loaded after the fork, so no runtime thread pool exists
+    when the process is forked. This process only checks the model files.
+    """
+    global worker_pool
+    
+    # Workers use one runtime thread each and scale across cores as processes
+    os.environ.setdefault('ORT_INTRA_OP_THREADS', '1')
+    os.environ.setdefault('ORT_INTER_OP_THREADS', '1')
+    os.environ.setdefault('TF_INTRA_OP_THREADS', '1')
+    os.environ.setdefault('TF_INTER_OP_THREADS', '1')
+    os.environ.setdefault('TFLITE_THREADS', '1')
+    os.environ.setdefault('TRAFFIC_THREADS', '1')
+    
+    tasks = {}
+    for name, detector_instance, task in (('drowsiness', detector, detector.detect),
+                                          ('traffic', traffic_detector, traffic_detector.detect_frame)):
+        if detector_instance.model_available():
+            tasks[name] = task
+            model_readiness.set_state(name, LOADING)
+        else:
+            model_readiness.set_state(name, FAILED, "model file not found")
+    if not tasks:
+        return
+    
+    def on_workers_ready(init_results):
+        for name, detector_instance in (('drowsiness', detector), ('traffic', traffic_detector)):
+            if name not in tasks:
+                continue
+            if all(name in loaded for loaded in init_results.values()):
+                detector_instance.ready = True
+                model_readiness.set_state(name, READY)
+            else:
+                model_readiness.set_state(name, FAILED, "model could not be loaded in the workers")
+    
+    worker_pool = InferenceWorkerPool(
+        tasks,
+        num_workers,
+        slots=INFERENCE_WORKER_SLOTS or None,
+        slot_bytes=INFERENCE_SLOT_KB * 1024,
+        worker_init=lambda worker_id: init_inference_worker(worker_id, set(tasks))
+    )
+    worker_pool.start(on_ready=on_workers_ready)
+
+def decode_rgb(image_data):
+    """Decode a JPEG frame to an RGB array"""
+    return np.array(load_image(image_data))
+
+def locate_face(face_tracker, image_data):
+    """Decode a driver frame and find the face, returning (RGB array, face box or None)"""
+    rgb_array = decode_rgb(image_data)
+    return rgb_array, face_tracker.locate(rgb_array)
+
+def detect_drowsiness(image_data, face_tracker=None, located_face=None):
+    """Run the drowsiness model in a worker process if the pool is enabled, otherwise in-process
+    
+    With a face tracker the model only sees the face region. ``located_face`` is
+    the (RGB array, face box) pair when the caller already ran locate_face().
+    """
+    face_region = rgb_array = None
+    if face_tracker is not None:
+        # The tracker keeps per-stream state, so the face is found here and workers only get the crop region
+        rgb_array, box = located_face or offload.run(locate_face, face_tracker, image_data)
+        if box is None:
+            # Nothing to classify, skip the model entirely
+            return no_face_result()
+        face_region = face_tracker.crop_region(box, rgb_array.shape)
+    
+    if worker_pool is not None:
+        try:
+            return scheduler.run('drowsiness', worker_pool.submit, 'drowsiness', image_data, face_region=face_region)
+        except Exception as e:
+            logger.error(f"Error in drowsiness worker: {e}")
+            return None
+    return detector.detect(image_data, face_region, rgb_array)
+
+def detect_traffic(image_data, annotate=False):
+    """Run traffic sign detection in a worker process if the pool is enabled, otherwise in-process
+    
+    Returns the detect_frame() result, or None when the frame was skipped or failed.
+    """
+    # Under contention with drowsiness jobs, run at a lower rate and input size, or not at all
+    imgsz = traffic_degradation.admit()
+    if imgsz is None:
+        return None
+    
+    cache_key = None
+    if traffic_cache is not None:
+        cache_key = (traffic_cache.key(image_data), imgsz, annotate)
+        cached_result = traffic_cache.get(cache_key)
+        if cached_result is not None:
+            return cached_result
+    
+    if worker_pool is not None:
+        try:
+            result = scheduler.run('traffic', worker_pool.submit, 'traffic', image_data, imgsz=imgsz, annotate=annotate)
+        except Exception as e:
+            logger.error(f"Error in traffic worker: {e}")
+            return None
+    else:
+        # YOLO isn't safe to call from several threads, so one frame runs at a time
+        with traffic_inference_lock:
+            result = scheduler.run('traffic', offload.run, traffic_detector.detect_frame, image_data, imgsz, annotate)
+    if cache_key is not None and result is not None:
+        traffic_cache.put(cache_key, result)
+    return result
+
+def http_app(environ, start_response):
+    """Socket.IO app plus the /ready and /status HTTP endpoints"""
+    if environ['PATH_INFO'] in ('/ready', '/status'):
+        return model_readiness.wsgi_endpoint(environ, start_response)
+    return app(environ, start_response)
+
+face_detector = None
+if DROWSY_FACE_ROI or DROWSY_CASCADE:
+    try:
+        face_detector = FaceDetector(method=DROWSY_FACE_DETECTOR)
+    except Exception as e:
+        logger.error(f"Face detector unavailable, classifying whole frames: {e}")
+
+landmark_model = None
+if DROWSY_CASCADE and face_detector is not None:
+    try:
+        landmark_model = EyeLandmarkModel()
+    except Exception as e:
+        logger.error(f"Landmark model unavailable, running the full model on every frame: {e}")
+
+# Per-stream state of the connected cameras, keyed by stream id
+driver_stream_counter = itertools.count(1)
+frontcam_stream_counter = itertools.count(1)
+face_trackers = {}
+frame_gates = {}
+samplers = {}
+mailboxes = {}
+cascades = {}
+
+# Socket.IO rooms for front camera viewers: raw frames plus detection metadata,
+# or annotated JPEGs for legacy viewers that opted in
+FRONTCAM_RAW_ROOM = 'frontcam_raw'
+FRONTCAM_ANNOTATED_ROOM = 'frontcam_annotated'
+annotated_viewers = set()
+
+def set_frontcam_annotated(sid, enabled):
+    """Move a viewer between the raw and the annotated front camera rooms"""
+    if enabled:
+        annotated_viewers.add(sid)
+        sio.leave_room(sid, FRONTCAM_RAW_ROOM)
+        sio.enter_room(sid, FRONTCAM_ANNOTATED_ROOM)
+    else:
+        annotated_viewers.discard(sid)
+        sio.leave_room(sid, FRONTCAM_ANNOTATED_ROOM)
+        sio.enter_room(sid, FRONTCAM_RAW_ROOM)
+
+def latest_frontcam_image(sid):
+    """The newest front camera frame in the form this viewer receives"""
+    if FRONTCAM_METADATA and sid in annotated_viewers:
+        return last_annotated_esp32_image or last_esp32_image
+    return last_esp32_image
+
+def frontcam_detections_event(stream_id, seq, result, reused=False):
+    """Companion event for raw frame ``seq``: detections with boxes normalized to the frame size"""
+    return {
+        "stream_id": stream_id,
+        "seq": seq,
+        "timestamp": time.time(),
+        "width": result["width"],
+        "height": result["height"],
+        "imgsz": result["imgsz"],
+        "reused": reused,
+        "detections": result["detections"],
+    }
+
+def create_mailbox(stream_id):
+    """Create and register the latest-frame-wins mailbox between a stream's reader and its inference loop"""
+    mailbox = LatestFrameMailbox(max_age_ms=FRAME_MAX_AGE_MS)
+    mailboxes[stream_id] = mailbox
+    return mailbox
+
+def create_frame_gate(stream_id):
+    """Create and register the frame-change gate for a camera stream, if enabled"""
+    if not FRAME_GATE_ENABLED:
+        return None
+    gate = FrameChangeGate(
+        diff_threshold=FRAME_GATE_DIFF_THRESHOLD,
+        brightness_threshold=FRAME_GATE_BRIGHTNESS_THRESHOLD,
+        dark_threshold=FRAME_GATE_DARK_THRESHOLD,
+        max_skip_seconds=FRAME_GATE_MAX_SKIP_SECONDS,
+        # The thumbnail decode is CPU work, keep it off the hub
+        executor=offload.run
+    )
+    frame_gates[stream_id] = gate
+    return gate
 
 # Initialize MQTT client
 def setup_mqtt():
@@ -316,6 +783,51 @@ def setup_mqtt():
 # Initialize MQTT client
 mqtt_client = setup_mqtt()
 
+def detect_driver_frame(message, face_tracker=None, frame_gate=None, sampler=None, previous_result=None,
+                        cascade=None):
+    """Run one driver frame through adaptive sampling, the result cache, the change gate, the cascade and the detector"""
+    if sampler is not None and not sampler.should_infer() and previous_result is not None:
+        # Between samples the latest result still describes the driver
+        return dict(previous_result, timestamp=time.time())
+    
+    # A byte-identical frame skips the gate's thumbnail, the decode and the face search too
+    cache_key = None
+    if drowsiness_cache is not None:
+        cache_key = drowsiness_cache.key(message)
+        cached_result = drowsiness_cache.get(cache_key)
+        if cached_result is not None:
+            drowsiness_result = dict(cached_result, timestamp=time.time())
+            if sampler is not None:
+                sampler.update(drowsiness_result)
+            return drowsiness_result
+    
+    def infer(data):
+        located_face = None
+        if face_tracker is not None:
+            # Decode and find the face once, for both the eye check and the face crop
+            located_face = offload.run(locate_face, face_tracker, data)
+        crop_tracker = face_tracker if DROWSY_FACE_ROI else None
+        classify = lambda: detect_drowsiness(data, crop_tracker, located_face)
+        if cascade is not None:
+            # Clear open-eye frames are decided without the full model
+            rgb_array, box = located_face
+            return cascade.process(rgb_array, box, classify)
+        return classify()
+    
+    if frame_gate is not None:
+        drowsiness_result = frame_gate.process(message, infer)
+        if drowsiness_result and frame_gate.reused:
+            # Same result as before, but it describes the current frame
+            return dict(drowsiness_result, timestamp=time.time())
+    else:
+        drowsiness_result = infer(message)
+    
+    if cache_key is not None and drowsiness_result is not None:
+        drowsiness_cache.put(cache_key, drowsiness_result)
+    if sampler is not None:
+        sampler.update(drowsiness_result)
+    return drowsiness_result
+
 # Socket.IO event handlers
 @sio.event
 def connect(sid, environ, auth=None):
@@ -323,10 +835,21 @@ def connect(sid, environ, auth=None):
     clients_connected += 1
     logger.info(f"Socket.IO client connected: {sid}")
     
+    # Legacy viewers can opt in to annotated front camera JPEGs with ?annotated=1
+    if FRONTCAM_METADATA:
+        query = parse_qs(environ.get('QUERY_STRING', ''))
+        set_frontcam_annotated(sid, query.get('annotated', ['0'])[0].lower() in ('1', 'true', 'yes', 'on'))
+    
+    # Let the new client know which models are ready
+    try:
+        sio.emit('model_status', model_readiness.snapshot(), room=sid)
+    except Exception as e:
+        logger.error(f"Error sending model status to new client: {e}")
+    
     # Send last known images to newly connected client if available
     try:
-        if last_esp32_image:
-            sio.emit('frontcam', last_esp32_image, room=sid)
+        if latest_frontcam_image(sid):
+            sio.emit('frontcam', latest_frontcam_image(sid), room=sid)
         if last_driver_image:
             sio.emit('drivercam', last_driver_image, room=sid)
     except Exception as e:
@@ -370,9 +893,10 @@ def drivercam(sid, data=None):
 def frontcam(sid):
     try:
         logger.info(f"Client {sid} requested front camera image")
-        if last_esp32_image:
-            sio.emit('frontcam', last_esp32_image, room=sid)
-            logger.info(f"Sent front camera image to client {sid}: {len(last_esp32_image)} bytes")
+        image = latest_frontcam_image(sid)
+        if image:
+            sio.emit('frontcam', image, room=sid)
+            logger.info(f"Sent front camera image to client {sid}: {len(image)} bytes")
             return {"status": "success", "message": "Front camera image sent"}
         else:
             logger.info("No front camera image available to send")
@@ -381,17 +905,99 @@ def frontcam(sid):
         logger.error(f"Error sending front camera image to client {sid}: {e}")
         return {"status": "error", "message": str(e)}
 
+@sio.event
+def frontcam_annotated(sid, enabled=True):
+    """Opt a legacy viewer in to (or out of) front camera JPEGs with the boxes drawn in"""
+    if FRONTCAM_METADATA:
+        set_frontcam_annotated(sid, bool(enabled))
+    return {"status": "success", "annotated": not FRONTCAM_METADATA or sid in annotated_viewers}
+
+@sio.event
+def model_status(sid):
+    """Return the loading state of each model to the requesting client"""
+    return model_readiness.snapshot()
+
+@sio.event
+def inference_stats(sid):
+    """Return inference tuning statistics to the requesting client"""
+    stats = {}
+    if detector.batcher is not None:
+        stats["drowsiness_batching"] = detector.batcher.stats()
+    if frame_gates:
+        stats["frame_gate"] = {stream_id: gate.stats() for stream_id, gate in frame_gates.items()}
+    if drowsiness_cache is not None:
+        stats["drowsiness_cache"] = drowsiness_cache.stats()
+    if traffic_cache is not None:
+        stats["traffic_cache"] = traffic_cache.stats()
+    if samplers:
+        stats["drowsiness_sampling"] = {stream_id: sampler.stats() for stream_id, sampler in samplers.items()}
+    if cascades:
+        stats["drowsiness_cascade"] = {stream_id: cascade.stats() for stream_id, cascade in cascades.items()}
+    stats["frontcam"] = {"metadata": FRONTCAM_METADATA, "annotated_viewers": len(annotated_viewers)}
+    stats["scheduler"] = scheduler.stats()
+    stats["traffic_degradation"] = traffic_degradation.stats()
+    stats["offload"] = offload.stats()
+    stats["hub_lag"] = hub_lag.stats()
+    if worker_pool is not None:
+        stats["inference_workers"] = worker_pool.stats()
+    if mailboxes:
+        stats["frame_mailbox"] = {stream_id: mailbox.stats() for stream_id, mailbox in mailboxes.items()}
+    if face_trackers:
+        stats["face_roi"] = {stream_id: tracker.stats() for stream_id, tracker in face_trackers.items()}
+    return stats
+
 @sio.event
 def disconnect(sid):
     global clients_connected
     clients_connected -= 1
+    annotated_viewers.discard(sid)
     logger.info(f"Socket.IO client disconnected: {sid}")
 
 # WebSocket handlers for different camera endpoints
 @websocket.WebSocketWSGI
 def esp32_camera_handler(ws):
     global last_esp32_image
-    logger.info("New ESP32 camera WebSocket connection established")
+    stream_id = f"frontcam-{next(frontcam_stream_counter)}"
+    logger.info(f"New ESP32 camera WebSocket connection established ({stream_id})")
+    frame_gate = create_frame_gate(stream_id)
+    mailbox = create_mailbox(stream_id)
+    frame_sequence = itertools.count(1)
+    
+    def emit_annotated(image):
+        """Send a frame to the viewers that get annotated JPEGs"""
+        global last_esp32_image, last_annotated_esp32_image
+        if FRONTCAM_METADATA:
+            last_annotated_esp32_image = image
+            sio.emit('frontcam', image, room=FRONTCAM_ANNOTATED_ROOM)
+        else:
+            last_esp32_image = image
+            sio.emit('frontcam', image)
+    
+    def process_frames():
+        """Detect objects in the newest frame whenever inference is free and send the results to viewers"""
+        while True:
+            frame, age = mailbox.get()
+            if frame is None:
+                break
+            seq, message = frame
+            # Boxes are only drawn while someone still wants annotated JPEGs
+            annotate = not FRONTCAM_METADATA or bool(annotated_viewers)
+            try:
+                if frame_gate is not None:
+                    # Reuse the previous detections when the scene hasn't changed
+                    result = frame_gate.process(message, lambda data: detect_traffic(data, annotate))
+                else:
+                    result = detect_traffic(message, annotate)
+                if FRONTCAM_METADATA and result is not None:
+                    reused = frame_gate is not None and frame_gate.reused
+                    sio.emit('frontcam_detections', frontcam_detections_event(stream_id, seq, result, reused))
+                if annotate:
+                    # Skipped or failed frames go out as they are
+                    emit_annotated((result or {}).get("image") or message)
+            except Exception as e:
+                logger.error(f"Error processing ESP32 camera frame: {e}")
+    
+    inference_thread = eventlet.spawn(process_frames)
     
     # If we already have an image, send it to the new client immediately
     if last_esp32_image:
@@ -410,28 +1016,97 @@ def esp32_camera_handler(ws):
             
             # Log message size
             logger.info(f"Received image from ESP32 camera: {len(message)} bytes")
+            seq = next(frame_sequence)
             
-            # Process image with YOLOv8 - Detect objects and draw bounding boxes
-            # Only if the model is available
-            if traffic_detector.model is not None:
-                processed_image = traffic_detector.detect_and_draw(message)
-                last_esp32_image = processed_image
-            else:
-                # Skip detection if model isn't loaded
-                logger.warning("Skipping traffic detection (model not available)")
+            if FRONTCAM_METADATA:
+                # Viewers get the camera bytes untouched; 'frontcam_frame' tells them the sequence
+                # number that the matching 'frontcam_detections' event will carry
                 last_esp32_image = message
+                sio.emit('frontcam_frame', {"stream_id": stream_id, "seq": seq, "timestamp": time.time()},
+                         room=FRONTCAM_RAW_ROOM)
+                sio.emit('frontcam', message, room=FRONTCAM_RAW_ROOM)
             
-            # Forward processed or original image data to all Socket.IO clients
-            sio.emit('frontcam', last_esp32_image)
+            # Process image with YOLOv8 - Detect objects
+            # Only if the model is available
+            if traffic_detector.ready:
+                # The inference loop handles the newest frame, older ones are replaced
+                mailbox.put((seq, message))
+            else:
+                # Forward frames untouched until the model is loaded and warmed up
+                logger.warning("Skipping traffic detection (model not ready)")
+                if not FRONTCAM_METADATA or annotated_viewers:
+                    emit_annotated(message)
     except Exception as e:
         logger.error(f"ESP32 camera WebSocket error: {e}")
     finally:
-        logger.info("ESP32 camera WebSocket connection closed")
+        mailbox.close()
+        inference_thread.wait()
+        mailboxes.pop(stream_id, None)
+        frame_gates.pop(stream_id, None)
+        logger.info(f"ESP32 camera WebSocket connection closed ({stream_id})")
 
 @websocket.WebSocketWSGI
 def driver_camera_handler(ws):
     global last_driver_image
-    logger.info("New driver camera WebSocket connection established")
+    stream_id = f"driver-{next(driver_stream_counter)}"
+    logger.info(f"New driver camera WebSocket connection established ({stream_id})")
+    
+    # Shared by the face crop and the cascade's eye check
+    face_tracker = None
+    if face_detector is not None:
+        face_tracker = FaceRegionTracker(face_detector, padding=DROWSY_FACE_PADDING,
+                                         redetect_interval=DROWSY_FACE_REDETECT_INTERVAL)
+        face_trackers[stream_id] = face_tracker
+    frame_gate = create_frame_gate(stream_id)
+    
+    sampler = None
+    if DROWSY_ADAPTIVE_SAMPLING:
+        sampler = AdaptiveSampler(calm_rate_hz=DROWSY_CALM_RATE_HZ, watch_rate_hz=DROWSY_WATCH_RATE_HZ)
+        samplers[stream_id] = sampler
+    
+    cascade = None
+    if landmark_model is not None:
+        cascade = EyeStateCascade(
+            landmark_model,
+            closed_ear=DROWSY_CASCADE_CLOSED_EAR,
+            open_ear=DROWSY_CASCADE_OPEN_EAR,
+            perclos_window_s=DROWSY_CASCADE_PERCLOS_WINDOW,
+            max_fast_perclos=DROWSY_CASCADE_MAX_PERCLOS,
+            audit_interval=DROWSY_CASCADE_AUDIT_INTERVAL,
+            executor=offload.run
+        )
+        cascades[stream_id] = cascade
+    mailbox = create_mailbox(stream_id)
+    
+    def process_frames():
+        """Run drowsiness detection on the newest frame whenever inference is free"""
+        drowsiness_result = None
+        while True:
+            message, age = mailbox.get()
+            if message is None:
+                break
+            try:
+                drowsiness_result = detect_driver_frame(message, face_tracker, frame_gate, sampler,
+                                                        previous_result=drowsiness_result, cascade=cascade)
+            except Exception as e:
+                logger.error(f"Error processing driver camera frame: {e}")
+                continue
+            
+            # Send drowsiness result via Socket.IO for the Flutter app
+            if drowsiness_result:
+                try:
+                    sio.emit('drowsy', drowsiness_result)
+                    if drowsiness_result['probability'] is None:
+                        # Decided by the cascade's eye check, not the model
+                        confidence = f"EAR {drowsiness_result['ear_score']:.3f}"
+                    else:
+                        confidence = f"{drowsiness_result['probability'] * 100:.2f}%"
+                    logger.info(f"Emitted drowsiness result via Socket.IO: {drowsiness_result['result']} ({confidence}, frame age {age * 1000:.0f} ms)")
+                except Exception as e:
+                    logger.error(f"Error emitting drowsiness result via Socket.IO: {e}")
+    
+    inference_thread = eventlet.spawn(process_frames)
+    
     try:
         while True:
             # Receive binary data from driver camera WebSocket client
@@ -445,23 +1120,23 @@ def driver_camera_handler(ws):
             # Store the image for new clients
             last_driver_image = message
             
-            # Process image for drowsiness detection
-            drowsiness_result = detector.detect(message)
+            # Hand the frame to the inference loop once the model is ready, replacing an unprocessed one
+            if detector.ready:
+                mailbox.put(message)
             
-            # Send drowsiness result via Socket.IO for the Flutter app
-            if drowsiness_result:
-                try:
-                    sio.emit('drowsy', drowsiness_result)
-                    logger.info(f"Emitted drowsiness result via Socket.IO: {drowsiness_result['result']} ({drowsiness_result['probability'] * 100:.2f}%)")
-                except Exception as e:
-                    logger.error(f"Error emitting drowsiness result via Socket.IO: {e}")
-            
-            # Forward binary image data to all Socket.IO clients
+            # Forward binary image data to all Socket.IO clients right away
             sio.emit('drivercam', message)
     except Exception as e:
         logger.error(f"Driver camera WebSocket error: {e}")
     finally:
-        logger.info("Driver camera WebSocket connection closed")
+        mailbox.close()
+        inference_thread.wait()
+        mailboxes.pop(stream_id, None)
+        face_trackers.pop(stream_id, None)
+        frame_gates.pop(stream_id, None)
+        samplers.pop(stream_id, None)
+        cascades.pop(stream_id, None)
+        logger.info(f"Driver camera WebSocket connection closed ({stream_id})")
 
 def get_websocket_handler_by_path(path):
     # Parse path to get the correct handler
@@ -514,7 +1189,7 @@ if __name__ == '__main__':
             handler = get_websocket_handler_by_path(path)
             if handler:
                 return handler(environ, start_response)
-        return app(environ, start_response)
+        return http_app(environ, start_response)
     
     logger.info(f"Starting Socket.IO server on port {socketio_port}")
     logger.info(f"Starting WebSocket server on port {websocket_port}")
@@ -527,7 +1202,7 @@ if __name__ == '__main__':
         # Start Socket.IO server
         try:
             socketio_server = eventlet.listen(('', socketio_port))
-            eventlet.spawn(eventlet.wsgi.server, socketio_server, app)
+            eventlet.spawn(eventlet.wsgi.server, socketio_server, http_app)
             logger.info(f"Socket.IO server started successfully on port {socketio_port}")
         except OSError as e:
             logger.error(f"Failed to start Socket.IO server on port {socketio_port}: {e}")
@@ -535,12 +1210,21 @@ if __name__ == '__main__':
             socketio_port = 4002  # Try an alternate port
             try:
                 socketio_server = eventlet.listen(('', socketio_port))
-                eventlet.spawn(eventlet.wsgi.server, socketio_server, app)
+                eventlet.spawn(eventlet.wsgi.server, socketio_server, http_app)
                 logger.info(f"Socket.IO server started successfully on alternate port {socketio_port}")
             except OSError as e:
                 logger.error(f"Failed to start Socket.IO server on alternate port {socketio_port}: {e}")
                 raise
         
+        hub_lag.start()
+        
+        if INFERENCE_WORKERS > 0:
+            # The workers load the models themselves, this process never starts a runtime thread pool
+            start_inference_workers(INFERENCE_WORKERS)
+        else:
+            # Load models in the background; they start once the WebSocket port below is bound
+            load_models_in_background()
+        
         # Start WebSocket server
         try:
             websocket_server = eventlet.listen(('', websocket_port))
@@ -556,6 +1240,10 @@ if __name__ == '__main__':
                 logger.error(f"Failed to start WebSocket server on alternate port {websocket_port}: {e}")
                 raise
     finally:
+        # Stop the inference workers and free the frame ring
+        if worker_pool is not None:
+            worker_pool.close()
+        
         # Disconnect MQTT client when the program exits
         if mqtt_client:
             mqtt_client.loop_stop()
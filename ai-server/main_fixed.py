@@ -9,6 +9,7 @@ import json
 import time
 from PIL import Image
 import paho.mqtt.client as mqtt
+from inference_backends import KerasBackend
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -17,7 +18,6 @@ logger = logging.getLogger(__name__)
 # Import TensorFlow and Keras
 try:
     import tensorflow as tf
-    from tensorflow.keras.models import load_model
     logger.info("TensorFlow imported successfully")
 except ImportError:
     logger.error("TensorFlow import failed - please install tensorflow")
@@ -58,7 +58,9 @@ class DrowsinessDetector:
         for model_path in model_paths_to_try:
             if os.path.exists(model_path):
                 try:
-                    self.model = load_model(model_path)
+                    # Called through a traced tf.function instead of model.predict
+                    self.model = KerasBackend(model_path)
+                    self.model.load()
                     logger.info(f"Keras model loaded successfully from {model_path}")
                     return True
                 except Exception as e:
@@ -90,7 +92,7 @@ class DrowsinessDetector:
             image_array = np.expand_dims(image_array, axis=0)
             
             # Make prediction with TensorFlow/Keras
-            predictions = self.model.predict(image_array, verbose=0)  # Set verbose=0 to reduce console output
+            predictions = self.model.predict(image_array)
             
             # Get class with highest probability
             class_index = np.argmax(predictions[0])
@@ -0,0 +1,93 @@
+import time
+import logging
+from collections import deque
+
+import eventlet
+from eventlet import tpool
+
+logger = logging.getLogger(__name__)
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+class BlockingOffload:
+    """Run CPU-bound calls (decode, model inference, drawing) in eventlet's native thread pool
+
+    ``run()`` parks only the calling greenlet while the call executes on a real
+    OS thread, so other camera sockets, Socket.IO viewers and MQTT keepalives
+    keep being served. Model runtimes release the GIL inside their kernels, so
+    the hub stays responsive while inference is saturated. Calls made through
+    ``run()`` must not touch green primitives (eventlet queues, events, sockets).
+    The pool size is set with the ``EVENTLET_THREADPOOL_SIZE`` environment variable.
+    """
+
+    def __init__(self, enabled=True, stats_window=200):
+        self.enabled = enabled
+        self._durations = deque(maxlen=stats_window)
+        self._in_flight = 0
+        self._total_calls = 0
+
+    def run(self, fn, *args, **kwargs):
+        if not self.enabled:
+            return fn(*args, **kwargs)
+
+        started = time.time()
+        self._in_flight += 1
+        try:
+            return tpool.execute(fn, *args, **kwargs)
+        finally:
+            self._in_flight -= 1
+            self._total_calls += 1
+            self._durations.append(time.time() - started)
+
+    def stats(self):
+        durations = list(self._durations)
+        return {
+            "enabled": self.enabled,
+            "in_flight": self._in_flight,
+            "total_calls": self._total_calls,
+            "avg_call_ms": sum(durations) / len(durations) * 1000.0 if durations else 0.0,
+            "p95_call_ms": percentile(durations, 0.95) * 1000.0,
+        }
+
+class HubLagMonitor:
+    """Measure how late the eventlet hub wakes a greenlet that sleeps at a fixed interval
+
+    Lag close to zero means no blocking call is holding the hub; a viewer or
+    camera socket waits roughly this long before it is served.
+    """
+
+    def __init__(self, interval=0.05, stats_window=400):
+        self.interval = interval
+        self._lags = deque(maxlen=stats_window)
+        self._worker = None
+
+    def start(self):
+        if self._worker is None:
+            self._worker = eventlet.spawn(self._run)
+
+    def stop(self):
+        if self._worker is not None:
+            self._worker.kill()
+            self._worker = None
+
+    def _run(self):
+        while True:
+            started = time.perf_counter()
+            eventlet.sleep(self.interval)
+            self._lags.append(max(0.0, time.perf_counter() - started - self.interval))
+
+    def reset(self):
+        self._lags.clear()
+
+    def stats(self):
+        lags = list(self._lags)
+        return {
+            "samples": len(lags),
+            "avg_lag_ms": sum(lags) / len(lags) * 1000.0 if lags else 0.0,
+            "p95_lag_ms": percentile(lags, 0.95) * 1000.0,
+            "max_lag_ms": max(lags) * 1000.0 if lags else 0.0,
+        }
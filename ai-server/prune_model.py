@@ -0,0 +1,166 @@
+# This script prunes channels from the DenseNet201 drowsiness model's head and last dense blocks,
+# fine-tunes the smaller model briefly and compares it with the original
+# Run this with Python 3.10 or 3.11 which supports TensorFlow
+# pip install tensorflow==2.12.0 tf2onnx onnxruntime
+
+import os
+import sys
+import time
+import argparse
+import numpy as np
+from tensorflow import keras
+from tensorflow.keras.layers import BatchNormalization, Conv2D, Dense
+from convert_model import convert_keras_to_onnx
+from distill_student import create_batches, evaluate_accuracy, measure_onnx_latency
+
+def keep_indices(scores, keep_ratio):
+    """Indices of the highest-scoring channels, in their original order"""
+    keep = max(1, int(round(len(scores) * keep_ratio)))
+    return np.sort(np.argsort(scores)[-keep:])
+
+def dense_block_count(model, stage='conv5'):
+    count = 0
+    while any(layer.name == f"{stage}_block{count + 1}_1_conv" for layer in model.layers):
+        count += 1
+    return count
+
+def prune_plan(model, head_keep, blocks, block_keep):
+    """Return (kept output channels per pruned layer, pruned producer of each consumer layer)
+
+    Head Dense layers are ranked by the L1 norm of their incoming weights. In
+    the last ``blocks`` conv5 dense blocks the 1x1 bottleneck convolution is
+    pruned; its filters are ranked by L1 norm times the scale of the batch
+    norm that follows, so channels the batch norm shrinks rank low. Block
+    outputs feed the concatenations and are left untouched.
+    """
+    kept = {}
+    consumers = {}
+
+    total_blocks = dense_block_count(model)
+    for block in range(total_blocks - blocks + 1, total_blocks + 1):
+        conv = model.get_layer(f"conv5_block{block}_1_conv")
+        bn = model.get_layer(f"conv5_block{block}_1_bn")
+        gamma, _, _, variance = bn.get_weights()
+        scores = np.abs(conv.get_weights()[0]).sum(axis=(0, 1, 2)) * np.abs(gamma) / np.sqrt(variance + bn.epsilon)
+        kept[conv.name] = keep_indices(scores, block_keep)
+        # The batch norm is pruned channel for channel, the 3x3 conv loses input channels
+        consumers[bn.name] = conv.name
+        consumers[f"conv5_block{block}_2_conv"] = conv.name
+
+    # Every head Dense layer except the 2-class output
+    dense_layers = [layer for layer in model.layers if isinstance(layer, Dense)]
+    for layer, next_layer in zip(dense_layers[:-1], dense_layers[1:]):
+        kept[layer.name] = keep_indices(np.abs(layer.get_weights()[0]).sum(axis=0), head_keep)
+        consumers[next_layer.name] = layer.name
+    return kept, consumers
+
+def build_pruned_model(model, kept, consumers):
+    """Clone the model with fewer channels in the pruned layers and copy the remaining weights"""
+    def clone_layer(layer):
+        config = layer.get_config()
+        if layer.name in kept:
+            config['filters' if isinstance(layer, Conv2D) else 'units'] = len(kept[layer.name])
+        return layer.__class__.from_config(config)
+
+    pruned = keras.models.clone_model(model, clone_function=clone_layer)
+    for layer in model.layers:
+        weights = layer.get_weights()
+        if not weights:
+            continue
+        producer = consumers.get(layer.name)
+        if isinstance(layer, BatchNormalization):
+            if producer is not None:
+                weights = [weight[kept[producer]] for weight in weights]
+        else:
+            # Kernels are (..., input channels, output channels)
+            if producer is not None:
+                weights[0] = np.take(weights[0], kept[producer], axis=-2)
+            if layer.name in kept:
+                weights[0] = np.take(weights[0], kept[layer.name], axis=-1)
+                weights[1:] = [weight[kept[layer.name]] for weight in weights[1:]]
+        pruned.get_layer(layer.name).set_weights(weights)
+    return pruned
+
+def fine_tune(model, kept, train_batches, val_batches, args):
+    """Let the pruned blocks and the head recover, everything else stays frozen"""
+    pruned_blocks = tuple(name.rsplit('_', 2)[0] + '_' for name in kept if name.startswith('conv5_'))
+    for layer in model.layers:
+        if layer.name.startswith(pruned_blocks):
+            layer.trainable = True
+    model.compile(optimizer=keras.optimizers.Adam(learning_rate=args.learning_rate),
+                  loss='sparse_categorical_crossentropy', metrics=['accuracy'])
+
+    start_time = time.time()
+    model.fit(
+        train_batches,
+        epochs=args.epochs,
+        validation_data=val_batches,
+        callbacks=[keras.callbacks.EarlyStopping(monitor='val_loss', patience=2, restore_best_weights=True)]
+    )
+    print(f"Fine-tuning time: {time.time() - start_time:.2f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Channel-prune the DenseNet201 drowsiness model and fine-tune it")
+    parser.add_argument("data_dir", help="DDD split folder with train/val/test subfolders (e.g. Dataset2)")
+    parser.add_argument("--model", default="models/densenet201.keras", help="Path to the trained Keras model")
+    parser.add_argument("--model-onnx", default="models/densenet201.onnx",
+                        help="ONNX export of the model for the comparison (converted if missing)")
+    parser.add_argument("--output", default="models/densenet201_pruned.keras", help="Path for the pruned Keras model")
+    parser.add_argument("--head-keep", type=float, default=0.25, help="Fraction of head Dense units to keep")
+    parser.add_argument("--blocks", type=int, default=16, help="Number of last conv5 dense blocks to prune")
+    parser.add_argument("--block-keep", type=float, default=0.5, help="Fraction of bottleneck channels to keep")
+    parser.add_argument("--epochs", type=int, default=3, help="Fine-tuning epochs")
+    parser.add_argument("--batch-size", type=int, default=32, help="Training batch size")
+    parser.add_argument("--learning-rate", type=float, default=0.0001, help="Adam learning rate")
+    parser.add_argument("--latency-runs", type=int, default=50, help="ONNX Runtime calls per model")
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model):
+        print(f"Error: model file {args.model} does not exist")
+        sys.exit(1)
+
+    print(f"Loading model from: {args.model}")
+    model = keras.models.load_model(args.model)
+    image_size = tuple(model.input_shape[1:3])
+    args.blocks = min(args.blocks, dense_block_count(model))
+
+    kept, consumers = prune_plan(model, args.head_keep, args.blocks, args.block_keep)
+    pruned = build_pruned_model(model, kept, consumers)
+    print(f"Pruned {len(kept)} layers: parameters {model.count_params():,} -> {pruned.count_params():,}")
+
+    train_batches, val_batches, test_batches = create_batches(args.data_dir, args.batch_size, image_size)
+    pruned_accuracy_before = evaluate_accuracy(pruned, test_batches)
+    fine_tune(pruned, kept, train_batches, val_batches, args)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    pruned.save(args.output)
+    print(f"Pruned model saved to {args.output}")
+
+    onnx_output = os.path.splitext(args.output)[0] + '.onnx'
+    convert_keras_to_onnx(args.output, onnx_output)
+    if not os.path.exists(args.model_onnx):
+        convert_keras_to_onnx(args.model, args.model_onnx)
+
+    # Compare the pruned model with the original
+    baseline_accuracy = evaluate_accuracy(model, test_batches)
+    pruned_accuracy = evaluate_accuracy(pruned, test_batches)
+    baseline_latency = measure_onnx_latency(args.model_onnx, runs=args.latency_runs, image_size=image_size)
+    pruned_latency = measure_onnx_latency(onnx_output, runs=args.latency_runs, image_size=image_size)
+    baseline_size = os.path.getsize(args.model_onnx) / 1024 / 1024
+    pruned_size = os.path.getsize(onnx_output) / 1024 / 1024
+
+    print("=" * 60)
+    print(f"Head units kept: {args.head_keep:.0%}, bottleneck channels kept: {args.block_keep:.0%} "
+          f"in the last {args.blocks} conv5 blocks")
+    print(f"{'':20}{'Baseline':>14}{'Pruned':>14}{'Delta':>12}")
+    print(f"{'Parameters':20}{model.count_params():>14,}{pruned.count_params():>14,}"
+          f"{(pruned.count_params() / model.count_params() - 1) * 100:>+11.1f}%")
+    print(f"{'ONNX size (MB)':20}{baseline_size:>14.2f}{pruned_size:>14.2f}{pruned_size - baseline_size:>+12.2f}")
+    print(f"{'ONNX latency (ms)':20}{baseline_latency:>14.2f}{pruned_latency:>14.2f}{pruned_latency - baseline_latency:>+12.2f}")
+    print(f"{'Test accuracy':20}{baseline_accuracy * 100:>13.2f}%{pruned_accuracy * 100:>13.2f}%"
+          f"{(pruned_accuracy - baseline_accuracy) * 100:>+11.2f}%")
+    print(f"Accuracy before fine-tuning: {pruned_accuracy_before * 100:.2f}%")
+    print(f"Speedup: {baseline_latency / pruned_latency:.2f}x")
+    print("=" * 60)
+    print(f"Run the server with it: python main.py --backend onnx --model {onnx_output}")
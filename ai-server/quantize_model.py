@@ -0,0 +1,202 @@
+# This script quantizes the ONNX drowsiness model to a static INT8 QDQ model
+# Install required packages: pip install onnxruntime onnx Pillow numpy
+
+import os
+import sys
+import time
+import random
+import argparse
+import numpy as np
+import onnxruntime as ort
+from onnxruntime.quantization import (
+    CalibrationDataReader,
+    CalibrationMethod,
+    QuantFormat,
+    QuantType,
+    quantize_static,
+)
+from onnxruntime.quantization.shape_inference import quant_pre_process
+from drowsiness_processing import MODEL_INPUT_SIZE, preprocess_image
+
+# Class folders of the Driver Drowsiness Dataset (DDD) split and their labels
+DATASET_CLASSES = {'Drowsy': 0, 'Non Drowsy': 1}
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+def list_dataset_images(data_dir, limit=None, seed=1942):
+    """Return (path, label) pairs from a folder with Drowsy/Non Drowsy subfolders"""
+    samples = []
+    for class_name, label in DATASET_CLASSES.items():
+        class_dir = os.path.join(data_dir, class_name)
+        if not os.path.isdir(class_dir):
+            print(f"Warning: class folder {class_dir} does not exist")
+            continue
+        for file_name in sorted(os.listdir(class_dir)):
+            if file_name.lower().endswith(IMAGE_EXTENSIONS):
+                samples.append((os.path.join(class_dir, file_name), label))
+
+    # Mix both classes so a limit still covers Drowsy and Non Drowsy images
+    random.Random(seed).shuffle(samples)
+    if limit:
+        samples = samples[:limit]
+    return samples
+
+def session_input(session):
+    """Return (name, (width, height), dtype) of a session's image input"""
+    model_input = session.get_inputs()[0]
+    height, width = model_input.shape[1:3]
+    size = (width, height) if isinstance(height, int) and isinstance(width, int) else MODEL_INPUT_SIZE
+    dtype = np.uint8 if model_input.type == 'tensor(uint8)' else np.float32
+    return model_input.name, size, dtype
+
+class DrowsinessCalibrationReader(CalibrationDataReader):
+    """Feed preprocessed DDD images to the ORT calibrator in small batches"""
+
+    def __init__(self, samples, input_name, size=MODEL_INPUT_SIZE, dtype=np.float32, batch_size=8):
+        self.samples = samples
+        self.input_name = input_name
+        self.size = size
+        self.dtype = dtype
+        self.batch_size = batch_size
+        self.position = 0
+
+    def get_next(self):
+        if self.position >= len(self.samples):
+            return None
+        batch_samples = self.samples[self.position:self.position + self.batch_size]
+        self.position += self.batch_size
+        batch = np.stack([preprocess_image(path, size=self.size, dtype=self.dtype) for path, _ in batch_samples])
+        return {self.input_name: batch}
+
+    def rewind(self):
+        self.position = 0
+
+def quantize_model(fp32_model_path, int8_model_path, samples, per_channel=True, method='minmax'):
+    """Produce a static INT8 QDQ model calibrated on the given samples"""
+    # Shape inference and graph cleanup give the quantizer a better graph to work with
+    preprocessed_path = int8_model_path + '.preprocessed.onnx'
+    quant_pre_process(fp32_model_path, preprocessed_path)
+
+    # Calibration data must match the float source model's input size and dtype
+    session = ort.InferenceSession(preprocessed_path, providers=['CPUExecutionProvider'])
+    input_name, size, dtype = session_input(session)
+    del session
+
+    calibration_methods = {
+        'minmax': CalibrationMethod.MinMax,
+        'entropy': CalibrationMethod.Entropy,
+        'percentile': CalibrationMethod.Percentile,
+    }
+
+    print(f"Calibrating on {len(samples)} images with {method} calibration")
+    quantize_static(
+        preprocessed_path,
+        int8_model_path,
+        DrowsinessCalibrationReader(samples, input_name, size, dtype),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=per_channel,
+        calibrate_method=calibration_methods[method],
+    )
+    os.remove(preprocessed_path)
+    print(f"INT8 model saved to {int8_model_path}")
+
+def evaluate_model(model_path, samples):
+    """Return (accuracy, predicted class indices) of a model on labelled samples"""
+    if not samples:
+        return float('nan'), []
+    session = ort.InferenceSession(model_path, providers=['CPUExecutionProvider'])
+    input_name, size, dtype = session_input(session)
+    output_name = session.get_outputs()[0].name
+
+    predictions = []
+    correct = 0
+    for path, label in samples:
+        image_array = np.expand_dims(preprocess_image(path, size=size, dtype=dtype), axis=0)
+        class_index = int(np.argmax(session.run([output_name], {input_name: image_array})[0][0]))
+        predictions.append(class_index)
+        correct += int(class_index == label)
+    return correct / len(samples), predictions
+
+def measure_latency(model_path, runs=50, warmup=5):
+    """Return (mean, p95) single-frame latency in milliseconds"""
+    session = ort.InferenceSession(model_path, providers=['CPUExecutionProvider'])
+    input_name, (width, height), dtype = session_input(session)
+    output_name = session.get_outputs()[0].name
+    # uint8-input models take raw pixels
+    if dtype == np.uint8:
+        image_array = np.random.randint(0, 256, size=(1, height, width, 3), dtype=np.uint8)
+    else:
+        image_array = np.random.rand(1, height, width, 3).astype(np.float32)
+
+    for _ in range(warmup):
+        session.run([output_name], {input_name: image_array})
+
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        session.run([output_name], {input_name: image_array})
+        timings.append((time.perf_counter() - start) * 1000.0)
+    return float(np.mean(timings)), float(np.percentile(timings, 95))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Static INT8 quantization of the drowsiness ONNX model")
+    parser.add_argument("calibration_dir",
+                        help="Folder with 'Drowsy' and 'Non Drowsy' subfolders used for calibration")
+    parser.add_argument("--model", default="models/densenet201.onnx", help="Path to the FP32 ONNX model")
+    parser.add_argument("--output", default="models/densenet201.int8.onnx", help="Path for the INT8 ONNX model")
+    parser.add_argument("--eval-dir",
+                        help="Folder with 'Drowsy' and 'Non Drowsy' subfolders for accuracy (default: calibration_dir)")
+    parser.add_argument("--num-calibration", type=int, default=200,
+                        help="Number of images used for calibration")
+    parser.add_argument("--num-eval", type=int, default=500,
+                        help="Number of images used for the accuracy comparison")
+    parser.add_argument("--method", choices=['minmax', 'entropy', 'percentile'], default='minmax',
+                        help="Calibration method")
+    parser.add_argument("--per-tensor", action="store_true",
+                        help="Use per-tensor instead of per-channel weight quantization")
+    parser.add_argument("--runs", type=int, default=50, help="Number of timed runs for the latency comparison")
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model):
+        print(f"Error: ONNX model file {args.model} does not exist")
+        print("Convert the Keras model first: python convert_model.py models/densenet201.keras models/densenet201.onnx")
+        sys.exit(1)
+
+    calibration_samples = list_dataset_images(args.calibration_dir, args.num_calibration)
+    if not calibration_samples:
+        print(f"Error: no calibration images found in {args.calibration_dir}")
+        sys.exit(1)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    quantize_model(args.model, args.output, calibration_samples,
+                   per_channel=not args.per_tensor, method=args.method)
+
+    # Compare accuracy on held-out images when given, otherwise on the calibration folder
+    eval_samples = list_dataset_images(args.eval_dir or args.calibration_dir, args.num_eval, seed=7)
+    if not eval_samples:
+        print(f"Error: no evaluation images found in {args.eval_dir or args.calibration_dir}")
+        sys.exit(1)
+    fp32_accuracy, fp32_predictions = evaluate_model(args.model, eval_samples)
+    int8_accuracy, int8_predictions = evaluate_model(args.output, eval_samples)
+    agreement = np.mean(np.array(fp32_predictions) == np.array(int8_predictions))
+
+    fp32_mean, fp32_p95 = measure_latency(args.model, args.runs)
+    int8_mean, int8_p95 = measure_latency(args.output, args.runs)
+
+    fp32_size = os.path.getsize(args.model) / 1024 / 1024
+    int8_size = os.path.getsize(args.output) / 1024 / 1024
+
+    print("=" * 60)
+    print(f"Evaluated on {len(eval_samples)} images")
+    print(f"{'':12}{'FP32':>14}{'INT8':>14}{'Delta':>14}")
+    print(f"{'Accuracy':12}{fp32_accuracy * 100:>13.2f}%{int8_accuracy * 100:>13.2f}%"
+          f"{(int8_accuracy - fp32_accuracy) * 100:>+13.2f}%")
+    print(f"{'Mean (ms)':12}{fp32_mean:>14.2f}{int8_mean:>14.2f}{int8_mean - fp32_mean:>+14.2f}")
+    print(f"{'P95 (ms)':12}{fp32_p95:>14.2f}{int8_p95:>14.2f}{int8_p95 - fp32_p95:>+14.2f}")
+    print(f"{'Size (MB)':12}{fp32_size:>14.2f}{int8_size:>14.2f}{int8_size - fp32_size:>+14.2f}")
+    print(f"Prediction agreement: {agreement * 100:.2f}%")
+    print(f"Speedup: {fp32_mean / int8_mean:.2f}x")
+    print("=" * 60)
+    print(f"Run the server with it: python main.py --backend onnx --model {args.output}")
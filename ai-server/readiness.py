@@ -0,0 +1,55 @@
+import json
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Model lifecycle states
+LOADING = 'loading'
+WARMING_UP = 'warming_up'
+READY = 'ready'
+FAILED = 'failed'
+
+class ModelReadiness:
+    """Track the loading state of each model and notify a listener on every change"""
+
+    def __init__(self, model_names, on_change=None):
+        self.started_at = time.time()
+        self.on_change = on_change
+        self._models = {name: {"state": LOADING, "since": self.started_at} for name in model_names}
+
+    def set_state(self, name, state, error=None):
+        entry = {"state": state, "since": time.time()}
+        if error:
+            entry["error"] = str(error)
+        self._models[name] = entry
+        logger.info(f"Model {name}: {state}" + (f" ({error})" if error else ""))
+        if self.on_change is not None:
+            try:
+                self.on_change(self.snapshot())
+            except Exception as e:
+                logger.error(f"Error publishing model status: {e}")
+
+    def is_ready(self, name=None):
+        """True when the given model (or every model when no name is given) is ready"""
+        if name is not None:
+            return self._models[name]["state"] == READY
+        return all(entry["state"] == READY for entry in self._models.values())
+
+    def settled(self):
+        """True once no model is still loading or warming up"""
+        return all(entry["state"] in (READY, FAILED) for entry in self._models.values())
+
+    def snapshot(self):
+        return {
+            "ready": self.is_ready(),
+            "uptime": time.time() - self.started_at,
+            "models": {name: dict(entry) for name, entry in self._models.items()},
+        }
+
+    def wsgi_endpoint(self, environ, start_response):
+        """HTTP readiness probe: 200 when every model is ready, 503 otherwise"""
+        body = json.dumps(self.snapshot()).encode('utf-8')
+        status = '200 OK' if self.is_ready() else '503 Service Unavailable'
+        start_response(status, [('Content-Type', 'application/json'), ('Content-Length', str(len(body)))])
+        return [body]
@@ -0,0 +1,87 @@
+import sys
+import hashlib
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# xxhash is much faster on large frames, blake2b from the standard library is the fallback
+try:
+    import xxhash
+
+    def frame_hash(data):
+        """Fast 128-bit content hash of raw frame bytes"""
+        return xxhash.xxh3_128_digest(data)
+except ImportError:
+    def frame_hash(data):
+        """Fast 128-bit content hash of raw frame bytes"""
+        return hashlib.blake2b(data, digest_size=16).digest()
+
+# Rough per-entry bookkeeping cost (key, OrderedDict node) on top of the value itself
+ENTRY_OVERHEAD_BYTES = 200
+
+def estimate_size(value):
+    """Approximate memory held by a cached result dict or annotated image"""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in value.items())
+    return sys.getsizeof(value)
+
+class ResultCache:
+    """Bounded LRU cache of inference results keyed by a hash of the raw frame bytes
+
+    Entries are evicted least recently used first once the estimated memory of
+    all cached results exceeds ``max_bytes``.
+    """
+
+    def __init__(self, max_bytes, name="results"):
+        self.max_bytes = max_bytes
+        self.name = name
+        self._entries = OrderedDict()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, data):
+        return frame_hash(data)
+
+    def get(self, key):
+        """Return the cached result for a key, or None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, value):
+        """Store a result, evicting the least recently used entries to stay within budget"""
+        size = estimate_size(value) + ENTRY_OVERHEAD_BYTES
+        if size > self.max_bytes:
+            return
+
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.current_bytes -= previous[1]
+
+        self._entries[key] = (value, size)
+        self.current_bytes += size
+        while self.current_bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.current_bytes -= evicted_size
+            self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -1,13 +1,12 @@
 import os
-import io
 import time
 import json
 import logging
-import numpy as np
 from PIL import Image
 import paho.mqtt.client as mqtt
-import onnxruntime as ort
 import argparse
+from drowsiness_processing import PreprocessEngine, postprocess_prediction
+from inference_backends import BACKENDS, DEFAULT_MODEL_PATHS, get_backend_name, create_backend
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -25,13 +24,16 @@ MQTT_TOPIC_DROWSY = "/drowsy"
 ONNX_MODEL_PATH = 'models/densenet201.onnx'
 
 class DrowsinessDetector:
-    def __init__(self, model_path):
+    def __init__(self, model_path, backend_name='onnx'):
         self.model = None
         self.model_path = model_path
+        self.backend_name = backend_name
+        # Reusable input buffer for the one frame processed at a time
+        self.engine = PreprocessEngine()
         self.load_model()
         
     def load_model(self):
-        """Load ONNX model"""
+        """Load the model with the selected inference backend"""
         if not os.path.exists(self.model_path):
             logger.error(f"Model not found at {self.model_path}")
             logger.error("Please convert the Keras model to ONNX format first.")
@@ -39,11 +41,13 @@ class DrowsinessDetector:
             return False
             
         try:
-            self.model = ort.InferenceSession(self.model_path)
-            logger.info(f"ONNX model loaded successfully from {self.model_path}")
+            self.model = create_backend(self.backend_name, self.model_path)
+            # uint8-input models normalize in the graph, so the buffer holds raw pixels
+            self.engine = PreprocessEngine(size=self.model.input_size, dtype=self.model.input_dtype)
+            logger.info(f"{self.backend_name} model loaded successfully from {self.model_path}")
             return True
         except Exception as e:
-            logger.error(f"Error loading ONNX model: {e}")
+            logger.error(f"Error loading {self.backend_name} model: {e}")
             return False
     
     def detect_from_file(self, image_path):
@@ -63,38 +67,13 @@ class DrowsinessDetector:
             return None
         
         try:
-            # Resize image to required size
-            image_resized = image.resize((224, 224))
+            # Resize and normalize into the preallocated input buffer
+            self.engine.preprocess(image)
             
-            # Convert to numpy array and normalize
-            image_array = np.array(image_resized).astype(np.float32)
-            image_array = image_array / 255.0
+            # Make prediction with the selected backend
+            predictions = self.model.predict(self.engine.batch(1))
             
-            # Add batch dimension
-            image_array = np.expand_dims(image_array, axis=0)
-            
-            # Get input and output names
-            input_name = self.model.get_inputs()[0].name
-            output_name = self.model.get_outputs()[0].name
-            
-            # Make prediction with ONNX Runtime
-            predictions = self.model.run([output_name], {input_name: image_array})[0]
-            
-            # Get class with highest probability
-            class_index = np.argmax(predictions[0])
-            probability = float(predictions[0][class_index])
-            
-            # Determine result (0=Drowsy, 1=Non-Drowsy based on the model)
-            result = "Drowsy" if class_index == 0 else "Non-Drowsy"
-            
-            logger.info(f"Drowsiness detection result: {result} ({probability * 100:.2f}%)")
-            
-            return {
-                "result": result,
-                "class_index": int(class_index),
-                "probability": probability,
-                "timestamp": time.time()
-            }
+            return postprocess_prediction(predictions[0])
         except Exception as e:
             logger.error(f"Error in drowsiness detection: {e}")
             return None
@@ -216,9 +195,11 @@ def process_single_image(detector, image_path, mqtt_client=None):
     return result
 
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Drowsiness detection with ONNX Runtime")
-    parser.add_argument("--model", default=ONNX_MODEL_PATH, 
-                        help="Path to ONNX model file")
+    parser = argparse.ArgumentParser(description="Drowsiness detection with ONNX Runtime or Keras")
+    parser.add_argument("--backend", choices=list(BACKENDS),
+                        help="Inference backend (default: $DROWSY_BACKEND or onnx)")
+    parser.add_argument("--model", 
+                        help="Path to model file (default: models/densenet201.onnx for onnx, models/densenet201.keras for keras)")
     parser.add_argument("--image", help="Path to a single image to process")
     parser.add_argument("--dir", help="Path to directory with images to process")
     parser.add_argument("--interval", type=float, default=1.0,
@@ -227,6 +208,9 @@ if __name__ == "__main__":
                         help="Enable MQTT publishing of results")
     
     args = parser.parse_args()
+    backend_name = get_backend_name(args.backend, default='onnx')
+    if not args.model:
+        args.model = DEFAULT_MODEL_PATHS[backend_name]
     
     # Check if model file exists
     if not os.path.exists(args.model):
@@ -236,7 +220,7 @@ if __name__ == "__main__":
         exit(1)
     
     # Initialize detector
-    detector = DrowsinessDetector(args.model)
+    detector = DrowsinessDetector(args.model, backend_name)
     
     # Set up MQTT if enabled
     mqtt_client = None
@@ -0,0 +1,130 @@
+# This script fine-tunes the DenseNet201 drowsiness model at smaller input sizes and compares
+# test accuracy against ONNX CPU latency, to pick the production input resolution
+# Run this with Python 3.10 or 3.11 which supports TensorFlow
+# pip install tensorflow==2.12.0 tf2onnx onnxruntime
+
+import os
+import sys
+import time
+import argparse
+from tensorflow import keras
+from tensorflow.keras.applications import DenseNet201
+from tensorflow.keras.layers import Dense, Dropout, GlobalAveragePooling2D
+from convert_model import convert_keras_to_onnx
+from distill_student import create_batches, evaluate_accuracy, measure_onnx_latency
+
+def create_densenet(size, unfrozen_base_layers=3):
+    """DenseNet201 with the notebook's classification head at a (size, size) input"""
+    model_base = DenseNet201(weights=None, include_top=False, input_shape=(size, size, 3))
+
+    # Same trainable layers as the notebook: the last few base layers and the head
+    for layer in model_base.layers[:-unfrozen_base_layers]:
+        layer.trainable = False
+
+    x = GlobalAveragePooling2D()(model_base.output)
+    x = Dense(1024, activation='relu')(x)
+    x = Dropout(0.5)(x)
+    x = Dense(512, activation='relu')(x)
+    x = Dropout(0.5)(x)
+    output = Dense(2, activation='softmax')(x)
+    return keras.Model(inputs=model_base.input, outputs=output, name=f"densenet201_{size}")
+
+def fine_tune(source, size, data_dir, args):
+    """Start from the trained model's weights and fine-tune at the new input size"""
+    model = create_densenet(size, args.unfrozen_base_layers)
+    # Convolution weights do not depend on the input size and global pooling
+    # keeps the head's input at 1920 features, so the weights carry over as-is
+    model.set_weights(source.get_weights())
+    model.compile(optimizer=keras.optimizers.Adam(learning_rate=args.learning_rate),
+                  loss='sparse_categorical_crossentropy', metrics=['accuracy'])
+
+    train_batches, val_batches, test_batches = create_batches(data_dir, args.batch_size, (size, size))
+    start_time = time.time()
+    model.fit(
+        train_batches,
+        epochs=args.epochs,
+        validation_data=val_batches,
+        callbacks=[keras.callbacks.EarlyStopping(monitor='val_loss', patience=2, restore_best_weights=True)]
+    )
+    print(f"Fine-tuning at {size}x{size}: {time.time() - start_time:.2f}s")
+    return model, test_batches
+
+def pareto_front(results):
+    """Sizes no other size beats on both accuracy and latency"""
+    front = set()
+    for result in results:
+        dominated = any(
+            other["accuracy"] >= result["accuracy"] and other["latency_ms"] <= result["latency_ms"]
+            and (other["accuracy"] > result["accuracy"] or other["latency_ms"] < result["latency_ms"])
+            for other in results
+        )
+        if not dominated:
+            front.add(result["size"])
+    return front
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep the drowsiness model's input resolution: accuracy vs ONNX CPU latency")
+    parser.add_argument("data_dir", help="DDD split folder with train/val/test subfolders (e.g. Dataset2)")
+    parser.add_argument("--source", default="models/densenet201.keras", help="Trained Keras model to start from")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[96, 128, 160, 224], help="Square input sizes to try")
+    parser.add_argument("--output-dir", default="models", help="Where to write densenet201_<size>.keras/.onnx")
+    parser.add_argument("--epochs", type=int, default=5, help="Fine-tuning epochs per size")
+    parser.add_argument("--batch-size", type=int, default=32, help="Training batch size")
+    parser.add_argument("--learning-rate", type=float, default=0.0001, help="Adam learning rate")
+    parser.add_argument("--unfrozen-base-layers", type=int, default=3, help="Trainable DenseNet layers (as in the notebook)")
+    parser.add_argument("--latency-runs", type=int, default=50, help="ONNX Runtime calls per size")
+    parser.add_argument("--max-accuracy-drop", type=float, default=1.0,
+                        help="Accuracy loss (percentage points) accepted for the recommendation")
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.source):
+        print(f"Error: source model {args.source} does not exist")
+        sys.exit(1)
+
+    print(f"Loading source model from: {args.source}")
+    source = keras.models.load_model(args.source)
+    source_size = source.input_shape[1]
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    results = []
+    for size in sorted(set(args.sizes)):
+        keras_path = os.path.join(args.output_dir, f"densenet201_{size}.keras")
+        onnx_path = os.path.splitext(keras_path)[0] + '.onnx'
+
+        if size == source_size:
+            # The trained model is the baseline, measured without retraining
+            model = source
+            _, _, test_batches = create_batches(args.data_dir, args.batch_size, (size, size))
+        else:
+            model, test_batches = fine_tune(source, size, args.data_dir, args)
+        model.save(keras_path)
+        convert_keras_to_onnx(keras_path, onnx_path)
+
+        accuracy = evaluate_accuracy(model, test_batches)
+        latency = measure_onnx_latency(onnx_path, runs=args.latency_runs, image_size=(size, size))
+        results.append({"size": size, "accuracy": accuracy, "latency_ms": latency, "onnx": onnx_path})
+        print(f"{size}x{size}: accuracy {accuracy * 100:.2f}%, ONNX latency {latency:.2f} ms")
+
+    baseline = next((result for result in results if result["size"] == source_size), max(results, key=lambda r: r["size"]))
+    front = pareto_front(results)
+
+    print("=" * 64)
+    print(f"{'Input size':14}{'Test accuracy':>16}{'ONNX ms':>12}{'Speedup':>10}{'Pareto':>10}")
+    for result in results:
+        label = f"{result['size']}x{result['size']}"
+        speedup = baseline["latency_ms"] / result["latency_ms"]
+        print(f"{label:14}{result['accuracy'] * 100:>15.2f}%{result['latency_ms']:>12.2f}{speedup:>9.2f}x"
+              f"{'*' if result['size'] in front else '':>10}")
+    print("=" * 64)
+    print(f"Accuracy on {args.data_dir}/test, latency is the mean of {args.latency_runs} single-frame ONNX Runtime calls; "
+          f"speedup is against {baseline['size']}x{baseline['size']}.")
+
+    # Smallest (fastest) Pareto size within the accepted accuracy loss
+    acceptable = [result for result in results if result["size"] in front
+                  and (baseline["accuracy"] - result["accuracy"]) * 100 <= args.max_accuracy_drop]
+    if acceptable:
+        best = min(acceptable, key=lambda result: result["latency_ms"])
+        print(f"Recommended: {best['size']}x{best['size']} "
+              f"({(baseline['accuracy'] - best['accuracy']) * 100:.2f} accuracy points below {baseline['size']}x{baseline['size']})")
+        print(f"Run the server with it: python main.py --backend onnx --model {best['onnx']}")
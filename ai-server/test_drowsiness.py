@@ -1,51 +1,42 @@
-import onnxruntime as ort
 import numpy as np
-from PIL import Image
 import os
 import argparse
 import matplotlib.pyplot as plt
+from drowsiness_processing import CLASS_LABELS, load_image, preprocess_image, postprocess_prediction
+from inference_backends import BACKENDS, DEFAULT_MODEL_PATHS, get_backend_name, create_backend
 
-def detect_drowsiness(image_path, model_path="models/densenet201.onnx"):
+def detect_drowsiness(image_path, model_path="models/densenet201.onnx", backend_name="onnx"):
     # Check if model exists
     if not os.path.exists(model_path):
         print(f"Error: Model file {model_path} does not exist")
         return None
         
-    # Load ONNX model
+    # Load model with the selected backend
     try:
-        model = ort.InferenceSession(model_path)
-        print(f"Model loaded successfully from {model_path}")
+        model = create_backend(backend_name, model_path)
+        print(f"Model loaded successfully from {model_path} ({backend_name} backend)")
     except Exception as e:
         print(f"Error loading model: {e}")
         return None
         
     # Load and preprocess image
     try:
-        image = Image.open(image_path)
-        image_resized = image.resize((224, 224))
-        image_array = np.array(image_resized).astype(np.float32)
-        image_array = image_array / 255.0
-        image_array = np.expand_dims(image_array, axis=0)
-        
-        # Get input and output names
-        input_name = model.get_inputs()[0].name
-        output_name = model.get_outputs()[0].name
+        image = load_image(image_path)
+        image_resized = image.resize(model.input_size)
+        image_array = np.expand_dims(preprocess_image(image, size=model.input_size, dtype=model.input_dtype), axis=0)
         
         # Make prediction
-        predictions = model.run([output_name], {input_name: image_array})[0]
-        
-        # Get class with highest probability
-        class_index = np.argmax(predictions[0])
-        probability = float(predictions[0][class_index])
+        predictions = model.predict(image_array)
         
-        # Determine result
-        result = "Drowsy" if class_index == 0 else "Non-Drowsy"
+        detection = postprocess_prediction(predictions[0])
+        result = detection["result"]
+        probability = detection["probability"]
         
         # Display results
         print(f"Drowsiness detection result: {result} ({probability * 100:.2f}%)")
         print("Probability breakdown:")
         for i, prob in enumerate(predictions[0]):
-            status = "Drowsy" if i == 0 else "Non-Drowsy"
+            status = CLASS_LABELS[i]
             print(f"  Class {i} ({status}): {prob * 100:.2f}%")
             
         # Show image with result
@@ -55,11 +46,7 @@ def detect_drowsiness(image_path, model_path="models/densenet201.onnx"):
         plt.axis('off')
         plt.show()
         
-        return {
-            "result": result,
-            "class_index": int(class_index),
-            "probability": probability
-        }
+        return detection
     except Exception as e:
         print(f"Error processing image: {e}")
         return None
@@ -67,14 +54,17 @@ def detect_drowsiness(image_path, model_path="models/densenet201.onnx"):
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Test drowsiness detection on a single image")
     parser.add_argument("image_path", help="Path to the image file")
-    parser.add_argument("--model", default="models/densenet201.onnx", help="Path to the ONNX model file")
+    parser.add_argument("--backend", choices=list(BACKENDS), help="Inference backend (default: $DROWSY_BACKEND or onnx)")
+    parser.add_argument("--model", help="Path to the model file (default depends on the backend)")
     
     args = parser.parse_args()
+    backend_name = get_backend_name(args.backend, default='onnx')
+    model_path = args.model or DEFAULT_MODEL_PATHS[backend_name]
     
     if not os.path.exists(args.image_path):
         print(f"Error: Image file {args.image_path} does not exist")
         exit(1)
         
-    result = detect_drowsiness(args.image_path, args.model)
+    result = detect_drowsiness(args.image_path, model_path, backend_name)
     if result:
         print("Detection successful!") 
\ No newline at end of file
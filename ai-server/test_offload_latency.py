@@ -0,0 +1,131 @@
+import eventlet
+eventlet.monkey_patch(os=False)
+
+import sys
+import time
+import argparse
+import numpy as np
+from offload import BlockingOffload, HubLagMonitor, percentile
+from inference_backends import BACKENDS, create_backend
+
+def synthetic_inference(size):
+    """CPU-bound stand-in for a model call; BLAS releases the GIL like the real runtimes"""
+    a = np.random.rand(size, size).astype(np.float32)
+    b = np.random.rand(size, size).astype(np.float32)
+    def infer():
+        return np.dot(a, b)
+    return infer
+
+def model_inference(backend_name, model_path):
+    model = create_backend(backend_name, model_path)
+    width, height = model.input_size
+    batch = np.zeros((1, height, width, 3), dtype=model.input_dtype)
+    return lambda: model.predict(batch)
+
+def echo_server(sock):
+    """Tiny TCP echo server standing in for the Socket.IO server"""
+    while True:
+        conn, _ = sock.accept()
+        eventlet.spawn(echo_connection, conn)
+
+def echo_connection(conn):
+    while True:
+        data = conn.recv(64)
+        if not data:
+            break
+        conn.sendall(data)
+
+def run_viewer(port, interval, duration):
+    """Ping the echo server like a viewer polling for frames and return round-trip times"""
+    conn = eventlet.connect(('127.0.0.1', port))
+    round_trips = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        conn.sendall(b'ping')
+        conn.recv(64)
+        round_trips.append(time.perf_counter() - started)
+        eventlet.sleep(interval)
+    conn.close()
+    return round_trips
+
+def run_scenario(infer, offload, streams, port, interval, duration):
+    """Saturate inference from several camera greenlets while a viewer measures latency"""
+    running = [True]
+    inferences = [0]
+
+    def camera():
+        while running[0]:
+            offload.run(infer)
+            inferences[0] += 1
+            # Yield between frames like the WebSocket read loop does
+            eventlet.sleep(0)
+
+    monitor = HubLagMonitor(interval=interval)
+    monitor.start()
+    cameras = [eventlet.spawn(camera) for _ in range(streams)]
+    round_trips = run_viewer(port, interval, duration)
+    running[0] = False
+    for camera_thread in cameras:
+        camera_thread.wait()
+    monitor.stop()
+
+    return {
+        "p50_ms": percentile(round_trips, 0.5) * 1000.0,
+        "p95_ms": percentile(round_trips, 0.95) * 1000.0,
+        "max_ms": max(round_trips) * 1000.0 if round_trips else 0.0,
+        "hub_lag_ms": monitor.stats()["p95_lag_ms"],
+        "inferences_per_s": inferences[0] / duration,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that viewer latency stays flat while inference is saturated")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), help="Run a real model instead of the synthetic load")
+    parser.add_argument("--model", help="Model file for --backend")
+    parser.add_argument("--matrix-size", type=int, default=768, help="Size of the synthetic matmul load")
+    parser.add_argument("--streams", type=int, default=2, help="Number of camera greenlets running inference")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per scenario")
+    parser.add_argument("--interval", type=float, default=0.02, help="Seconds between viewer pings")
+    parser.add_argument("--max-p95-ms", type=float, default=25.0, help="Allowed p95 viewer round trip with offload")
+
+    args = parser.parse_args()
+
+    if args.backend:
+        if not args.model:
+            print("Error: --model is required with --backend")
+            sys.exit(1)
+        infer = model_inference(args.backend, args.model)
+    else:
+        infer = synthetic_inference(args.matrix_size)
+
+    started = time.perf_counter()
+    infer()
+    print(f"One inference takes {(time.perf_counter() - started) * 1000.0:.1f} ms")
+
+    server_socket = eventlet.listen(('127.0.0.1', 0))
+    port = server_socket.getsockname()[1]
+    eventlet.spawn(echo_server, server_socket)
+
+    scenarios = [
+        ("Idle", None),
+        ("Inline inference", BlockingOffload(enabled=False)),
+        ("Offloaded inference", BlockingOffload(enabled=True)),
+    ]
+    results = {}
+    print("=" * 78)
+    print(f"{'Scenario':22}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'hub lag p95':>13}{'infer/s':>10}")
+    for name, offload in scenarios:
+        if offload is None:
+            stats = run_scenario(lambda: None, BlockingOffload(enabled=False), 0, port, args.interval, args.duration)
+        else:
+            stats = run_scenario(infer, offload, args.streams, port, args.interval, args.duration)
+        results[name] = stats
+        print(f"{name:22}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['max_ms']:>10.2f}"
+              f"{stats['hub_lag_ms']:>13.2f}{stats['inferences_per_s']:>10.1f}")
+    print("=" * 78)
+
+    offloaded_p95 = results["Offloaded inference"]["p95_ms"]
+    if offloaded_p95 > args.max_p95_ms:
+        print(f"FAIL: viewer p95 round trip {offloaded_p95:.2f} ms with offload exceeds {args.max_p95_ms:.2f} ms")
+        sys.exit(1)
+    print(f"PASS: viewer p95 round trip stays at {offloaded_p95:.2f} ms while inference is saturated")
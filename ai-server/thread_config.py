@@ -0,0 +1,125 @@
+import os
+import json
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Written by tune_threads.py and applied by main.py at startup
+DEFAULT_THREAD_CONFIG_PATH = 'inference_threads.json'
+
+# Environment variables each config section sets, read by the backends when they load
+THREAD_ENV_VARS = {
+    'drowsiness': {
+        'intra_op_threads': ('ORT_INTRA_OP_THREADS', 'TF_INTRA_OP_THREADS', 'TFLITE_THREADS'),
+        'inter_op_threads': ('ORT_INTER_OP_THREADS', 'TF_INTER_OP_THREADS'),
+    },
+    # torch_* for the ultralytics model, runtime_threads for its ONNX Runtime / OpenVINO export
+    'traffic': {
+        'torch_threads': ('TORCH_THREADS',),
+        'torch_interop_threads': ('TORCH_INTEROP_THREADS',),
+        'runtime_threads': ('TRAFFIC_THREADS',),
+    },
+}
+
+def ort_affinity_string(cores, threads):
+    """ORT session.intra_op_thread_affinities value: one entry per pool thread, 1-based core ids
+
+    The calling thread is the first of the ``threads`` intra-op threads, so
+    only ``threads - 1`` pool threads get pinned, one core each.
+    """
+    pool_cores = list(cores)[1:threads]
+    if not pool_cores or len(pool_cores) < threads - 1:
+        return None
+    return ';'.join(str(core + 1) for core in pool_cores)
+
+@contextmanager
+def pinned_thread(core):
+    """Pin the calling thread to one core for the duration of the block, then restore its affinity"""
+    previous = None
+    if hasattr(os, 'sched_setaffinity'):
+        try:
+            previous = os.sched_getaffinity(0)
+            os.sched_setaffinity(0, {core})
+        except OSError as e:
+            logger.warning(f"Could not pin the calling thread to core {core}: {e}")
+            previous = None
+    try:
+        yield
+    finally:
+        if previous is not None:
+            os.sched_setaffinity(0, previous)
+
+def load_thread_config(path=DEFAULT_THREAD_CONFIG_PATH):
+    """Read a tuned thread configuration, or None when there is none"""
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def apply_thread_config(config):
+    """Export a tuned configuration as defaults and pin the process
+
+    Explicitly set environment variables keep precedence over the file. The
+    process (and so YOLO/PyTorch and every thread started later) is pinned to
+    ``process_cores``; ONNX Runtime pins its own intra-op pool to the
+    drowsiness ``cores`` through the session affinity setting, and the ONNX
+    backend moves the thread calling the model to the first of those cores
+    for each run (``ORT_CALLER_CORE``).
+    """
+    for section, settings in THREAD_ENV_VARS.items():
+        values = config.get(section, {})
+        for key, env_vars in settings.items():
+            if values.get(key):
+                for env_var in env_vars:
+                    os.environ.setdefault(env_var, str(values[key]))
+
+    drowsiness = config.get('drowsiness', {})
+    if drowsiness.get('cores') and drowsiness.get('intra_op_threads'):
+        affinities = ort_affinity_string(drowsiness['cores'], int(drowsiness['intra_op_threads']))
+        if affinities:
+            os.environ.setdefault('ORT_INTRA_OP_AFFINITIES', affinities)
+        # The calling thread is one of the intra-op threads, but it comes from the server's thread pool
+        os.environ.setdefault('ORT_CALLER_CORE', str(drowsiness['cores'][0]))
+
+    process_cores = config.get('process_cores')
+    if process_cores and hasattr(os, 'sched_setaffinity'):
+        try:
+            os.sched_setaffinity(0, set(process_cores))
+        except OSError as e:
+            logger.error(f"Could not pin the process to cores {process_cores}: {e}")
+
+    logger.info(f"Applied inference thread configuration: {json.dumps(config, sort_keys=True)}")
+
+def configure_tf_threads():
+    """Apply TF_INTRA_OP_THREADS / TF_INTER_OP_THREADS; must run before TensorFlow executes any op"""
+    import tensorflow as tf
+
+    intra = int(os.environ.get('TF_INTRA_OP_THREADS', '0'))
+    inter = int(os.environ.get('TF_INTER_OP_THREADS', '0'))
+    try:
+        if intra:
+            tf.config.threading.set_intra_op_parallelism_threads(intra)
+        if inter:
+            tf.config.threading.set_inter_op_parallelism_threads(inter)
+    except RuntimeError as e:
+        # TensorFlow was already initialized by an earlier model load
+        logger.warning(f"TensorFlow thread settings not applied: {e}")
+
+def configure_torch_threads():
+    """Apply TORCH_THREADS / TORCH_INTEROP_THREADS before the first PyTorch inference"""
+    try:
+        import torch
+    except ImportError:
+        return
+
+    threads = int(os.environ.get('TORCH_THREADS', '0'))
+    interop_threads = int(os.environ.get('TORCH_INTEROP_THREADS', '0'))
+    if threads:
+        torch.set_num_threads(threads)
+    if interop_threads:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError as e:
+            # Only allowed once, before any inter-op parallel work started
+            logger.warning(f"PyTorch inter-op threads not applied: {e}")
@@ -0,0 +1,193 @@
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import subprocess
+import numpy as np
+from inference_backends import BACKENDS, DEFAULT_MODEL_PATHS, create_backend
+from thread_config import DEFAULT_THREAD_CONFIG_PATH, apply_thread_config, configure_torch_threads
+from yolo_runtime import YOLO_RUNTIMES, YoloRuntimeDetector, find_exported_models
+
+# Marks the result line printed by a trial subprocess
+TRIAL_RESULT_PREFIX = 'TRIAL_RESULT '
+
+def available_cores():
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+def traffic_threads(traffic_backend, threads):
+    """Traffic section of a candidate: PyTorch threads for ultralytics, runtime threads for an export"""
+    if traffic_backend == 'ultralytics':
+        return {"backend": traffic_backend, "torch_threads": threads, "torch_interop_threads": 1}
+    return {"backend": traffic_backend, "runtime_threads": threads}
+
+def candidate_configs(cores, backend_name, thread_options=None, traffic_backend='ultralytics'):
+    """Shared-core thread count combinations, then splits of the cores between the two models"""
+    count = len(cores)
+    thread_options = thread_options or sorted({n for n in (1, 2, 4, count // 2, count) if 1 <= n <= count})
+
+    candidates = [{"label": "runtime defaults", "traffic": {"backend": traffic_backend}}]
+    for drowsiness_threads in thread_options:
+        for traffic_thread_count in thread_options:
+            candidates.append({
+                "label": f"shared d{drowsiness_threads}/t{traffic_thread_count}",
+                "drowsiness": {"intra_op_threads": drowsiness_threads, "inter_op_threads": 1},
+                "traffic": traffic_threads(traffic_backend, traffic_thread_count),
+            })
+
+    # Only ONNX Runtime can pin its own pool; TensorFlow would share the process cores with YOLO
+    if backend_name == 'onnx':
+        for split in range(1, count):
+            candidates.append({
+                "label": f"pinned {split}+{count - split} cores",
+                "drowsiness": {"intra_op_threads": split, "inter_op_threads": 1, "cores": cores[:split]},
+                "traffic": traffic_threads(traffic_backend, count - split),
+                "process_cores": cores[split:],
+            })
+    return candidates
+
+def summarize(latencies, duration):
+    if not latencies:
+        return {"fps": 0.0, "p50_ms": 0.0, "p95_ms": 0.0}
+    ordered = sorted(latencies)
+    return {
+        "fps": len(latencies) / duration,
+        "p50_ms": ordered[len(ordered) // 2] * 1000.0,
+        "p95_ms": ordered[int(0.95 * (len(ordered) - 1))] * 1000.0,
+    }
+
+def run_trial(config, args):
+    """Run both models concurrently under one configuration (inside a fresh process)"""
+    apply_thread_config(config)
+
+    drowsiness_model = create_backend(args.backend, args.model)
+    width, height = drowsiness_model.input_size
+    batch = np.zeros((1, height, width, 3), dtype=drowsiness_model.input_dtype)
+    workloads = {"drowsiness": lambda: drowsiness_model.predict(batch)}
+
+    if args.yolo_model:
+        frame = np.random.default_rng(0).integers(0, 256, size=(480, 640, 3), dtype=np.uint8)
+        if args.traffic_backend == 'ultralytics':
+            from ultralytics import YOLO
+            configure_torch_threads()
+            yolo = YOLO(args.yolo_model)
+            workloads["traffic"] = lambda: yolo(frame, imgsz=args.imgsz, verbose=False)
+        else:
+            # The export the server runs with TRAFFIC_BACKEND, on TRAFFIC_THREADS from the candidate
+            yolo = YoloRuntimeDetector(find_exported_models(args.yolo_model, args.traffic_backend, [args.imgsz]),
+                                       runtime=args.traffic_backend)
+            yolo.load()
+            workloads["traffic"] = lambda: yolo.detect(frame, args.imgsz)
+
+    for workload in workloads.values():
+        for _ in range(3):
+            workload()
+
+    latencies = {name: [] for name in workloads}
+
+    # Pinning of the thread calling ORT is left to the backend, exactly as in the server
+    def run(name, workload):
+        deadline = time.perf_counter() + args.duration
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            workload()
+            latencies[name].append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=run, args=item) for item in workloads.items()]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {name: summarize(values, args.duration) for name, values in latencies.items()}
+
+def launch_trial(config, args):
+    """Run one trial in a subprocess; thread pools can only be configured once per process"""
+    command = [sys.executable, os.path.abspath(__file__), '--trial', json.dumps(config),
+               '--backend', args.backend, '--model', args.model, '--duration', str(args.duration)]
+    if args.yolo_model:
+        command += ['--yolo-model', args.yolo_model, '--traffic-backend', args.traffic_backend,
+                    '--imgsz', str(args.imgsz)]
+    # Explicit thread settings in the environment would override the candidate
+    env = {key: value for key, value in os.environ.items()
+           if not key.startswith(('ORT_INTRA', 'ORT_INTER', 'ORT_CALLER', 'TF_INTRA', 'TF_INTER', 'TFLITE_THREADS', 'TRAFFIC_THREADS', 'TORCH_'))}
+    completed = subprocess.run(command, capture_output=True, text=True, env=env)
+    for line in completed.stdout.splitlines():
+        if line.startswith(TRIAL_RESULT_PREFIX):
+            return json.loads(line[len(TRIAL_RESULT_PREFIX):])
+    print(f"Trial '{config['label']}' failed:\n{completed.stderr[-2000:]}")
+    return None
+
+def pick_best(results, min_traffic_fps):
+    """Lowest drowsiness p95 latency among configurations that keep traffic detection fast enough"""
+    feasible = [(config, result) for config, result in results
+                if "traffic" not in result or result["traffic"]["fps"] >= min_traffic_fps]
+    if feasible:
+        return min(feasible, key=lambda item: item[1]["drowsiness"]["p95_ms"])
+    return max(results, key=lambda item: item[1].get("traffic", {}).get("fps", 0.0))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark thread counts and core pinning for both models on this host")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="onnx", help="Drowsiness model backend")
+    parser.add_argument("--model", help="Drowsiness model (defaults to the backend's model)")
+    parser.add_argument("--yolo-model", default="models/best.pt", help="YOLOv8 model, empty to tune drowsiness alone")
+    parser.add_argument("--traffic-backend", choices=['ultralytics'] + list(YOLO_RUNTIMES),
+                        default=os.environ.get('TRAFFIC_BACKEND', 'ultralytics').lower(),
+                        help="Traffic model runtime, as TRAFFIC_BACKEND in the server")
+    parser.add_argument("--imgsz", type=int, default=int(os.environ.get('TRAFFIC_IMGSZ', '640')),
+                        help="Traffic model input size")
+    parser.add_argument("--duration", type=float, default=8.0, help="Seconds per trial")
+    parser.add_argument("--threads", type=int, nargs="+", help="Thread counts to try (default: 1, 2, 4, half and all cores)")
+    parser.add_argument("--min-traffic-fps", type=float, default=5.0, help="Traffic detection rate the chosen configuration must keep")
+    parser.add_argument("--output", default=DEFAULT_THREAD_CONFIG_PATH, help="Where to write the best configuration")
+    parser.add_argument("--trial", help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+    args.model = args.model or DEFAULT_MODEL_PATHS[args.backend]
+    if args.yolo_model and not os.path.exists(args.yolo_model):
+        print(f"YOLO model {args.yolo_model} not found, tuning the drowsiness model alone")
+        args.yolo_model = None
+    if (args.yolo_model and args.traffic_backend != 'ultralytics'
+            and not find_exported_models(args.yolo_model, args.traffic_backend, [args.imgsz])):
+        print(f"No {args.traffic_backend} export of {args.yolo_model} at imgsz {args.imgsz}, "
+              f"run export_yolo.py first; tuning the drowsiness model alone")
+        args.yolo_model = None
+
+    if args.trial:
+        print(TRIAL_RESULT_PREFIX + json.dumps(run_trial(json.loads(args.trial), args)))
+        sys.exit(0)
+
+    if not os.path.exists(args.model):
+        print(f"Error: Model file {args.model} does not exist")
+        sys.exit(1)
+
+    cores = available_cores()
+    candidates = candidate_configs(cores, args.backend, args.threads, args.traffic_backend)
+    print(f"Tuning {len(candidates)} configurations on {len(cores)} cores ({args.duration:.0f}s each)")
+
+    results = []
+    print("=" * 86)
+    print(f"{'Configuration':26}{'Drowsy fps':>12}{'p50 ms':>10}{'p95 ms':>10}{'Traffic fps':>14}{'p95 ms':>10}")
+    for config in candidates:
+        result = launch_trial(config, args)
+        if result is None:
+            continue
+        results.append((config, result))
+        drowsiness = result["drowsiness"]
+        traffic = result.get("traffic", {"fps": 0.0, "p95_ms": 0.0})
+        print(f"{config['label']:26}{drowsiness['fps']:>12.1f}{drowsiness['p50_ms']:>10.1f}{drowsiness['p95_ms']:>10.1f}"
+              f"{traffic['fps']:>14.1f}{traffic['p95_ms']:>10.1f}")
+    print("=" * 86)
+
+    if not results:
+        print("Error: every trial failed")
+        sys.exit(1)
+
+    best_config, best_result = pick_best(results, args.min_traffic_fps)
+    best_config = dict(best_config, backend=args.backend, cpu_count=len(cores), measured=best_result)
+    with open(args.output, 'w') as f:
+        json.dump(best_config, f, indent=2)
+    print(f"Best: {best_config['label']} (drowsiness p95 {best_result['drowsiness']['p95_ms']:.1f} ms), "
+          f"written to {args.output}")
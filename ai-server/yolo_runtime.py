@@ -0,0 +1,152 @@
+import os
+import time
+import logging
+
+import numpy as np
+import cv2
+
+logger = logging.getLogger(__name__)
+
+# Runtimes that can execute an exported YOLOv8 model without ultralytics or torch
+YOLO_RUNTIMES = ('onnx', 'openvino')
+
+def exported_model_path(source_path, runtime, imgsz):
+    """Where export_yolo.py writes a model: models/best_640.onnx or models/best_640_openvino_model/best.xml"""
+    stem = os.path.splitext(source_path)[0]
+    if runtime == 'onnx':
+        return f"{stem}_{imgsz}.onnx"
+    return os.path.join(f"{stem}_{imgsz}_openvino_model", f"{os.path.basename(stem)}.xml")
+
+def find_exported_models(source_path, runtime, sizes):
+    """{imgsz: path} of the exports that exist for the requested input sizes"""
+    paths = {imgsz: exported_model_path(source_path, runtime, imgsz) for imgsz in sorted(set(sizes))}
+    return {imgsz: path for imgsz, path in paths.items() if os.path.exists(path)}
+
+def letterbox(image, imgsz, color=(114, 114, 114)):
+    """Resize keeping the aspect ratio and pad to (imgsz, imgsz), as ultralytics does
+
+    Returns the padded image, the scale and the (left, top) padding.
+    """
+    height, width = image.shape[:2]
+    scale = min(imgsz / height, imgsz / width)
+    new_width, new_height = int(round(width * scale)), int(round(height * scale))
+    if (new_width, new_height) != (width, height):
+        image = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+    pad_width, pad_height = (imgsz - new_width) / 2, (imgsz - new_height) / 2
+    top, bottom = int(round(pad_height - 0.1)), int(round(pad_height + 0.1))
+    left, right = int(round(pad_width - 0.1)), int(round(pad_width + 0.1))
+    image = cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)
+    return image, scale, (left, top)
+
+def box_iou(box, boxes):
+    """IoU of one (x1, y1, x2, y2) box against an (N, 4) array"""
+    x1 = np.maximum(box[0], boxes[:, 0])
+    y1 = np.maximum(box[1], boxes[:, 1])
+    x2 = np.minimum(box[2], boxes[:, 2])
+    y2 = np.minimum(box[3], boxes[:, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return intersection / (area + areas - intersection + 1e-9)
+
+def non_max_suppression(boxes, scores, class_ids, iou_threshold=0.7, max_detections=300):
+    """Per-class greedy NMS, returning the indices of the kept boxes by descending score
+
+    Boxes are shifted by class so boxes of different classes never overlap,
+    which runs all classes in one pass (the same trick ultralytics uses).
+    """
+    offset_boxes = boxes + (class_ids.astype(np.float32) * 7680.0)[:, None]
+    order = np.argsort(-scores)
+    keep = []
+    while order.size and len(keep) < max_detections:
+        best = order[0]
+        keep.append(best)
+        if order.size == 1:
+            break
+        ious = box_iou(offset_boxes[best], offset_boxes[order[1:]])
+        order = order[1:][ious <= iou_threshold]
+    return np.array(keep, dtype=np.int64)
+
+def postprocess(output, scale, padding, image_shape, conf_threshold=0.25, iou_threshold=0.7):
+    """Turn a raw (1, 4 + classes, anchors) YOLOv8 output into detections on the original image
+
+    Returns an (N, 6) array of x1, y1, x2, y2, confidence and class id.
+    """
+    predictions = output[0].T
+    class_scores = predictions[:, 4:]
+    class_ids = np.argmax(class_scores, axis=1)
+    confidences = class_scores[np.arange(len(class_ids)), class_ids]
+    mask = confidences > conf_threshold
+    if not np.any(mask):
+        return np.zeros((0, 6), dtype=np.float32)
+    predictions, class_ids, confidences = predictions[mask], class_ids[mask], confidences[mask]
+
+    # Center/size to corners, then undo the letterbox
+    boxes = np.empty((len(predictions), 4), dtype=np.float32)
+    boxes[:, :2] = predictions[:, :2] - predictions[:, 2:4] / 2
+    boxes[:, 2:] = predictions[:, :2] + predictions[:, 2:4] / 2
+    keep = non_max_suppression(boxes, confidences, class_ids, iou_threshold)
+    boxes = boxes[keep]
+    boxes[:, [0, 2]] = np.clip((boxes[:, [0, 2]] - padding[0]) / scale, 0, image_shape[1])
+    boxes[:, [1, 3]] = np.clip((boxes[:, [1, 3]] - padding[1]) / scale, 0, image_shape[0])
+    return np.column_stack([boxes, confidences[keep], class_ids[keep]]).astype(np.float32)
+
+class YoloRuntimeDetector:
+    """Exported YOLOv8 models on ONNX Runtime or OpenVINO, one per fixed input size
+
+    Exports have a fixed ``imgsz``, so a model is loaded for each exported
+    size and ``detect()`` uses the largest one not above the requested size
+    (the smallest when all are larger).
+    """
+
+    def __init__(self, model_paths, runtime='onnx', num_threads=None, conf_threshold=0.25, iou_threshold=0.7):
+        if runtime not in YOLO_RUNTIMES:
+            raise ValueError(f"Unknown YOLO runtime '{runtime}', choose from: {', '.join(YOLO_RUNTIMES)}")
+        if not model_paths:
+            raise ValueError("No exported YOLO models given")
+        self.model_paths = dict(model_paths)
+        self.runtime = runtime
+        self.num_threads = int(os.environ.get('TRAFFIC_THREADS', '0') if num_threads is None else num_threads)
+        self.conf_threshold = conf_threshold
+        self.iou_threshold = iou_threshold
+        self._runners = {}
+
+    def load(self):
+        started = time.time()
+        for imgsz, path in sorted(self.model_paths.items()):
+            self._runners[imgsz] = self._load_onnx(path) if self.runtime == 'onnx' else self._load_openvino(path)
+        logger.info(f"YOLO {self.runtime} models loaded in {time.time() - started:.2f}s "
+                    f"(sizes {sorted(self._runners)}, threads={self.num_threads or 'default'})")
+
+    def _load_onnx(self, path):
+        import onnxruntime as ort
+        from inference_backends import OrtSessionConfig
+
+        # The drowsiness model's core pinning must not apply to this session
+        options = OrtSessionConfig(intra_op_threads=self.num_threads, intra_op_affinities='').build()
+        session = ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        input_name = session.get_inputs()[0].name
+        return lambda blob: session.run(None, {input_name: blob})[0]
+
+    def _load_openvino(self, path):
+        import openvino as ov
+
+        config = {'INFERENCE_NUM_THREADS': self.num_threads} if self.num_threads else {}
+        compiled = ov.Core().compile_model(path, 'CPU', config)
+        output = compiled.output(0)
+        request = compiled.create_infer_request()
+        return lambda blob: request.infer({0: blob})[output]
+
+    def input_size_for(self, imgsz):
+        sizes = sorted(self._runners)
+        fitting = [size for size in sizes if size <= imgsz]
+        return fitting[-1] if fitting else sizes[0]
+
+    def detect(self, bgr_image, imgsz):
+        """Return an (N, 6) array of x1, y1, x2, y2, confidence, class id in image pixels"""
+        size = self.input_size_for(imgsz)
+        padded, scale, padding = letterbox(bgr_image, size)
+        # BGR HWC uint8 -> RGB CHW float32 in [0, 1]
+        blob = np.ascontiguousarray(padded[:, :, ::-1].transpose(2, 0, 1)[None], dtype=np.float32) / 255.0
+        output = self._runners[size](blob)
+        return postprocess(output, scale, padding, bgr_image.shape, self.conf_threshold, self.iou_threshold)